@@ -8,10 +8,16 @@ This file when executed creates a GUI with Tkinter that allows a user to
 search through the database using sqlite3 for all available cards and/or sets.
 
 When search results are found, the card image can be pulled by selecting it
-and clicking the button labeled "View"
+and clicking the button labeled "View". Images are cached locally (see
+image_cache.py) and the first results of a search are prefetched. Titles
+are suggested while typing from an in-memory index (see name_index.py).
 """
 
+import itertools
+import queue
 import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from tkinter import (
     Toplevel,
     Button,
@@ -19,6 +25,7 @@ from tkinter import (
     Tk,
     Scrollbar,
     Entry,
+    Listbox,
     StringVar,
     OptionMenu,
     RIGHT,
@@ -26,20 +33,221 @@ from tkinter import (
     BOTH,
     BOTTOM,
     Y,
+    END,
 )
 from tkinter import ttk
-from urllib.request import urlopen
-import io
 
-from PIL import Image, ImageTk
+from PIL import ImageTk
 
 from .update_db.enums import Rarity, Color
 from .update_db.card import name_to_rarity
-from .database_search import SearchResults, DB_FILE
+from .connection import ConnectionManager
+from .database_search import PAGE_SIZE
+from .image_cache import ImageCache
+from .name_index import NameIndex, SUGGESTIONS
+from .query_log import QueryLog
+
+PREFETCH_LIMIT = 25  # images of a result set downloaded ahead of a click
+LOAD_AT = 0.9  # fraction of the loaded results scrolled through before loading more
+POLL_MS = 16  # how often finished work is picked up, about once a frame at 60fps
+WORKERS = 2
+DEBOUNCE_MS = 150  # pause in typing before the title suggestions are updated
+IMAGES = ImageCache()
+# timings are only kept when MTG_QUERY_LOG is set, see query_log.py
+CONNECTIONS = ConnectionManager(query_log=QueryLog.from_environment())
+
+
+class BackgroundRunner:
+    """
+    Runs searches and image loads on worker threads so the Tk main loop
+    never waits on SQLite or the network. Finished work is queued and
+    picked up on the main thread by a root.after poll, the only place
+    the callbacks touch Tk from.
+
+    Each piece of work belongs to a channel, and submitting to a channel
+    supersedes whatever was still running on it: the older future is
+    cancelled (or interrupted through its cancel hook) and its result is
+    dropped when it arrives.
+
+    Args:
+        root (Tk): Main window
+        workers (int): Number of worker threads
+    """
+
+    def __init__(self, root: Tk, workers: int = WORKERS):
+        self.root = root
+        self.status = StringVar(root)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gui")
+        self._finished = queue.SimpleQueue()
+        self._current = {}  # channel: (generation, future, cancel hook)
+        self._generation = itertools.count(1)
+        self.root.after(POLL_MS, self._poll)
+
+    def submit(self, channel, work, on_done, cancel=None, on_error=None):
+        """
+        Run work on a worker thread, replacing the work running on the channel
+
+        Args:
+            channel (Hashable): what the work is for, e.g. "search"
+            work (Callable[[], Any]): called on a worker thread
+            on_done (Callable[[Any], None]): called with the result of work
+                on the main thread, unless it was superseded
+            cancel (Callable[[], None]): called on the main thread to stop
+                work part way through when it is superseded
+            on_error (Callable[[BaseException], None]): called with what
+                work raised on the main thread, after the status is set
+        """
+        self.cancel(channel)
+        generation = next(self._generation)
+        future = self._executor.submit(work)
+        self._current[channel] = (generation, future, cancel)
+        future.add_done_callback(
+            lambda done: self._finished.put((channel, generation, done, on_done, on_error))
+        )
+
+    def cancel(self, channel):
+        """
+        Stop the work running on a channel and drop its result
+
+        Args:
+            channel (Hashable): channel given to submit
+        """
+        current = self._current.pop(channel, None)
+        if current is None:
+            return
+        _, future, cancel = current
+        if not future.cancel() and not future.done() and cancel is not None:
+            cancel()
+
+    def _poll(self):
+        """
+        Hand finished work to its callback on the main thread
+        """
+        # first, so a callback that raises does not stop the polling
+        self.root.after(POLL_MS, self._poll)
+        while True:
+            try:
+                channel, generation, future, on_done, on_error = self._finished.get_nowait()
+            except queue.Empty:
+                break
+            current = self._current.get(channel)
+            if current is None or current[0] != generation or future.cancelled():
+                continue  # superseded
+            del self._current[channel]
+            error = future.exception()
+            if error is not None:
+                self.status.set(f"Failed: {error}")
+                if on_error is not None:
+                    on_error(error)
+            else:
+                on_done(future.result())
+
+    def close(self):
+        """
+        Cancel the work that has not started and let the threads exit
+        """
+        for channel in list(self._current):
+            self.cancel(channel)
+        self._executor.shutdown(wait=False)
+
+
+def load_name_index() -> NameIndex:
+    """
+    Build the index of card titles for the suggestions, on a worker thread
+    """
+    return NameIndex.load(CONNECTIONS.search_results().cursor)
+
+
+class Autocomplete:
+    """
+    Title suggestions shown under an Entry while typing. The list is
+    updated once typing pauses for DEBOUNCE_MS, from a NameIndex built
+    in the background when the application starts.
+
+    Args:
+        entry (Entry): Entry the title is typed in
+        runner (BackgroundRunner): runner the index is built on
+    """
 
-def on_button_click(args: tuple):
+    def __init__(self, entry: Entry, runner: BackgroundRunner):
+        self.entry = entry
+        self.index = None
+        self._pending = None  # id of the scheduled update
+        self.listbox = Listbox(entry.master, height=SUGGESTIONS)
+        entry.bind("<KeyRelease>", self.on_key, add="+")
+        entry.bind("<Down>", self.focus_list, add="+")
+        entry.bind("<Escape>", lambda event=None: self.hide(), add="+")
+        self.listbox.bind("<Return>", self.choose)
+        self.listbox.bind("<ButtonRelease-1>", self.choose)
+        self.listbox.bind("<Escape>", lambda event=None: self.hide())
+        runner.submit("names", load_name_index, self.set_index)
+
+    def set_index(self, index: NameIndex):
+        """
+        Start suggesting from an index once it is built
+        """
+        self.index = index
+
+    def on_key(self, event):
+        """
+        Schedule an update of the suggestions, replacing the one pending
+        """
+        if event.keysym in ("Down", "Up", "Return", "Escape"):
+            return
+        if self._pending is not None:
+            self.entry.after_cancel(self._pending)
+        self._pending = self.entry.after(DEBOUNCE_MS, self.update)
+
+    def update(self):
+        """
+        Show the titles suggested for the text in the entry
+        """
+        self._pending = None
+        text = self.entry.get()
+        titles = self.index.suggest(text) if self.index and len(text.strip()) >= 2 else []
+        if not titles or titles == [text]:
+            self.hide()
+            return
+        self.listbox.delete(0, END)
+        self.listbox.insert(END, *titles)
+        self.listbox.config(height=len(titles))
+        self.listbox.place(in_=self.entry, relx=0, rely=1, relwidth=1)
+        self.listbox.lift()
+
+    def focus_list(self, _event=None):
+        """
+        Move from the entry to the first suggestion
+        """
+        if self.listbox.winfo_ismapped():
+            self.listbox.focus_set()
+            self.listbox.selection_clear(0, END)
+            self.listbox.selection_set(0)
+            self.listbox.activate(0)
+
+    def choose(self, _event=None):
+        """
+        Put the selected suggestion in the entry
+        """
+        selected = self.listbox.curselection()
+        if selected:
+            self.entry.delete(0, END)
+            self.entry.insert(0, self.listbox.get(selected[0]))
+        self.hide()
+        self.entry.focus_set()
+
+    def hide(self):
+        """
+        Take the suggestions away
+        """
+        if self._pending is not None:
+            self.entry.after_cancel(self._pending)
+            self._pending = None
+        self.listbox.place_forget()
+
+
+def search_kwargs(args: tuple) -> dict:
     """
-    Button Command to perform the search based on the values in the GUI
+    Keyword arguments for the SearchResults searches from the values in the GUI
 
     Args:
         args: tuple
@@ -51,90 +259,235 @@ def on_button_click(args: tuple):
             set_shortened: str
     """
     title, card_type, subtype, rarity, color, set_shortened = args
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    sr = SearchResults(cursor)
     try:
         tmp_rarity = name_to_rarity[rarity]
     except KeyError:
         tmp_rarity = Rarity.UNKNOWN
-    cards = sr.multi_command_building(
-        title=title,
-        set_shortened=set_shortened,
-        color=color,
-        rarity=tmp_rarity,
-        card_type=card_type,
-        subtype=subtype,
+    return {
+        "title": title,
+        "set_shortened": set_shortened,
+        "color": color,
+        "rarity": tmp_rarity,
+        "card_type": card_type,
+        "subtype": subtype,
+    }
+
+
+def search_cards(kwargs: dict, connections: list) -> list:
+    """
+    Run the search for the first page of results, on a worker thread
+
+    Args:
+        kwargs: dict from search_kwargs
+        connections: list the connection used is added to, so the search
+            can be interrupted from the main thread
+    """
+    sr = CONNECTIONS.search_results()
+    conn = sr.cursor.connection
+    connections.append(conn)
+    try:
+        return sr.page_after(None, PAGE_SIZE, **kwargs)
+    finally:
+        connections.remove(conn)
+
+
+def load_page(kwargs: dict, last_id: int) -> list:
+    """
+    Run the search for the page of results after last_id, on a worker thread
+    """
+    return CONNECTIONS.search_results().page_after(last_id, PAGE_SIZE, **kwargs)
+
+
+def count_cards(kwargs: dict) -> int:
+    """
+    Count every result of the search, on a worker thread
+    """
+    return CONNECTIONS.search_results().count_cards(**kwargs)
+
+
+def interrupt_search(connections: list):
+    """
+    Stop a search that has been superseded, along with the image
+    prefetches for the result set it replaces
+
+    Args:
+        connections: list filled in by search_cards
+    """
+    IMAGES.cancel_prefetch()
+    for conn in list(connections):
+        try:
+            conn.interrupt()
+        except sqlite3.ProgrammingError:
+            pass  # closed in the meantime
+
+
+def show_results(runner: BackgroundRunner, kwargs: dict, cards: list):
+    """
+    Show the first page of cards found by a search, on the main thread,
+    while the results are counted
+    """
+    Result(runner, kwargs, cards)
+    if len(cards) < PAGE_SIZE:
+        runner.status.set(f"{len(cards)} cards found")
+        return
+    runner.status.set("Counting...")
+    runner.submit(
+        "count",
+        partial(count_cards, kwargs),
+        lambda total: runner.status.set(f"{total} cards found"),
     )
 
-    result(cards)
-    conn.close()
+
+def on_button_click(args: tuple, runner: BackgroundRunner):
+    """
+    Button Command to start the search based on the values in the GUI,
+    replacing any search still running
+
+    Args:
+        args: tuple of the values for search_kwargs
+        runner: BackgroundRunner the search is run on
+    """
+    runner.status.set("Searching...")
+    runner.cancel("count")
+    kwargs = search_kwargs(args)
+    connections = []
+    runner.submit(
+        "search",
+        partial(search_cards, kwargs, connections),
+        partial(show_results, runner, kwargs),
+        cancel=partial(interrupt_search, connections),
+    )
 
 
-def grab_image(card_id):
+def load_image(card_id):
     """
-    Grab the individual card image from online
+    Load the individual card image on a worker thread, from the cache
+    when it was seen before
 
     Args:
-        id: int
+        card_id: int
+
+    Returns:
+        PIL.Image.Image
     """
-    conn = sqlite3.connect(DB_FILE)
-    cursor = conn.cursor()
-    sr = SearchResults(cursor)
-    card = sr.get_card_by_id(card_id)
-    with urlopen(card.img_url) as u:
-        raw_data = u.read()
+    card = CONNECTIONS.search_results().get_card_by_id(card_id)
+    return IMAGES.get(card.img_url)
 
-    image_pil = Image.open(io.BytesIO(raw_data))
+
+def show_image(runner: BackgroundRunner, image_pil):
+    """
+    Open a window with a loaded card image, on the main thread
+    """
+    runner.status.set("")
     image_tk = ImageTk.PhotoImage(image_pil)
     window = Toplevel()
     window.title("Card Image")
     label = Label(window, image=image_tk)
     label.image = image_tk
     label.pack()
-    conn.close()
 
 
-def result(results):
-    """initialization function for Result
+def grab_image(card_id, runner: BackgroundRunner):
+    """
+    Grab the individual card image in the background and show it once loaded
+
+    Args:
+        card_id: int
+        runner: BackgroundRunner the download is run on
+    """
+    runner.status.set("Loading image...")
+    runner.submit(("image", card_id), partial(load_image, card_id), partial(show_image, runner))
 
-    Initialization function for the Result class. It will show the results
-    of the search provided before the function call
+
+class Result:
+    """
+    Window with the results of a search. Only the first page of cards is
+    shown to start with, the following pages are loaded in the background
+    as the list is scrolled towards its end.
 
     Args:
-        results: List[DbCard]
+        runner: BackgroundRunner the pages and card images are loaded on
+        kwargs: dict of the search, from search_kwargs
+        results: List[DbCard] - first page of the results
     """
-    window = Toplevel()
-    window.title("Results")
-
-    scrollbar = Scrollbar(window)
-    scrollbar.pack(side=RIGHT, fill=Y)
-    mylist = ttk.Treeview(window, yscrollcommand=scrollbar.set)
-    mylist["columns"] = ("ID", "Set", "Title")
-
-    mylist.heading("ID", text="ID")
-    mylist.heading("Set", text="Set")
-    mylist.heading("Title", text="Title", anchor="w")
-    mylist.column("#0", width=0, anchor="w")
-    mylist.column("ID", width=80, anchor="w")
-    mylist.column("Set", width=80, anchor="w")
-    mylist.column("Title", width=300, anchor="w")
-    for each in results:
-        mylist.insert(
-            "", "end", values=(f"{each.card_id}", f"{each.set}", f"{each.title}")
-        )
 
-    mylist.pack(side=LEFT, fill=BOTH)
+    def __init__(self, runner: BackgroundRunner, kwargs: dict, results: list):
+        """initialization function for Result
+
+        Initialization function for the Result class. It will show the results
+        of the search provided before the function call
+        """
+        self.runner = runner
+        self.kwargs = kwargs
+        self.last_id = None  # of the last card shown, None once all are
+        self.loading = False
+
+        window = Toplevel()
+        window.title("Results")
+
+        self.scrollbar = Scrollbar(window)
+        self.scrollbar.pack(side=RIGHT, fill=Y)
+        mylist = ttk.Treeview(window, yscrollcommand=self.on_scroll)
+        mylist["columns"] = ("ID", "Set", "Title")
+
+        mylist.heading("ID", text="ID")
+        mylist.heading("Set", text="Set")
+        mylist.heading("Title", text="Title", anchor="w")
+        mylist.column("#0", width=0, anchor="w")
+        mylist.column("ID", width=80, anchor="w")
+        mylist.column("Set", width=80, anchor="w")
+        mylist.column("Title", width=300, anchor="w")
+        mylist.pack(side=LEFT, fill=BOTH)
+        self.mylist = mylist
+        self.add_page(results)
+        IMAGES.prefetch(each.img_url for each in results[:PREFETCH_LIMIT])
+
+        button = Button(window, text="View", command=self.view)
+        button.pack(side=BOTTOM, anchor="s")
+
+        self.scrollbar.config(command=mylist.yview)
+        window.bind("<Return>", lambda event=None: button.invoke())
+
+    def add_page(self, cards: list):
+        """
+        Add a page of cards to the end of the list, on the main thread
+        """
+        self.loading = False
+        for each in cards:
+            self.mylist.insert(
+                "", "end", iid=str(each.card_id),
+                values=(f"{each.card_id}", f"{each.set}", f"{each.title}"),
+            )
+        self.last_id = cards[-1].card_id if len(cards) == PAGE_SIZE else None
+
+    def on_scroll(self, first, last):
+        """
+        Move the scrollbar with the list, and load the next page once the
+        end of what is loaded comes into view
+        """
+        self.scrollbar.set(first, last)
+        if float(last) >= LOAD_AT and self.last_id is not None and not self.loading:
+            self.loading = True
+            self.runner.submit(
+                ("page", str(self.mylist)),
+                partial(load_page, self.kwargs, self.last_id),
+                self.add_page,
+                on_error=self.page_failed,
+            )
 
-    button = Button(
-        window,
-        text="View",
-        command=lambda: grab_image(results[int(mylist.focus()[1:], 16) - 1].card_id),
-    )
-    button.pack(side=BOTTOM, anchor="s")
+    def page_failed(self, _error):
+        """
+        Let the next scroll try loading the page again after it failed
+        """
+        self.loading = False
 
-    scrollbar.config(command=mylist.yview)
-    window.bind("<Return>", lambda event=None: button.invoke())
+    def view(self):
+        """
+        Show the image of the selected card
+        """
+        selected = self.mylist.focus()
+        if selected:
+            grab_image(int(selected), self.runner)
 
 
 def main():
@@ -146,13 +499,15 @@ def main():
     """
     root = Tk()
     root.title("MTG Card Catalog")
-    root.geometry("250x250")  # width x height
+    root.geometry("250x270")  # width x height
+    runner = BackgroundRunner(root)
     my_label = Label(root, text="Welcome to the MTG Card Catalog!")
     my_label.grid(row=0, column=0, columnspan=3)
     tmp = Label(root, text="Title")
     tmp.grid(row=1, column=0)
     title_entry_box = Entry(root)
     title_entry_box.grid(row=1, column=1)
+    Autocomplete(title_entry_box, runner)
 
     tmp = Label(root, text="Type")
     tmp.grid(row=2, column=0)
@@ -204,12 +559,20 @@ def main():
                 active_var.get(),
                 active_var2.get(),
                 set_entry_box.get(),
-            )
+            ),
+            runner,
         ),
     )
     my_button.grid(row=7, column=1)
+    status_label = Label(root, textvariable=runner.status)
+    status_label.grid(row=8, column=0, columnspan=3)
     root.bind("<Return>", lambda event=None: my_button.invoke())
     root.mainloop()
+    runner.close()
+    IMAGES.close()
+    CONNECTIONS.close_all()
+    if CONNECTIONS.query_log is not None:
+        print(CONNECTIONS.query_log.format())
 
 
 if __name__ == "__main__":
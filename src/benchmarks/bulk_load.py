@@ -0,0 +1,93 @@
+"""
+bulk_load.py
+
+Last Updated: 18 Oct 2026
+
+Rows per second for loading a synthetic catalog one INSERT at a time
+(as insert_card does) against the BulkLoader.
+
+    python -m src.benchmarks.bulk_load --cards 100000
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from src.benchmarks.synthetic import synthetic_rows, synthetic_sets
+from src.update_db.lookup import INSERT_CARD, BulkLoader
+from src.update_db.schema import create_tables
+
+SET_SIZE = 300  # cards committed at a time by gather_cards
+
+
+def _fresh_db(path: str) -> sqlite3.Connection:
+    """
+    Empty database with the catalog tables
+    """
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    conn = sqlite3.connect(path)
+    create_tables(conn.cursor())
+    conn.executemany("INSERT INTO sets VALUES (?, ?, ?, ?)", synthetic_sets(100))
+    conn.commit()
+    return conn
+
+
+def load_row_by_row(path: str, rows: list) -> float:
+    """
+    Load one execute per card with a commit per set, returns seconds
+    """
+    conn = _fresh_db(path)
+    cursor = conn.cursor()
+    start = time.perf_counter()
+    for idx, row in enumerate(rows, 1):
+        cursor.execute(INSERT_CARD, row)
+        if idx % SET_SIZE == 0:
+            conn.commit()
+    conn.commit()
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed
+
+
+def load_bulk(path: str, rows: list) -> float:
+    """
+    Load through the BulkLoader with a commit per set, returns seconds
+    """
+    conn = _fresh_db(path)
+    start = time.perf_counter()
+    with BulkLoader(conn) as loader:
+        for idx, row in enumerate(rows, 1):
+            loader.add_row(row)
+            if idx % SET_SIZE == 0:
+                loader.commit()
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed
+
+
+def run(n_cards: int, directory: str = None) -> dict:
+    """
+    Time both loaders over n_cards synthetic cards
+
+    Returns:
+        dict of loader name to rows per second
+    """
+    rows = list(synthetic_rows(n_cards))
+    with tempfile.TemporaryDirectory(dir=directory) as folder:
+        path = os.path.join(folder, "bulk_load.db")
+        return {
+            "insert_card": n_cards / load_row_by_row(path, rows),
+            "BulkLoader": n_cards / load_bulk(path, rows),
+        }
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark loading the cards table")
+    arg_parser.add_argument("--cards", type=int, default=100000)
+    arg_parser.add_argument("--dir", help="folder for the scratch database")
+    args = arg_parser.parse_args()
+    for name, rate in run(args.cards, args.dir).items():
+        print(f"{name:<12} {rate:>10.0f} rows/s")
@@ -0,0 +1,85 @@
+"""
+db_card.py
+
+Last Updated: 18 Oct 2026
+
+Bytes per card and construction time of DbCard over a result set of
+synthetic rows, against the dict-backed version it replaced that copied
+every field and built the Rarity up front.
+
+    python -m src.benchmarks.db_card --cards 100000
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from src.benchmarks.synthetic import synthetic_rows
+from src.database_search import DbCard, DbOrder
+from src.update_db.enums import Rarity
+
+
+class DictCard:  # pylint: disable=too-few-public-methods
+    """
+    DbCard as it was before __slots__, for comparison
+    """
+
+    def __init__(self, fetch_results):
+        self.card_id = fetch_results[DbOrder.ID.value]
+        self.set = fetch_results[DbOrder.SET.value]
+        self.title = fetch_results[DbOrder.TITLE.value]
+        self.img_url = fetch_results[DbOrder.IMG_URL.value]
+        self.card_type = fetch_results[DbOrder.TYPE.value]
+        self.subtype = fetch_results[DbOrder.SUBTYPE.value]
+        quote = fetch_results[DbOrder.QUOTE.value]
+        rarity = Rarity(fetch_results[DbOrder.RARITY.value])
+        color = fetch_results[DbOrder.COLOR.value]
+        cost = fetch_results[DbOrder.COST.value]
+        abilities = fetch_results[DbOrder.ABILITIES.value]
+        self.details = (quote, rarity, color, cost, abilities)
+
+
+def measure(card_class, rows: list) -> tuple:
+    """
+    Build a card for every row
+
+    Returns:
+        (bytes per card, microseconds per card), the bytes being what the
+        cards add on top of the rows fetched
+    """
+    gc.collect()
+    start = time.perf_counter()
+    cards = [card_class(row) for row in rows]
+    elapsed = time.perf_counter() - start
+    del cards
+
+    # timed and traced apart, tracemalloc slows allocation down
+    gc.collect()
+    tracemalloc.start()
+    cards = [card_class(row) for row in rows]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del cards
+    return size / len(rows), elapsed * 1e6 / len(rows)
+
+
+def run(n_cards: int) -> dict:
+    """
+    Measure both card classes over n_cards rows shaped like cursor.fetchall()
+
+    Returns:
+        dict of class name to (bytes per card, microseconds per card)
+    """
+    rows = [(idx,) + row for idx, row in enumerate(synthetic_rows(n_cards), 1)]
+    return {
+        "dict DbCard": measure(DictCard, rows),
+        "__slots__ DbCard": measure(DbCard, rows),
+    }
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark building DbCard objects")
+    arg_parser.add_argument("--cards", type=int, default=100000)
+    args = arg_parser.parse_args()
+    for name, (per_card, micros) in run(args.cards).items():
+        print(f"{name:<18} {per_card:>7.0f} bytes/card {micros:>7.2f} us/card")
@@ -0,0 +1,102 @@
+"""
+filter_engine.py
+
+Last Updated: 18 Oct 2026
+
+Milliseconds per search for multi_command_building in SQLite against the
+NumPy FilterEngine over a synthetic catalog, checking both find the
+same cards.
+
+    python -m src.benchmarks.filter_engine --cards 300000
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from src.benchmarks.search import build_db
+from src.database_search import SearchResults
+from src.filter_engine import FilterEngine
+from src.update_db.enums import Rarity
+
+# name: kwargs of multi_command_building
+SEARCHES = {
+    "color": {"color": "RED"},
+    "color+rarity": {"color": "BLUE", "rarity": Rarity.MYTHIC_RARE},
+    "colorless": {"color": "COLORLESS"},
+    "type+subtype": {"card_type": "Creature", "subtype": "Elf"},
+    "set": {"set_shortened": "S04"},
+    "set+type+rarity": {"set_shortened": "Set 1", "card_type": "Art", "rarity": Rarity.RARE},
+    "title+color": {"title": "Dragon", "color": "GREEN"},
+}
+
+
+def time_search(search, kwargs: dict, repeat: int) -> tuple:
+    """
+    Average milliseconds of a search, and of counting its results which
+    leaves out reading the rows
+
+    Returns:
+        (milliseconds, count milliseconds, ids found)
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        cards = search.multi_command_building(**kwargs)
+    elapsed = (time.perf_counter() - start) * 1000 / repeat
+    start = time.perf_counter()
+    for _ in range(repeat):
+        search.count_cards(**kwargs)
+    counting = (time.perf_counter() - start) * 1000 / repeat
+    return elapsed, counting, sorted(card.card_id for card in cards)
+
+
+def run(n_cards: int, repeat: int = 3, directory: str = None) -> dict:
+    """
+    Time the SEARCHES through SQLite and the FilterEngine
+
+    Returns:
+        dict of name to (sql ms, engine ms, sql count ms, engine count ms,
+        cards found, same cards), with "load" the seconds taken to build
+        the engine
+    """
+    results = {}
+    with tempfile.TemporaryDirectory(dir=directory) as folder:
+        path = os.path.join(folder, "filter_engine.db")
+        build_db(path, n_cards)
+        conn = sqlite3.connect(path)
+        search = SearchResults(conn.cursor())
+        start = time.perf_counter()
+        engine = FilterEngine(search)
+        results["load"] = time.perf_counter() - start
+        for name, kwargs in SEARCHES.items():
+            results[name] = compare(search, engine, kwargs, repeat)
+        conn.close()
+    return results
+
+
+def compare(search: SearchResults, engine: FilterEngine, kwargs: dict, repeat: int) -> tuple:
+    """
+    Time one search both ways
+
+    Returns:
+        (sql ms, engine ms, sql count ms, engine count ms, cards found, same cards)
+    """
+    sql_ms, sql_count, sql_ids = time_search(search, kwargs, repeat)
+    engine_ms, engine_count, engine_ids = time_search(engine, kwargs, repeat)
+    return sql_ms, engine_ms, sql_count, engine_count, len(sql_ids), sql_ids == engine_ids
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark the NumPy filter engine")
+    arg_parser.add_argument("--cards", type=int, default=300000)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--dir", help="folder for the scratch database")
+    args = arg_parser.parse_args()
+    timings = run(args.cards, args.repeat, args.dir)
+    print(f"engine loaded in {timings.pop('load'):.2f} s")
+    print(f"{'search':<18}{'sql ms':>9}{'engine ms':>11}{'sql count':>11}"
+          f"{'engine count':>14}{'cards':>8}  same")
+    for search_name, (sql, numpy_ms, sql_n, numpy_n, found, same) in timings.items():
+        print(f"{search_name:<18}{sql:>9.1f}{numpy_ms:>11.1f}{sql_n:>11.1f}"
+              f"{numpy_n:>14.1f}{found:>8}  {same}")
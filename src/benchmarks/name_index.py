@@ -0,0 +1,90 @@
+"""
+name_index.py
+
+Last Updated: 18 Oct 2026
+
+Build time of the NameIndex over synthetic titles and the milliseconds
+per suggestion for titles typed with a typo, against the LIKE '%x%'
+search_cards_by_title does without the full text index.
+
+    python -m src.benchmarks.name_index --titles 30000
+"""
+import argparse
+import random
+import sqlite3
+import time
+
+from src.benchmarks.synthetic import synthetic_rows
+from src.name_index import NameIndex
+
+
+def typo(title: str, rng: random.Random) -> str:
+    """
+    The title with one letter replaced, dropped or doubled
+    """
+    idx = rng.randrange(len(title))
+    kind = rng.randrange(3)
+    if kind == 0:
+        return title[:idx] + rng.choice("aeiourstln") + title[idx + 1:]
+    if kind == 1:
+        return title[:idx] + title[idx + 1:]
+    return title[:idx] + title[idx] + title[idx:]
+
+
+def percentile(values: list, fraction: float) -> float:
+    """
+    Value below which the fraction of the sorted values fall
+    """
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run(n_titles: int, n_queries: int = 500, seed: int = 0) -> dict:
+    """
+    Time building the index and suggesting for misspelled titles
+
+    Returns:
+        dict with the build seconds, suggestion p50/p99 milliseconds, the
+        fraction of misspelled titles whose title was suggested and the
+        milliseconds of one LIKE scan
+    """
+    titles = [row[1] for row in synthetic_rows(n_titles, seed=seed)]
+    start = time.perf_counter()
+    index = NameIndex(titles)
+    built = time.perf_counter() - start
+
+    rng = random.Random(seed)
+    timings = []
+    found = 0
+    for title in rng.sample(titles, min(n_queries, len(titles))):
+        start = time.perf_counter()
+        suggested = index.suggest(typo(title, rng))
+        timings.append((time.perf_counter() - start) * 1000)
+        found += title in suggested
+    timings.sort()
+
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE cards (title TEXT)")
+    conn.executemany("INSERT INTO cards VALUES (?)", ((title,) for title in titles))
+    start = time.perf_counter()
+    conn.execute("SELECT * FROM cards WHERE title LIKE ?", ("%lightening%",)).fetchall()
+    like_ms = (time.perf_counter() - start) * 1000
+    conn.close()
+    return {
+        "build_s": built,
+        "p50_ms": percentile(timings, 0.5),
+        "p99_ms": percentile(timings, 0.99),
+        "recall": found / len(timings),
+        "like_ms": like_ms,
+    }
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark the title NameIndex")
+    arg_parser.add_argument("--titles", type=int, default=30000)
+    arg_parser.add_argument("--queries", type=int, default=500)
+    args = arg_parser.parse_args()
+    result = run(args.titles, args.queries)
+    print(f"index built in {result['build_s']:.2f} s")
+    print(f"suggest with a typo  p50 {result['p50_ms']:.2f} ms  p99 {result['p99_ms']:.2f} ms")
+    print(f"misspelled title suggested {result['recall']:.0%} of the time")
+    print(f"one LIKE '%x%' scan        {result['like_ms']:.2f} ms")
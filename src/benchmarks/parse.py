@@ -0,0 +1,117 @@
+"""
+parse.py
+
+Last Updated: 18 Oct 2026
+
+Benchmark of the html parser backends over a corpus of saved card pages.
+The corpus is either the page cache filled by the lookup or a folder of
+saved .html files. Every backend is checked against html.parser so a
+faster backend is only worth switching to if it reports no mismatches.
+
+    python -m src.benchmarks.parse --cache-dir src/update_db/page_cache
+    python -m src.benchmarks.parse --pages saved_pages/
+"""
+import argparse
+import os
+import time
+
+from src.update_db.cache import PageCache, CACHE_DIR
+from src.update_db.card import Card
+from src.update_db.fetch import Page
+from src.update_db.parsing import available_backends
+
+REFERENCE = "html.parser"
+
+
+def load_corpus(cache_dir: str = CACHE_DIR, pages_dir: str = None) -> list:
+    """
+    Load the saved card pages
+
+    Args:
+        cache_dir (str): PageCache folder to read the pages from
+        pages_dir (str): Folder of saved .html files, used instead of
+            the cache when given
+
+    Returns:
+        list[Page]
+    """
+    corpus = []
+    if pages_dir:
+        for name in sorted(os.listdir(pages_dir)):
+            if not name.endswith(".html"):
+                continue
+            with open(os.path.join(pages_dir, name), "rb") as page_file:
+                corpus.append(Page(name, page_file.read()))
+    else:
+        cache = PageCache(cache_dir)
+        for url in cache.urls():
+            cached = cache.load(url)
+            if cached:
+                corpus.append(Page(url, cached[0]))
+    return [page for page in corpus if b'id="cardInfo"' in page.content]
+
+
+def card_fields(page: Page, parser: str):
+    """
+    Parse a page into the fields stored for a card
+
+    Args:
+        page (Page): saved card page
+        parser (str): name of the parser backend
+
+    Returns:
+        tuple or None if the page could not be parsed
+    """
+    try:
+        card = Card(page.url, None, page, parser)
+    except (Warning, AttributeError, IndexError, TypeError):
+        return None
+    return (card.img_url, card.type, card.subtype, card.details)
+
+
+def run(corpus: list, backends: list = None, repeat: int = 3) -> dict:
+    """
+    Time every backend over the corpus
+
+    Args:
+        corpus (list[Page]): saved card pages
+        backends (list[str]): backends to time, all available if None
+        repeat (int): passes over the corpus, the best one is kept
+
+    Returns:
+        dict of backend name to {"pages_per_sec", "seconds", "mismatches"}
+    """
+    backends = backends or available_backends()
+    expected = [card_fields(page, REFERENCE) for page in corpus]
+    results = {}
+    for backend in backends:
+        best = None
+        for _ in range(max(1, repeat)):
+            start = time.perf_counter()
+            fields = [card_fields(page, backend) for page in corpus]
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        mismatches = sum(1 for got, want in zip(fields, expected) if got != want)
+        results[backend] = {
+            "pages_per_sec": len(corpus) / best if best else 0.0,
+            "seconds": best,
+            "mismatches": mismatches,
+        }
+    return results
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark the card page parsers")
+    arg_parser.add_argument("--cache-dir", default=CACHE_DIR)
+    arg_parser.add_argument("--pages", help="folder of saved .html card pages")
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--backend", action="append", choices=available_backends())
+    args = arg_parser.parse_args()
+
+    pages = load_corpus(args.cache_dir, args.pages)
+    print(f"{len(pages)} card pages")
+    for backend_name, result in run(pages, args.backend, args.repeat).items():
+        print(
+            f"{backend_name:<15} {result['pages_per_sec']:>9.1f} pages/s"
+            f"  mismatches: {result['mismatches']}"
+        )
@@ -0,0 +1,79 @@
+"""
+query_plans.py
+
+Last Updated: 18 Oct 2026
+
+Checks that every search of SearchResults runs as a parameterized
+statement using the index meant for it, from EXPLAIN QUERY PLAN over a
+small synthetic catalog. Exits non-zero when a plan falls back to a
+scan it should not. The same checks run as tests/test_query_plans.py.
+
+    python -m src.benchmarks.query_plans
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+
+from src.benchmarks.search import build_db
+from src.database_search import SearchResults
+from src.update_db.enums import Rarity
+
+# name: search to run
+SEARCHES = {
+    "by id": lambda sr: sr.get_card_by_id(1),
+    "by set": lambda sr: sr.search_cards_by_set("S01"),
+    "colorless": lambda sr: sr.search_results_by_color("COLORLESS"),
+    "title": lambda sr: sr.search_cards_by_title("Angel"),
+    "rules text": lambda sr: sr.search_text("draw 1"),
+    "rarity": lambda sr: sr.multi_command_building(rarity=Rarity.MYTHIC_RARE),
+    "set and rarity": lambda sr: sr.multi_command_building(
+        set_shortened="S01", rarity=Rarity.RARE
+    ),
+    "apostrophe": lambda sr: sr.search_cards_by_title("Urza's"),
+    "mana value": lambda sr: sr.multi_command_building(min_cmc=5, max_cmc=6),
+    "blue pips": lambda sr: sr.multi_command_building(pips={"BLUE": 2}),
+    "keywords": lambda sr: sr.multi_command_building(keywords="Flying AND NOT Defender"),
+}
+# name: text expected in the plan of the search
+EXPECTED = {
+    "by id": "USING INTEGER PRIMARY KEY",
+    "by set": "USING INDEX idx_cards_set",
+    "colorless": "USING INDEX idx_cards_color",
+    "title": "cards_fts VIRTUAL TABLE",
+    "rules text": "cards_fts VIRTUAL TABLE",
+    "rarity": "USING INDEX idx_cards_rarity",
+    "set and rarity": "USING INDEX idx_cards_rarity (rarity=?)",
+    "apostrophe": "cards_fts VIRTUAL TABLE",
+    "mana value": "USING INDEX idx_cards_mana_value (mana_value>? AND mana_value<?)",
+    "blue pips": "USING INDEX idx_cards_pips_blue (pips_blue>?)",
+    "keywords": "SEARCH card_keywords USING PRIMARY KEY (keyword=?)",
+}
+
+
+def check(search: SearchResults) -> list:
+    """
+    Run the EXPECTED searches and compare their plans
+
+    Returns:
+        list of (name, ok, plan)
+    """
+    results = []
+    for name, run_search in SEARCHES.items():
+        run_search(search)
+        expected = EXPECTED[name]
+        plan = search.explain()
+        results.append((name, any(expected in step for step in plan), plan))
+    return results
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "plans.db")
+        build_db(path, 20000)
+        connection = sqlite3.connect(path)
+        outcome = check(SearchResults(connection.cursor()))
+        connection.close()
+    for check_name, ok, steps in outcome:
+        print(f"{'ok' if ok else 'FAIL':<5}{check_name:<16}{' | '.join(steps)}")
+    sys.exit(0 if all(ok for _, ok, _ in outcome) else 1)
@@ -0,0 +1,79 @@
+"""
+search.py
+
+Last Updated: 18 Oct 2026
+
+Milliseconds per query for the text searches of SearchResults over a
+synthetic catalog, through the cards_fts index and with plain LIKE.
+
+    python -m src.benchmarks.search --cards 300000
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from src.benchmarks.synthetic import write_catalog
+from src.database_search import SearchResults
+
+# name: (SearchResults method, term), a few hundred matches at most
+QUERIES = {
+    "title": ("search_cards_by_title", "Lightning Bolt"),
+    "any text": ("search_text", "number 4242"),
+    "type+title": ("multi_command_building", None),
+}
+
+
+def build_db(path: str, n_cards: int):
+    """
+    Write a synthetic catalog with the full text index
+    """
+    write_catalog(path, n_cards, 100)
+
+
+def time_query(search: SearchResults, name: str, repeat: int) -> float:
+    """
+    Average milliseconds of one of the QUERIES, answered from the
+    database each time rather than the query cache
+    """
+    method, term = QUERIES[name]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        search.cache.clear()
+        if term is None:
+            getattr(search, method)(card_type="Planeswalker", title="Serra Angel")
+        else:
+            getattr(search, method)(term)
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def run(n_cards: int, repeat: int = 5, directory: str = None) -> dict:
+    """
+    Time the QUERIES with and without the full text index
+
+    Returns:
+        dict of (query, "fts" or "like") to milliseconds per query
+    """
+    timings = {}
+    with tempfile.TemporaryDirectory(dir=directory) as folder:
+        path = os.path.join(folder, "search.db")
+        build_db(path, n_cards)
+        conn = sqlite3.connect(path)
+        search = SearchResults(conn.cursor())
+        for mode in ("fts", "like"):
+            search.has_fts = mode == "fts"
+            for name in QUERIES:
+                timings[name, mode] = time_query(search, name, repeat)
+        conn.close()
+    return timings
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark the text searches")
+    arg_parser.add_argument("--cards", type=int, default=300000)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--dir", help="folder for the scratch database")
+    args = arg_parser.parse_args()
+    for (query, index), ms in run(args.cards, args.repeat, args.dir).items():
+        print(f"{query:<14} {index:<5} {ms:>9.2f} ms")
@@ -0,0 +1,94 @@
+"""
+snapshot.py
+
+Last Updated: 18 Oct 2026
+
+Time to export a synthetic catalog to a snapshot, open it and read every
+card, against connecting to the database and building a DbCard from
+every row, with the mana_cost/abilities decoded in both.
+
+    python -m src.benchmarks.snapshot --cards 100000
+"""
+import argparse
+import os
+import pathlib
+import sqlite3
+import tempfile
+import time
+
+from src.benchmarks.synthetic import write_catalog
+from src.database_search import DbCard
+from src.snapshot import Snapshot, export_snapshot
+
+
+def read(cards) -> int:
+    """
+    Read the fields the application shows of every card
+
+    Returns:
+        the number of cards read
+    """
+    count = 0
+    for card in cards:
+        _ = (card.title, card.set, card.card_type, card.details, card.mana_cost, card.abilities)
+        count += 1
+    return count
+
+
+def measure(path: str, snapshot_path: str) -> dict:
+    """
+    Time both ways of opening and reading the catalog
+
+    Returns:
+        dict with the milliseconds to open and read from each, and the
+        bytes of each file
+    """
+    start = time.perf_counter()
+    conn = sqlite3.connect(pathlib.Path(path).resolve().as_uri() + "?mode=ro", uri=True)
+    cards = [DbCard(row) for row in conn.execute("SELECT * FROM cards")]
+    sqlite_open = time.perf_counter() - start
+    read(cards)
+    sqlite_read = time.perf_counter() - start
+    conn.close()
+
+    start = time.perf_counter()
+    snapshot = Snapshot.open(snapshot_path)
+    snapshot_open = time.perf_counter() - start
+    read(snapshot.iter_cards())
+    snapshot_read = time.perf_counter() - start
+    snapshot.close()
+    return {
+        "sqlite_open_ms": sqlite_open * 1000,
+        "sqlite_read_ms": sqlite_read * 1000,
+        "snapshot_open_ms": snapshot_open * 1000,
+        "snapshot_read_ms": snapshot_read * 1000,
+        "db_bytes": os.path.getsize(path),
+        "snapshot_bytes": os.path.getsize(snapshot_path),
+    }
+
+
+def run(n_cards: int, seed: int = 0) -> dict:
+    """
+    Export a synthetic catalog of n_cards and measure reading it back
+
+    Returns:
+        the measurements of measure, with the export milliseconds
+    """
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "catalog.db")
+        snapshot_path = os.path.join(folder, "catalog.snapshot")
+        write_catalog(path, n_cards, seed=seed)
+        conn = sqlite3.connect(path)
+        start = time.perf_counter()
+        export_snapshot(conn.cursor(), snapshot_path)
+        exported = time.perf_counter() - start
+        conn.close()
+        return {"export_ms": exported * 1000, **measure(path, snapshot_path)}
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Benchmark the catalog snapshot")
+    arg_parser.add_argument("--cards", type=int, default=100000)
+    args = arg_parser.parse_args()
+    for name, value in run(args.cards).items():
+        print(f"{name:<18} {value:>14.2f}")
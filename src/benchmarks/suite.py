@@ -0,0 +1,320 @@
+"""
+suite.py
+
+Last Updated: 18 Oct 2026
+
+Every benchmark of the catalog over one synthetic catalog of a chosen
+scale, written to a JSON file so runs can be compared over time:
+
+- generating the rows and loading them through the BulkLoader
+- parsing card pages into Cards (synthetic pages rendered from the rows,
+  checked against them, and the saved pages when there are some)
+- loading the parsed Cards one at a time with insert_card
+- each search method of SearchResults, with the query cache cleared
+  before every call
+- building DbCards from fetched rows and reading their fields
+- exporting the catalog to a snapshot and reading every card from it
+
+    python -m src.benchmarks.suite --cards 100k --out benchmark_results/100k.json
+    python -m src.benchmarks.suite --cards 100k --compare benchmark_results/100k.json
+"""
+import argparse
+import inspect
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from src.benchmarks.parse import load_corpus
+from src.benchmarks.snapshot import measure as measure_snapshot
+from src.benchmarks.synthetic import (
+    SCALES, parse_scale, synthetic_page, synthetic_rows, write_catalog,
+)
+from src.database_search import DbCard, SearchResults
+from src.decklist import resolve_decklist
+from src.snapshot import export_snapshot
+from src.update_db.card import Card
+from src.update_db.enums import Rarity
+from src.update_db.lookup import card_row, insert_card
+from src.update_db.schema import create_tables
+
+PAGES = 2000  # synthetic pages parsed and loaded with insert_card
+DECKLIST = [
+    "4 Lightning Bolt", "4x Serra Angel (S001)", "2 Shivan Dragon [S002] 17",
+    "1 Lightening Bolt", "Sideboard", "3 Llanowar Elves",
+]
+# name: (SearchResults method, or resolve_decklist, args, kwargs), one entry
+# per search method
+SEARCHES = {
+    "set by title": ("get_set_by_title", ("Synthetic Set 1",), {}),
+    "card by id": ("get_card_by_id", (1,), {}),
+    "title": ("search_cards_by_title", ("Lightning Bolt",), {}),
+    "title short": ("search_cards_by_title", ("Bo",), {}),
+    "any text": ("search_text", ("draw 2 cards",), {}),
+    "set": ("search_cards_by_set", ("S001",), {}),
+    "all cards": ("get_all_cards", (), {}),
+    "color": ("search_results_by_color", ("BLUE",), {}),
+    "colorless": ("search_results_by_color", ("COLORLESS",), {}),
+    "type+title": ("multi_command_building", (), {"card_type": "Creature", "title": "Serra"}),
+    "rarity+color": ("multi_command_building", (), {"rarity": Rarity.MYTHIC_RARE, "color": "RED"}),
+    "mana value+pips": ("multi_command_building", (), {"max_cmc": 2, "pips": {"GREEN": 1}}),
+    "keywords": ("multi_command_building", (), {"keywords": "Flying AND NOT Defender"}),
+    "page": ("page_after", (None,), {"card_type": "Instant"}),
+    "pages": ("search_pages", (), {"rarity": Rarity.MYTHIC_RARE}),
+    "iter": ("iter_cards", (), {"keywords": "Trample OR Haste"}),
+    "count": ("count_cards", (), {"color": "BLACK", "min_cmc": 3}),
+    "decklist": (resolve_decklist, (DECKLIST,), {}),
+}
+NOT_SEARCHES = ("explain",)  # public methods of SearchResults that are not timed
+
+
+def search_methods() -> set:
+    """
+    Public methods of SearchResults that are expected in SEARCHES
+    """
+    return {
+        name for name, _ in inspect.getmembers(SearchResults, inspect.isfunction)
+        if not name.startswith("_") and name not in NOT_SEARCHES
+    }
+
+
+def timed(func, repeat: int = 1) -> tuple:
+    """
+    Call func repeat times
+
+    Returns:
+        (median milliseconds, result of the last call)
+    """
+    timings = []
+    result = None
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), result
+
+
+def parse_rows(rows: list) -> dict:
+    """
+    Time parsing the synthetic pages of the rows into Cards and check
+    every field against its row
+
+    Returns:
+        dict with the pages per second, the mismatches and the Cards
+    """
+    pages = [synthetic_page(row) for row in rows]
+    start = time.perf_counter()
+    cards = [Card(row[1], None, page) for row, page in zip(rows, pages)]
+    seconds = time.perf_counter() - start
+    mismatches = 0
+    for row, card in zip(rows, cards):
+        parsed = list(card_row(card, row[0]))
+        # an empty paragraph of abilities parses as one empty line
+        parsed[9] = json.dumps([line for line in json.loads(parsed[9]) if line])
+        mismatches += tuple(parsed) != row
+    return {"pages_per_sec": len(pages) / seconds, "mismatches": mismatches, "cards": cards}
+
+
+def parse_saved(cache_dir: str = None, pages_dir: str = None) -> dict:
+    """
+    Time parsing the saved card pages, empty when there are none
+    """
+    corpus = load_corpus(cache_dir, pages_dir) if cache_dir or pages_dir else []
+    if not corpus:
+        return {}
+    failed = 0
+    start = time.perf_counter()
+    for page in corpus:
+        try:
+            Card(page.url, None, page)
+        except (Warning, AttributeError, IndexError, TypeError):
+            failed += 1
+    return {
+        "pages": len(corpus),
+        "pages_per_sec": len(corpus) / (time.perf_counter() - start),
+        "failed": failed,
+    }
+
+
+def insert_cards(cards: list, codes: list, directory: str) -> dict:
+    """
+    Time insert_card for each Card into an empty catalog, committed once
+    """
+    path = os.path.join(directory, "insert.db")
+    conn = sqlite3.connect(path)
+    cursor = conn.cursor()
+    create_tables(cursor)
+    start = time.perf_counter()
+    for card, code in zip(cards, codes):
+        insert_card(cursor, card, code)
+    conn.commit()
+    seconds = time.perf_counter() - start
+    conn.close()
+    return {"cards_per_sec": len(cards) / seconds}
+
+
+def time_searches(search: SearchResults, repeat: int) -> dict:
+    """
+    Median milliseconds and cards returned of each of SEARCHES, with the
+    query cache cleared before each call
+    """
+    results = {}
+    for name, (method, method_args, kwargs) in SEARCHES.items():
+        def call(method=method, method_args=method_args, kwargs=kwargs):
+            search.cache.clear()
+            if method is resolve_decklist:
+                return resolve_decklist(search, *method_args, **kwargs)[0]
+            result = getattr(search, method)(*method_args, **kwargs)
+            if method == "search_pages":
+                return [card for page in result for card in page]
+            return list(result) if inspect.isgenerator(result) else result
+
+        milliseconds, result = timed(call, repeat)
+        results[name] = {
+            "ms": milliseconds,
+            "rows": len(result) if isinstance(result, list) else int(result is not None),
+        }
+    return results
+
+
+def time_db_cards(cursor: sqlite3.Cursor) -> dict:
+    """
+    Microseconds per card building DbCards from every row and reading
+    the fields the application shows
+    """
+    rows = cursor.execute("SELECT * FROM cards").fetchall()
+    milliseconds, cards = timed(lambda: [DbCard(row) for row in rows])
+
+    def read():
+        for card in cards:
+            _ = (card.title, card.set, card.card_type, card.details, card.mana_value)
+
+    read_ms, _ = timed(read)
+    return {
+        "build_us": milliseconds * 1000 / len(rows),
+        "read_us": read_ms * 1000 / len(rows),
+    }
+
+
+def time_snapshot(conn: sqlite3.Connection, path: str, folder: str) -> dict:
+    """
+    Milliseconds to export the catalog at path to a snapshot in the
+    folder, with the measurements of reading it back, see
+    benchmarks.snapshot.measure
+    """
+    snapshot_path = os.path.join(folder, "catalog.snapshot")
+    milliseconds, _ = timed(lambda: export_snapshot(conn.cursor(), snapshot_path))
+    return {"export_ms": milliseconds, **measure_snapshot(path, snapshot_path)}
+
+
+def run(n_cards: int, seed: int = 0, repeat: int = 3, saved: dict = None) -> dict:
+    """
+    Run every benchmark over a synthetic catalog of n_cards
+
+    Args:
+        n_cards (int): cards in the catalog
+        seed (int): seed of the generator
+        repeat (int): calls of each search, the median is kept
+        saved (dict): cache_dir and/or pages_dir of saved pages to parse
+
+    Returns:
+        dict with "meta", describing the run, and "results", benchmark
+        name to its measurements
+    """
+    missing = search_methods() - {method for method, _, _ in SEARCHES.values()}
+    if missing:
+        raise ValueError(f"SearchResults methods without a benchmark: {sorted(missing)}")
+    results = {}
+    start = time.perf_counter()
+    rows = list(synthetic_rows(min(n_cards, PAGES), seed=seed))
+    results["generate"] = {"rows_per_sec": len(rows) / (time.perf_counter() - start)}
+    parsed = parse_rows(rows)
+    cards = parsed.pop("cards")
+    results["parse synthetic"] = parsed
+    saved_pages = parse_saved(**(saved or {}))
+    if saved_pages:
+        results["parse saved"] = saved_pages
+
+    with tempfile.TemporaryDirectory() as folder:
+        results["insert_card"] = insert_cards(cards, [row[0] for row in rows], folder)
+        path = os.path.join(folder, "catalog.db")
+        start = time.perf_counter()
+        write_catalog(path, n_cards, seed=seed)
+        results["bulk load"] = {"cards_per_sec": n_cards / (time.perf_counter() - start)}
+
+        conn = sqlite3.connect(path)
+        search = SearchResults(conn.cursor())
+        results["search"] = time_searches(search, repeat)
+        results["DbCard"] = time_db_cards(conn.cursor())
+        results["snapshot"] = time_snapshot(conn, path, folder)
+        conn.close()
+    return {
+        "meta": {
+            "cards": n_cards,
+            "seed": seed,
+            "repeat": repeat,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "machine": platform.machine(),
+            "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+def measurements(results: dict) -> dict:
+    """
+    Flat "benchmark / measurement" to value of the results of a run,
+    rows excluded
+    """
+    flat = {}
+    for bench, values in results["results"].items():
+        if bench == "search":
+            for name, search in values.items():
+                flat[f"search {name} / ms"] = search["ms"]
+        else:
+            for name, value in values.items():
+                flat[f"{bench} / {name}"] = value
+    return flat
+
+
+def compare(old: dict, new: dict) -> str:
+    """
+    Table of the measurements of two reports and the new over the old
+    """
+    before, after = measurements(old), measurements(new)
+    lines = [f"{'before':>12}{'after':>12}{'ratio':>8}  measurement"]
+    for name, value in after.items():
+        if name not in before:
+            continue
+        ratio = value / before[name] if before[name] else float("nan")
+        lines.append(f"{before[name]:>12.2f}{value:>12.2f}{ratio:>8.2f}  {name}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Run every catalog benchmark")
+    arg_parser.add_argument("--cards", type=parse_scale, default="100k",
+                            help="number of cards, or one of " + ", ".join(SCALES))
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument("--cache-dir", help="PageCache folder of saved pages to parse")
+    arg_parser.add_argument("--pages", help="folder of saved .html card pages to parse")
+    arg_parser.add_argument("--out", help="JSON file to write the results to")
+    arg_parser.add_argument("--compare", help="JSON file of an earlier run to compare with")
+    args = arg_parser.parse_args()
+
+    report = run(args.cards, args.seed, args.repeat,
+                 {"cache_dir": args.cache_dir, "pages_dir": args.pages})
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as out_file:
+            json.dump(report, out_file, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as old_file:
+            print(compare(json.load(old_file), report))
+    else:
+        print(json.dumps(report, indent=2))
@@ -0,0 +1,247 @@
+"""
+synthetic.py
+
+Last Updated: 18 Oct 2026
+
+Synthetic sets and cards shaped like the rows the lookup writes, for
+measuring the database side without scraping the site. The choices are
+seeded so a catalog can be generated again card for card, and follow
+the rough shape of the real one: mostly creatures, commons outnumbering
+mythics, mono colored spells peaking at mana value 2-3, colorless lands
+and artifacts, and card names reprinted across sets.
+
+Cards can also be rendered as card pages in the layout Card parses, for
+timing the parser without saved pages. Write a catalog with:
+
+    python -m src.benchmarks.synthetic --cards 100k --out synthetic.db
+"""
+import argparse
+import html
+import json
+import random
+import sqlite3
+
+from src.update_db.card import cost_values
+from src.update_db.enums import Color, Rarity
+from src.update_db.fetch import Page
+from src.update_db.keywords import keyword_abilities
+from src.update_db.lookup import BulkLoader
+from src.update_db.schema import create_tables
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+CARDS_PER_SET = 250
+
+# type: (weight, subtypes)
+TYPES = {
+    "Creature": (44, ["Goblin", "Elf Druid", "Human Wizard", "Dragon", "Zombie", "Angel",
+                      "Merfolk", "Human Soldier", "Beast", "Spirit", "Vampire", "Elemental"]),
+    "Instant": (12, [""]),
+    "Sorcery": (11, [""]),
+    "Enchantment": (10, ["", "", "Aura"]),
+    "Artifact": (10, ["", "Equipment", "Vehicle"]),
+    "Land": (9, ["", "", "Forest", "Island", "Swamp", "Mountain", "Plains"]),
+    "Planeswalker": (2, ["Jace", "Chandra", "Liliana", "Garruk", "Ajani"]),
+}
+COLORLESS_TYPES = ("Artifact", "Land")
+LEGENDARY = 0.08
+# Rarity: weight
+RARITY_WEIGHTS = {Rarity.COMMON: 42, Rarity.UNCOMMON: 30, Rarity.RARE: 22, Rarity.MYTHIC_RARE: 6}
+# weight of each mana value from 0, for spells
+MANA_VALUE_WEIGHTS = [1, 12, 22, 22, 17, 12, 7, 4, 3]
+# weight of spells with 1, 2 and 3 colors
+COLOR_COUNT_WEIGHTS = [82, 15, 3]
+COLORS = ["RED", "BLUE", "WHITE", "BLACK", "GREEN"]
+COLOR_SYMBOLS = {"RED": "r", "BLUE": "u", "WHITE": "w", "BLACK": "b", "GREEN": "g"}
+FIRST_WORDS = ["Shivan", "Serra", "Llanowar", "Urza's", "Dark", "Lightning", "Giant",
+               "Ancient", "Grim", "Storm", "Elvish", "Goblin", "Sun", "Blood", "Mind",
+               "Iron", "Ghostly", "Savage", "Frost", "Arcane", "Thorn", "Ember",
+               "Howling", "Tidal", "Wild", "Vengeful", "Silent", "Shadow", "Crimson",
+               "Verdant", "Gilded", "Hollow", "Radiant", "Bone", "Sky", "Stone",
+               "Feral", "Mystic", "Dread", "Nimble"]
+SECOND_WORDS = ["Dragon", "Angel", "Elves", "Saga", "Ritual", "Bolt", "Growth", "Wrath",
+                "Counterspell", "Titan", "Sentinel", "Hydra", "Familiar", "Oracle",
+                "Channeler", "Reckoner", "Charm", "Command", "Visions", "Behemoth",
+                "Sphinx", "Wurm", "Knight", "Adept", "Rogue", "Colossus", "Golem",
+                "Spirit", "Drake", "Phoenix", "Vanguard", "Tutor", "Recall", "Blast",
+                "Rebuke", "Harvest", "Tyrant", "Seer", "Warden", "Outcast"]
+NAME_ENDINGS = ["", "", "", "", "", "", " of the Ages", " of Ruin", " of Embers",
+                " of the Wilds", " of Tides", " of the Forge", " of Dusk", " of Dawn",
+                " of the Mists", " of Ash"]
+KEYWORD_LINES = ["Flying", "Trample", "Deathtouch", "Lifelink", "Vigilance", "Haste",
+                 "Reach", "First strike", "Menace", "Defender", "Ward 2", "Flash"]
+RULES_TEXT = [
+    "When this enters, draw {n} cards.",
+    "Deal {n} damage to any target.",
+    "Target creature gets +{n}/+{n} until end of turn.",
+    "Counter target spell unless its controller pays {n}.",
+    "Destroy target artifact or enchantment.",
+    "Search your library for a basic land card and put it into your hand.",
+    "Each opponent loses {n} life and you gain {n} life.",
+    "Return target creature card from your graveyard to your hand.",
+    "Create {n} 1/1 white Soldier creature tokens.",
+    "Tap target creature. It doesn't untap during its controller's next untap step.",
+]
+
+
+def parse_scale(text: str) -> int:
+    """
+    Number of cards from a count or one of SCALES ("10k", "100k", "1m")
+    """
+    return SCALES.get(text.lower()) or int(text)
+
+
+def card_names(seed: int = 0) -> list:
+    """
+    Every card name the generator uses, in a seeded order
+    """
+    names = [
+        first + " " + second + ending
+        for first in FIRST_WORDS
+        for second in SECOND_WORDS
+        for ending in dict.fromkeys(NAME_ENDINGS)
+    ]
+    random.Random(seed).shuffle(names)
+    return names
+
+
+def synthetic_sets(n_sets: int) -> list:
+    """
+    Rows for the sets table
+
+    Args:
+        n_sets (int): number of sets
+
+    Returns:
+        list of (shortened, title, release_date, url)
+    """
+    return [
+        (f"S{idx:03d}", f"Synthetic Set {idx}", f"20{idx % 25:02d}-01-01",
+         f"https://aetherhub.com/Card/Set/S{idx:03d}")
+        for idx in range(n_sets)
+    ]
+
+
+def synthetic_cost(rng: random.Random, card_type: str) -> dict:
+    """
+    Mana cost of a card in the form Card.get_mana_cost stores it
+    """
+    if card_type == "Land":
+        return {}
+    value = rng.choices(range(len(MANA_VALUE_WEIGHTS)), MANA_VALUE_WEIGHTS)[0]
+    mana_cost = {}
+    if card_type not in COLORLESS_TYPES and value > 0:
+        n_colors = rng.choices((1, 2, 3), COLOR_COUNT_WEIGHTS)[0]
+        colors = rng.sample(COLORS, n_colors)
+        for pip in range(min(value, rng.randint(1, 3) + n_colors - 1)):
+            color = colors[pip % n_colors]
+            mana_cost[color] = mana_cost.get(color, 0) + 1
+    generic = value - sum(mana_cost.values())
+    if generic > 0:
+        mana_cost["COLORLESS"] = generic + 1  # stored one over, see card.mana_value
+    if rng.random() < 0.03:
+        mana_cost["VARIABLE"] = 1
+    return mana_cost
+
+
+def synthetic_rows(n_cards: int, n_sets: int = 100, seed: int = 0):
+    """
+    Rows for the cards table, in lookup.CARD_COLUMNS order. The cards of
+    a set are consecutive, as the lookup writes them.
+
+    Args:
+        n_cards (int): number of cards
+        n_sets (int): number of sets the cards are spread over
+        seed (int): seed for the random choices
+
+    Yields:
+        tuple
+    """
+    rng = random.Random(seed)
+    names = card_names(seed)
+    type_names = list(TYPES)
+    type_weights = [weight for weight, _ in TYPES.values()]
+    for idx in range(n_cards):
+        card_type = rng.choices(type_names, type_weights)[0]
+        subtype = rng.choice(TYPES[card_type][1])
+        mana_cost = synthetic_cost(rng, card_type)
+        color = sum(Color[name] for name in mana_cost if name in COLORS)
+        abilities = [
+            rng.choice(RULES_TEXT).format(n=idx % 3 + 1) for _ in range(rng.randint(0, 2))
+        ]
+        if rng.random() < (0.55 if card_type == "Creature" else 0.1):
+            abilities.insert(0, ", ".join(rng.sample(KEYWORD_LINES, rng.randint(1, 2))))
+        if rng.random() < LEGENDARY:
+            card_type = "Legendary " + card_type
+        yield (
+            f"S{idx * n_sets // n_cards:03d}",
+            names[idx % len(names)],
+            f"https://img.example/{idx}.png",
+            card_type + " " if subtype else card_type,
+            " " + subtype if subtype else "",
+            f'"Quote number {idx}"',
+            rng.choices(list(RARITY_WEIGHTS), list(RARITY_WEIGHTS.values()))[0].value,
+            color,
+            json.dumps(mana_cost),
+            json.dumps(abilities),
+        ) + cost_values(mana_cost) + (json.dumps(keyword_abilities(abilities)),)
+
+
+def synthetic_page(row: tuple) -> Page:
+    """
+    Card page for a row of synthetic_rows, laid out the way Card parses
+    it so parsing the page gives back the fields of the row
+    """
+    _, title, img_url, card_type, subtype, quote, rarity, _, cost, abilities = row[:10]
+    symbols = []
+    for name, count in json.loads(cost).items():
+        if name == "COLORLESS":
+            symbols.append(f"ms-{count - 1}")
+        else:
+            symbols.extend(["ms-x" if name == "VARIABLE" else "ms-" + COLOR_SYMBOLS[name]] * count)
+    icons = "".join(f'<i class="ms {symbol} ms-cost ms-shadow"></i>' for symbol in symbols)
+    type_line = card_type + ("—" + subtype if subtype else "")
+    body = (
+        f'<div id="cardInfo"><img src="{html.escape(img_url)}"/>'
+        '<div class="col-sm-12 col-md-6 mt-3 mt-md-0">'
+        f'<h5>{html.escape(title)}<span class="pull-right">{icons}</span></h5>'
+        f"<p>{html.escape(type_line)}</p>"
+        f"<p>{'<br/>'.join(html.escape(line) for line in json.loads(abilities))}</p>"
+        f"<p><i>{html.escape(quote, quote=False)}</i></p>"
+        "<p>Illustrated by Synthetic</p>"
+        f"<small>{Rarity(rarity).name.title()}</small>"
+        "</div></div>"
+    )
+    return Page(img_url.replace("img.example", "card.example"),
+                f"<html><body>{body}</body></html>".encode("utf-8"))
+
+
+def write_catalog(path: str, n_cards: int, n_sets: int = None, seed: int = 0):
+    """
+    Write a synthetic catalog, with every index, through the BulkLoader
+
+    Args:
+        path (str): database file, added to if it exists
+        n_cards (int): number of cards
+        n_sets (int): number of sets, one per CARDS_PER_SET cards if None
+        seed (int): seed for the random choices
+    """
+    n_sets = n_sets or max(1, n_cards // CARDS_PER_SET)
+    conn = sqlite3.connect(path)
+    create_tables(conn.cursor())
+    conn.executemany("INSERT OR REPLACE INTO sets VALUES (?, ?, ?, ?)", synthetic_sets(n_sets))
+    with BulkLoader(conn) as loader:
+        for row in synthetic_rows(n_cards, n_sets, seed):
+            loader.add_row(row)
+    conn.close()
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Write a synthetic card database")
+    arg_parser.add_argument("--cards", type=parse_scale, default="100k",
+                            help="number of cards, or one of " + ", ".join(SCALES))
+    arg_parser.add_argument("--sets", type=int, help=f"default one per {CARDS_PER_SET} cards")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--out", required=True, help="database file to write")
+    args = arg_parser.parse_args()
+    write_catalog(args.out, args.cards, args.sets, args.seed)
+    print(f"wrote {args.cards} cards to {args.out}")
@@ -0,0 +1,131 @@
+"""
+connection.py
+
+Last Updated: 18 Oct 2026
+
+Long-lived read-only connections to the card database for the
+application. Each thread gets its own connection, opened once with a
+larger page cache and memory mapped I/O, and a SearchResults kept on it,
+so the page and statement caches survive between searches. The results
+themselves are cached in a QueryCache shared by the threads. When a
+refresh replaces the database file the connections are reopened on the
+new file the next time they are asked for, and the cached results of the
+old file are dropped.
+"""
+import os
+import pathlib
+import sqlite3
+import threading
+
+from .database_search import DB_FILE, QueryCache, SearchResults
+
+CACHE_SIZE = 64 * 1024  # KiB of page cache per connection
+MMAP_SIZE = 256 * 1024 * 1024  # bytes of the file memory mapped
+CACHED_STATEMENTS = 256
+
+
+def file_identity(path: str) -> tuple:
+    """
+    What tells one database file from another put in its place
+
+    Args:
+        path (str): path of the database file
+    """
+    stat = os.stat(path)
+    return stat.st_dev, stat.st_ino
+
+
+class ConnectionManager:
+    """
+    Hands out a read-only connection and SearchResults per thread
+
+    Args:
+        db_file (str): Path of the database
+        cache_size (int): KiB of page cache for each connection
+        mmap_size (int): Bytes of the database file memory mapped
+        query_log (query_log.QueryLog): Records the timings of the
+            searches of every thread, None to leave them untimed
+    """
+
+    # pylint: disable=too-many-instance-attributes
+    def __init__(self, db_file: str = DB_FILE, cache_size: int = CACHE_SIZE,
+                 mmap_size: int = MMAP_SIZE, query_log=None):
+        self.db_file = db_file
+        self.cache_size = cache_size
+        self.mmap_size = mmap_size
+        self.query_log = query_log
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._open = set()
+        # search results shared by the threads, see query_cache.stats()
+        self.query_cache = QueryCache()
+        # file the cached results came from, generations only count the
+        # refreshes of one file so they cannot tell a replaced file apart
+        self._identity = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Open a tuned read-only connection to the database
+        """
+        uri = pathlib.Path(os.path.abspath(self.db_file)).as_uri() + "?mode=ro"
+        # only used by the thread that opened it, but closed by close_all
+        conn = sqlite3.connect(
+            uri, uri=True, check_same_thread=False, cached_statements=CACHED_STATEMENTS
+        )
+        conn.execute(f"PRAGMA cache_size = {-int(self.cache_size)}")
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        with self._lock:
+            self._open.add(conn)
+        return conn
+
+    def _discard(self, conn: sqlite3.Connection):
+        """
+        Close a connection that is no longer handed out
+        """
+        with self._lock:
+            self._open.discard(conn)
+        conn.close()
+
+    def connection(self) -> sqlite3.Connection:
+        """
+        Connection of the calling thread, reopened if the database file
+        was replaced since it was opened
+        """
+        identity = file_identity(self.db_file)
+        with self._lock:
+            if identity != self._identity:
+                self.query_cache.clear()
+                self._identity = identity
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.identity != identity:
+            self._discard(conn)
+            conn = None
+        elif conn is not None:
+            with self._lock:
+                if conn not in self._open:  # closed by close_all
+                    conn = None
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            self._local.identity = identity
+            self._local.search = None
+        return conn
+
+    def search_results(self) -> SearchResults:
+        """
+        SearchResults of the calling thread, on its connection
+        """
+        conn = self.connection()
+        if self._local.search is None:
+            self._local.search = SearchResults(conn.cursor(), self.query_cache, self.query_log)
+        return self._local.search
+
+    def close_all(self):
+        """
+        Close every connection handed out, threads that ask again get a
+        new one
+        """
+        with self._lock:
+            connections, self._open = self._open, set()
+        for conn in connections:
+            conn.close()
@@ -2,24 +2,378 @@
 database_search.py
 
 Created By: James Lambert
-Last Updated: 11 Aug 2025
+Last Updated: 18 Oct 2026
 
 This file assist with the seaching of the database of cards.
 It generates the SQL Command and runs it, returning the values from the results.
+
+Text searches go through the cards_fts trigram index (see update_db/schema.py)
+and are ranked by relevance. Terms shorter than 3 characters, which the index
+cannot match, and databases built before the index existed fall back to LIKE.
+
+Results are kept in a QueryCache, dropped whenever the database changes.
 """
 
 import sqlite3
 import enum
+import functools
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
 from typing import List
 import os
+import re
+from bisect import bisect_left
 
+from .name_index import NameIndex
 from .update_db.enums import Rarity, Color
+from .update_db.keywords import keyword_name
+from .update_db.schema import FTS_COLUMNS, PIP_COLUMNS, read_generation
 
 script_dir = os.path.dirname(__file__)
 REL_PATH = "card_db.db"
 
 DB_FILE = os.path.abspath(os.path.join(script_dir, REL_PATH))
 
+MIN_FTS_LENGTH = 3  # shortest term the trigram index can match
+# (kwarg, cards_fts columns) searched by multi_command_building
+TEXT_FILTERS = (
+    ("title", ("title",)),
+    ("card_type", ("type",)),
+    ("subtype", ("subtype",)),
+    ("text", ("abilities", "quote")),
+)
+# cards of the sets resolved by a SetIndex, bound as a JSON list of codes
+SET_FILTER = "cards.set_shortened IN (SELECT value FROM json_each(?))"
+RESOLVED_SETS = 256  # set texts whose resolution a SetIndex remembers
+FTS_SOURCE = "cards_fts JOIN cards ON cards.id = cards_fts.rowid"
+FTS_SELECT = f"SELECT cards.* FROM {FTS_SOURCE} WHERE cards_fts MATCH ?"
+PAGE_SIZE = 200
+CACHE_SIZE = 256  # searches kept by a QueryCache
+MAX_CACHED_ROWS = 5000  # larger results are not cached
+KEYWORD_OPERATORS = ("AND", "OR", "NOT")
+KEYWORD_SELECT = "SELECT card_id FROM card_keywords WHERE keyword = ?"
+
+
+def cost_filters(kwargs) -> tuple:
+    """
+    Conditions on the indexed cost columns for the min_cmc, max_cmc and
+    pips kwargs of multi_command_building
+
+    Returns:
+        (conditions, params)
+    """
+    conditions = []
+    params = []
+    if kwargs.get("min_cmc") is not None:
+        conditions.append("cards.mana_value >= ?")
+        params.append(int(kwargs["min_cmc"]))
+    if kwargs.get("max_cmc") is not None:
+        conditions.append("cards.mana_value <= ?")
+        params.append(int(kwargs["max_cmc"]))
+    for color, minimum in (kwargs.get("pips") or {}).items():
+        conditions.append(f"cards.{PIP_COLUMNS[color]} >= ?")
+        params.append(int(minimum))
+    return conditions, params
+
+
+def parse_keywords(expression: str):
+    """
+    Parse a keyword search such as "Flying AND (Trample OR Reach) AND NOT
+    Defender". NOT binds tightest, then AND, then OR; keywords of more than
+    one word ("First strike") need no quotes.
+
+    Returns:
+        nested tuples - ("keyword", name), ("not", node), ("and", [nodes])
+        or ("or", [nodes])
+
+    Raises:
+        ValueError: the expression is empty or malformed
+    """
+    tokens = []
+    for token in re.findall(r"[()]|[^\s()]+", expression):
+        if token.upper() in KEYWORD_OPERATORS or token in "()":
+            tokens.append(token.upper())
+        elif tokens and tokens[-1] not in KEYWORD_OPERATORS + ("(", ")"):
+            tokens[-1] += " " + token  # words of the same keyword
+        else:
+            tokens.append(token)
+    position = 0
+
+    def peek():
+        return tokens[position] if position < len(tokens) else None
+
+    def advance():
+        nonlocal position
+        token = peek()
+        if token is None:
+            raise ValueError(f"Keyword search ends too early: {expression!r}")
+        position += 1
+        return token
+
+    def parse_any(operator, parse_operand):
+        operands = [parse_operand()]
+        while peek() == operator:
+            advance()
+            operands.append(parse_operand())
+        return operands[0] if len(operands) == 1 else (operator.lower(), operands)
+
+    def parse_operand():
+        token = advance()
+        if token == "NOT":
+            return ("not", parse_operand())
+        if token == "(":
+            node = parse_any("OR", lambda: parse_any("AND", parse_operand))
+            if advance() != ")":
+                raise ValueError(f"Unbalanced parentheses in {expression!r}")
+            return node
+        if token in KEYWORD_OPERATORS + (")",):
+            raise ValueError(f"Unexpected {token} in {expression!r}")
+        return ("keyword", keyword_name(token))
+
+    tree = parse_any("OR", lambda: parse_any("AND", parse_operand))
+    if peek() is not None:
+        raise ValueError(f"Unexpected {peek()} in {expression!r}")
+    return tree
+
+
+def keyword_select(node, params: list) -> str:
+    """
+    Compound SELECT of the ids of the cards matching a parsed keyword
+    search, intersecting and joining ranges of the card_keywords primary
+    key rather than reading the cards
+
+    Args:
+        node: tuple from parse_keywords
+        params: list the parameters are appended to
+    """
+    kind, value = node
+    if kind == "keyword":
+        params.append(value)
+        return KEYWORD_SELECT
+    if kind == "or":
+        return " UNION ".join(_keyword_operand(each, params) for each in value)
+    # NOT x is every card EXCEPT x, and A AND NOT x is A EXCEPT x
+    operands = [value] if kind == "not" else value
+    positive = [each for each in operands if each[0] != "not"] if kind == "and" else []
+    negative = [each[1] if kind == "and" else each for each in operands if each not in positive]
+    selects = [_keyword_operand(each, params) for each in positive] or [
+        "SELECT id AS card_id FROM cards"
+    ]
+    query = " INTERSECT ".join(selects)
+    for each in negative:
+        query += " EXCEPT " + _keyword_operand(each, params)
+    return query
+
+
+def _keyword_operand(node, params: list) -> str:
+    """
+    keyword_select of one operand of a compound SELECT, nested in a
+    subquery unless it is a single keyword
+    """
+    query = keyword_select(node, params)
+    return query if node[0] == "keyword" else f"SELECT card_id FROM ({query})"
+
+
+def fts_phrase(term: str, columns=FTS_COLUMNS) -> str:
+    """
+    FTS5 query matching term as a substring of any of the columns
+
+    Args:
+        term: str
+        columns: Iterable[str] - columns of cards_fts
+    """
+    phrase = '"' + term.replace('"', '""') + '"'
+    return "{" + " ".join(columns) + "} : " + phrase
+
+
+def normalize(value):
+    """
+    Hashable form of a search argument, with the empty filters that the
+    searches ignore dropped so equivalent searches share a cache entry
+    """
+    if isinstance(value, dict):
+        return tuple(sorted(
+            (key, normalize(item)) for key, item in value.items()
+            if item not in (None, "") and item is not Rarity.UNKNOWN
+        ))
+    if isinstance(value, (list, tuple)):
+        return tuple(normalize(item) for item in value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+class QueryCache:
+    """
+    Bounded LRU cache of search results, which may be shared by the
+    SearchResults of several connections to the same database
+
+    Args:
+        maxsize: int - number of searches kept
+    """
+
+    def __init__(self, maxsize: int = CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.generation = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Cached result for a key, marking it as recently used
+
+        Returns:
+            (found, result)
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, result):
+        """
+        Keep a result, evicting the least recently used beyond maxsize
+        """
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Drop every cached result
+        """
+        with self._lock:
+            self._entries.clear()
+            self.generation = None
+
+    def sync(self, generation: int):
+        """
+        Drop every cached result if they came from another catalog generation
+        """
+        with self._lock:
+            if generation != self.generation:
+                self._entries.clear()
+                self.generation = generation
+
+    def stats(self) -> dict:
+        """
+        Hits, misses and size of the cache
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+
+def cached_search(method):
+    """
+    Decorator for the SearchResults methods whose results are cached,
+    keyed by the method and its normalized arguments
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        start = time.perf_counter() if self.query_log is not None else None
+        key = (method.__name__, normalize(args), normalize(kwargs))
+        # pylint: disable=protected-access
+        self._check_version()
+        found, result = self.cache.get(key)
+        if not found:
+            result = method(self, *args, **kwargs)
+            if not isinstance(result, list) or len(result) <= MAX_CACHED_ROWS:
+                self.cache.put(key, result)
+        if isinstance(result, list):
+            result = list(result)  # callers may change the list they get
+            self.last_result = result
+        elif isinstance(result, DbCard):
+            self.last_result = [result.row]
+        if start is not None:
+            self.query_log.record_method(
+                method.__name__, time.perf_counter() - start,
+                len(result) if isinstance(result, list) else 1, found,
+            )
+        return result
+
+    return wrapper
+
+
+class SetIndex:
+    """
+    In-memory index of the sets table resolving the set text typed by the
+    user into exact set codes, matched without case against the codes and
+    titles: the set named exactly, otherwise every set starting with the
+    text, otherwise every set containing it.
+
+    Args:
+        rows: Iterable[(shortened, title)] - rows of the sets table
+    """
+
+    def __init__(self, rows):
+        self.sets = [(code, title or "") for code, title in rows]
+        # (lower case code or title, code), sorted for the prefix search
+        self.names = sorted(
+            {(name.lower(), code) for code, title in self.sets for name in (code, title) if name}
+        )
+        self.codes = sorted((code.lower(), code) for code, _ in self.sets)
+        self.resolved = OrderedDict()
+
+    @classmethod
+    def load(cls, cursor: sqlite3.Cursor) -> "SetIndex":
+        """
+        Index of the sets in the database of the cursor
+        """
+        return cls(cursor.execute("SELECT shortened, title FROM sets").fetchall())
+
+    def resolve(self, text: str, titles: bool = True) -> tuple:
+        """
+        Codes of the sets the text refers to, in sorted order
+
+        Args:
+            text: str - code or title, or the start or any part of one
+            titles: bool - whether titles are matched as well as codes
+        """
+        key = (text, titles)
+        if key in self.resolved:
+            self.resolved.move_to_end(key)
+            return self.resolved[key]
+        codes = self._match(text.strip().lower(), titles)
+        self.resolved[key] = codes
+        if len(self.resolved) > RESOLVED_SETS:
+            self.resolved.popitem(last=False)
+        return codes
+
+    def _match(self, text: str, titles: bool) -> tuple:
+        """
+        Exact, then prefix, then substring matches of lower case text
+        """
+        names = self.names if titles else self.codes
+        start = bisect_left(names, (text, ""))
+        prefixed = []
+        for name, code in names[start:]:
+            if not name.startswith(text):
+                break
+            if name == text:
+                return (code,)
+            prefixed.append(code)
+        if not prefixed:
+            prefixed = [code for name, code in names if text in name]
+        return tuple(sorted(set(prefixed)))
+
 
 class DbOrder(enum.Enum):
     """
@@ -37,35 +391,124 @@ class DbOrder(enum.Enum):
     COLOR = 8
     COST = 9
     ABILITIES = 10
+    MANA_VALUE = 11
+    KEYWORDS = 17
+
+
+RARITIES = {rarity.value: rarity for rarity in Rarity}
+# DbOrder positions as plain ints for DbCard, an Enum lookup on every field read
+# costs more than the read
+_ID = DbOrder.ID.value
+_SET = DbOrder.SET.value
+_TITLE = DbOrder.TITLE.value
+_IMG_URL = DbOrder.IMG_URL.value
+_TYPE = DbOrder.TYPE.value
+_SUBTYPE = DbOrder.SUBTYPE.value
+_QUOTE = DbOrder.QUOTE.value
+_RARITY = DbOrder.RARITY.value
+_COLOR = DbOrder.COLOR.value
+_COST = DbOrder.COST.value
+_ABILITIES = DbOrder.ABILITIES.value
+_MANA_VALUE = DbOrder.MANA_VALUE.value
+_KEYWORDS = DbOrder.KEYWORDS.value
 
 
 class DbCard:
     """
     DbCard Object
+
+    A thin view over the row fetched from the cards table. Fields are read
+    from the row when accessed, the Rarity is looked up only when details
+    is used and the mana_cost/abilities JSON is only decoded on first use.
     """
 
+    __slots__ = ("row", "_decoded")
+
     def __init__(self, fetch_results):
         """initialization function for DbCard
         
-        Initialization function for the DbCard Object. Taking the data
-        from fetch_results and saving them to specific data inside the DbCard
+        Initialization function for the DbCard Object. Keeping the data
+        from fetch_results, which is read back by the properties
 
         Args:
             fetch_results: List - results from cursor.fetchone
                 (or each item from cursor.fetchall)
         """
-        self.card_id = fetch_results[DbOrder.ID.value]
-        self.set = fetch_results[DbOrder.SET.value]
-        self.title = fetch_results[DbOrder.TITLE.value]
-        self.img_url = fetch_results[DbOrder.IMG_URL.value]
-        self.card_type = fetch_results[DbOrder.TYPE.value]
-        self.subtype = fetch_results[DbOrder.SUBTYPE.value]
-        quote = fetch_results[DbOrder.QUOTE.value]
-        rarity = Rarity(fetch_results[DbOrder.RARITY.value])
-        color = fetch_results[DbOrder.COLOR.value]
-        cost = fetch_results[DbOrder.COST.value]
-        abilities = fetch_results[DbOrder.ABILITIES.value]
-        self.details = (quote, rarity, color, cost, abilities)
+        self.row = fetch_results
+        self._decoded = None
+
+    @property
+    def card_id(self):
+        """id of the card"""
+        return self.row[_ID]
+
+    @property
+    def set(self):
+        """shortened name of the set"""
+        return self.row[_SET]
+
+    @property
+    def title(self):
+        """title of the card"""
+        return self.row[_TITLE]
+
+    @property
+    def img_url(self):
+        """url of the card image"""
+        return self.row[_IMG_URL]
+
+    @property
+    def card_type(self):
+        """type of the card"""
+        return self.row[_TYPE]
+
+    @property
+    def subtype(self):
+        """subtype of the card"""
+        return self.row[_SUBTYPE]
+
+    @property
+    def details(self):
+        """
+        (quote, rarity, color, cost, abilities), cost and abilities as
+        the JSON stored in the database
+        """
+        row = self.row
+        return (row[_QUOTE], RARITIES[row[_RARITY]], row[_COLOR], row[_COST], row[_ABILITIES])
+
+    @property
+    def mana_value(self):
+        """mana value of the card, None for rows written before it was stored"""
+        row = self.row
+        return row[_MANA_VALUE] if len(row) > _MANA_VALUE else None
+
+    @property
+    def keywords(self) -> list:
+        """keyword abilities of the card, decoded from the JSON"""
+        row = self.row
+        return json.loads(row[_KEYWORDS]) if len(row) > _KEYWORDS and row[_KEYWORDS] else []
+
+    @property
+    def mana_cost(self) -> dict:
+        """mana cost of the card, decoded from the JSON on first use"""
+        return self._decode()[0]
+
+    @property
+    def abilities(self) -> list:
+        """abilities of the card, decoded from the JSON on first use"""
+        return self._decode()[1]
+
+    def _decode(self) -> tuple:
+        """
+        Decode the mana_cost and abilities columns once
+        """
+        if self._decoded is None:
+            cost, abilities = self.row[_COST], self.row[_ABILITIES]
+            self._decoded = (
+                json.loads(cost) if cost else {},
+                json.loads(abilities) if abilities else [],
+            )
+        return self._decoded
 
     def show_details(self):
         """
@@ -82,34 +525,145 @@ class DbCard:
         return f"ID: {self.card_id:<6}\tSet:{self.set:<6}\tName: {self.title}"
 
 
-class SearchResults:
+class SearchResults:  # pylint: disable=too-many-instance-attributes
     """
     SearchResults uses a provided Cursor to generate a query lookup 
     for the results requested
     """
 
-    def __init__(self, cursor: sqlite3.Cursor):
+    def __init__(self, cursor: sqlite3.Cursor, cache: QueryCache = None, query_log=None):
         """
         Initialization function for SearchResults Object
 
         Args:
             cursor: sqlite3.Cursor - the connection to the database file
+            cache: QueryCache - cache for the results, shared with other
+                SearchResults on the same database, a new one if None
+            query_log: query_log.QueryLog - records the timings of the
+                queries, None to leave them untimed
         """
         self.cursor = cursor
         self.last_result = []
+        self.last_query = None
+        self.cache = cache if cache is not None else QueryCache()
+        self.query_log = query_log
+        self._data_version = None
+        self._set_index = None
+        self._name_index = None
+        self.has_fts = cursor.execute(
+            "SELECT EXISTS(SELECT 1 FROM sqlite_master WHERE name = 'cards_fts')"
+        ).fetchone()[0]
+
+    def _check_version(self):
+        """
+        Drop the cached results when the database changed since the last
+        search: data_version moves with every commit made by another
+        connection, total_changes with every row written through this
+        one, the generation tells a cache shared with other connections
+        whether it was filled from this catalog.
+        """
+        version = (
+            self.cursor.execute("PRAGMA data_version").fetchone()[0],
+            self.cursor.connection.total_changes,
+        )
+        if version == self._data_version:
+            return
+        if self._data_version is not None:
+            self.cache.clear()
+        self._data_version = version
+        self._set_index = None
+        self._name_index = None
+        self.cache.sync(read_generation(self.cursor))
+
+    @property
+    def set_index(self) -> SetIndex:
+        """
+        SetIndex of the sets in the database, loaded again after it changed
+        """
+        self._check_version()
+        if self._set_index is None:
+            self._set_index = SetIndex.load(self.cursor)
+        return self._set_index
+
+    @property
+    def name_index(self) -> NameIndex:
+        """
+        NameIndex of the card titles, loaded again after the database changed
+        """
+        self._check_version()
+        if self._name_index is None:
+            self._name_index = NameIndex.load(self.cursor)
+        return self._name_index
+
+    def _use_fts(self, term: str) -> bool:
+        """
+        Whether a text term can be searched through cards_fts
+        """
+        return self.has_fts and len(term.strip()) >= MIN_FTS_LENGTH
 
+    def _execute(self, query: str, params=()):
+        """
+        Run a parameterized query, kept in last_query for explain()
+        """
+        self.last_query = (query, tuple(params))
+        return self.cursor.execute(query, params)
+
+    def _fetch(self, query: str, params=(), one: bool = False):
+        """
+        Run a parameterized query and fetch its rows, or only the first
+        row when one, timed by the query_log if there is one
+        """
+        if self.query_log is None:
+            cursor = self._execute(query, params)
+            return cursor.fetchone() if one else cursor.fetchall()
+        start = time.perf_counter()
+        cursor = self._execute(query, params)
+        rows = cursor.fetchone() if one else cursor.fetchall()
+        self.query_log.record_query(
+            query, params, time.perf_counter() - start,
+            int(rows is not None) if one else len(rows), partial(self.explain, query, params),
+        )
+        return rows
+
+    def _cards(self, rows) -> List[DbCard]:
+        """
+        DbCards of fetched rows, timed by the query_log if there is one
+        """
+        if self.query_log is None:
+            return [DbCard(each) for each in rows]
+        start = time.perf_counter()
+        cards = [DbCard(each) for each in rows]
+        self.query_log.record_cards(time.perf_counter() - start)
+        return cards
+
+    def explain(self, query: str = None, params=()) -> List[str]:
+        """
+        EXPLAIN QUERY PLAN of a query, by default the last one run
+
+        Returns:
+            List[str] - the detail of each step, e.g.
+                "SEARCH cards USING INDEX idx_cards_rarity (rarity=?)"
+        """
+        if query is None:
+            query, params = self.last_query
+        plan = self.cursor.execute("EXPLAIN QUERY PLAN " + query, params).fetchall()
+        return [row[-1] for row in plan]
+
+    @cached_search
     def get_set_by_title(self, title):
         """
-        Build a search query for sets using the set's title or shortened name.
+        Find the sets using the set's title or shortened name, see
+        SetIndex.resolve
 
         Args:
             title: str
+
+        Returns:
+            list of (shortened,)
         """
-        fmt = "SELECT shortened FROM sets WHERE shortened LIKE '%{0}%' OR title LIKE '%{0}%'"
-        self.cursor.execute(fmt.format(title))
-        set_list = self.cursor.fetchall()
-        return set_list
+        return [(code,) for code in self.set_index.resolve(title)]
 
+    @cached_search
     def get_card_by_id(self, card_id) -> DbCard:
         """
         Build a search query for cards using the card's id.
@@ -117,14 +671,13 @@ class SearchResults:
         Args:
             card_id: int
         """
-        fmt = "SELECT * FROM cards WHERE id = {0}"
-        self.cursor.execute(fmt.format(card_id))
-        fetch_results = self.cursor.fetchone()
+        fetch_results = self._fetch("SELECT * FROM cards WHERE id = ?", (card_id,), one=True)
         self.last_result.clear()
         self.last_result.append(fetch_results)
         card = DbCard(fetch_results)
         return card
 
+    @cached_search
     def search_cards_by_title(self, title) -> List[DbCard]:
         """
         Build a search query for cards using the card's title.
@@ -132,16 +685,98 @@ class SearchResults:
         Args:
             title: str
         """
-        fmt = "SELECT * FROM cards WHERE title LIKE '%{0}%'"
-        self.cursor.execute(fmt.format(title))
-        fetch_results = self.cursor.fetchall()
-        self.last_result = fetch_results
-        cards = []
-        for each in fetch_results:
-            cards.append(DbCard(each))
+        cards = self._cards(self._fetch(*self._text_query(title, ("title",))))
         self.last_result = cards
         return cards
 
+    @cached_search
+    def search_text(self, text, columns=FTS_COLUMNS) -> List[DbCard]:
+        """
+        Build a search query for cards containing the text in any of the
+        columns (title, type, subtype, abilities and quote by default),
+        best matches first.
+
+        Args:
+            text: str
+            columns: Iterable[str]
+        """
+        cards = self._cards(self._fetch(*self._text_query(text, columns)))
+        self.last_result = cards
+        return cards
+
+    def _text_query(self, text, columns):
+        """
+        Query and parameters for cards containing the text in any of the columns
+        """
+        if self._use_fts(text):
+            return FTS_SELECT + " ORDER BY rank", (fts_phrase(text, columns),)
+        condition = " OR ".join(f"cards.{column} LIKE ?" for column in columns)
+        return f"SELECT * FROM cards WHERE {condition}", (f"%{text}%",) * len(columns)
+
+    def _build_filters(self, kwargs):
+        """
+        FROM and WHERE parts of a search with the kwargs of
+        multi_command_building
+
+        Returns:
+            (source, conditions, params) - the tables to select from
+            (cards_fts joined to cards when a text term can use the index,
+            see FTS_SOURCE), the conditions to AND together and their
+            parameters
+        """
+        conditions = []
+        params = []
+
+        # Title, card type, subtype and rules text
+        matches = []
+        for kwarg, columns in TEXT_FILTERS:
+            term = kwargs.get(kwarg)
+            if not term:
+                continue
+            if self._use_fts(term):
+                matches.append(fts_phrase(term, columns))
+            else:
+                likes = " OR ".join(f"cards.{column} LIKE ?" for column in columns)
+                conditions.append(f"({likes})")
+                params.extend([f"%{term}%"] * len(columns))
+
+        # Rarity
+        rarity = kwargs.get("rarity")
+        if rarity and rarity.value != 0:
+            conditions.append("cards.rarity = ?")
+            params.append(rarity.value)
+
+        # Color
+        color = kwargs.get("color")
+        if color:
+            if Color[color] == 0:  # colorless
+                conditions.append("cards.color = ?")
+            else:
+                conditions.append("cards.color & ? != 0")
+            params.append(Color[color])
+
+        # Set search (matches the shortened name or the title)
+        set_shortened = kwargs.get("set_shortened")
+        if set_shortened:
+            conditions.append(SET_FILTER)
+            params.append(json.dumps(self.set_index.resolve(set_shortened)))
+
+        # Mana value and colored pips
+        costs, cost_params = cost_filters(kwargs)
+        conditions += costs
+        params += cost_params
+
+        # Keyword abilities
+        if kwargs.get("keywords"):
+            conditions.append(
+                f"cards.id IN ({keyword_select(parse_keywords(kwargs['keywords']), params)})"
+            )
+
+        if not matches:
+            return "cards", conditions, params
+        return FTS_SOURCE, ["cards_fts MATCH ?"] + conditions, [" AND ".join(matches)] + params
+
+    @cached_search
     def search_cards_by_set(self, set_shortened) -> List[DbCard]:
         """
         Build a search query for cards using the Shortened Set name.
@@ -149,28 +784,20 @@ class SearchResults:
         Args:
             card_set: str
         """
-        fmt = "SELECT * FROM cards c WHERE set_shortened LIKE '%{0}%'"
-        self.cursor.execute(fmt.format(set_shortened))
-        fetch_results = self.cursor.fetchall()
+        codes = self.set_index.resolve(set_shortened, titles=False)
+        fetch_results = self._fetch(f"SELECT * FROM cards WHERE {SET_FILTER}", (json.dumps(codes),))
         self.last_result = fetch_results
-        cards = []
-        for each in fetch_results:
-            cards.append(DbCard(each))
-        return cards
+        return self._cards(fetch_results)
 
     def get_all_cards(self) -> List[DbCard]:
         """
         Build a search query for getting all cards
         """
-        fmt = "SELECT * FROM cards"
-        self.cursor.execute(fmt)
-        fetch_results = self.cursor.fetchall()
+        fetch_results = self._fetch("SELECT * FROM cards")
         self.last_result = fetch_results
-        cards = []
-        for each in fetch_results:
-            cards.append(DbCard(each))
-        return cards
+        return self._cards(fetch_results)
 
+    @cached_search
     def search_results_by_color(self, color: str) -> List[DbCard]:
         """
         Build a search query for cards using card color.
@@ -179,18 +806,17 @@ class SearchResults:
             color: str (Options: "RED","BLUE","GREEN","WHITE","BLACK","COLORLESS")
         """
         try:
-            Color[color.upper()]
+            value = Color[color.upper()]
         except KeyError:
             return []
-        fmt = "SELECT * FROM cards c WHERE c.color & {0} != 0"
-        self.cursor.execute(fmt.format(Color[color.upper()]))
-        fetch_results = self.cursor.fetchall()
+        if value == 0:  # colorless
+            fetch_results = self._fetch("SELECT * FROM cards WHERE color = ?", (value,))
+        else:
+            fetch_results = self._fetch("SELECT * FROM cards WHERE color & ? != 0", (value,))
         self.last_result = fetch_results
-        cards = []
-        for each in fetch_results:
-            cards.append(DbCard(each))
-        return cards
+        return self._cards(fetch_results)
 
+    @cached_search
     def multi_command_building(self, **kwargs):
         """
         Build a flexible search query for cards using keyword arguments.
@@ -202,57 +828,94 @@ class SearchResults:
             rarity (Rarity)
             card_type (str)
             subtype (str)
+            text (str) - searched in the abilities and quote
+            min_cmc (int) - lowest mana value
+            max_cmc (int) - highest mana value
+            pips (dict) - color name (see schema.PIP_COLUMNS) to the
+                fewest pips of that color, e.g. {"BLUE": 2}
+            keywords (str) - keyword abilities combined with AND, OR, NOT
+                and parentheses, e.g. "Flying AND NOT Defender"
+
+        Results are ranked by relevance when a text filter can use cards_fts.
         """
-        query = "SELECT * FROM cards WHERE 1=1"
-        params = []
-        subtype = kwargs.get("subtype")
-        card_type = kwargs.get("card_type")
-        rarity = kwargs.get("rarity")
-        set_shortened = kwargs.get("set_shortened")
-        title = kwargs.get("title")
-        color = kwargs.get("color")
-        # Subtype
-        if subtype:
-            query += " AND subtype LIKE ?"
-            params.append(f"%{subtype}%")
+        source, conditions, params = self._build_filters(kwargs)
+        query = f"SELECT cards.* FROM {source} WHERE {' AND '.join(conditions) or '1=1'}"
+        if source == FTS_SOURCE:
+            query += " ORDER BY rank"
 
-        # Card type
-        if card_type:
-            query += " AND type LIKE ?"
-            params.append(f"%{card_type}%")
+        # Execute
+        fetch_results = self._fetch(query, params)
+        self.last_result = fetch_results
 
-        # Rarity
-        if rarity and rarity.value != 0:
-            query += " AND rarity = ?"
-            params.append(rarity.value)
+        return self._cards(fetch_results)
 
-        # Color
-        if color:
-            if Color[color] == 0:  # colorless
-                query += " AND color = ?"
-            else:
-                query += " AND color & ? != 0"
-            params.append(Color[color])
+    @cached_search
+    def page_after(self, last_id=None, limit=PAGE_SIZE, **kwargs) -> List[DbCard]:
+        """
+        Build a search query for one page of the cards matching the
+        kwargs of multi_command_building, in id order. Pages are found
+        by id (keyset pagination) rather than by OFFSET, so any page is
+        as quick to get as the first.
 
-        # Set search (matches multiple variations)
-        if set_shortened:
-            tmp = self.get_set_by_title(set_shortened)
-            if tmp:
-                query += " AND (set_shortened LIKE ?"
-                params.append(f"%{tmp[0]}%")
-                for each in tmp[0:]:
-                    query += " OR set_shortened LIKE ?"
-                    params.append(f"%{each[0]}%")
-                query += ")"
-
-        # Title
-        if title:
-            query += " AND title LIKE ?"
-            params.append(f"%{title}%")
+        Args:
+            last_id: int - id of the last card of the previous page, None
+                for the first page
+            limit: int - cards per page
+        """
+        source, conditions, params = self._build_filters(kwargs)
+        # order on the FTS rowid when searching the index, it is read in that order
+        key = "cards.id" if source == "cards" else "cards_fts.rowid"
+        if last_id is not None:
+            conditions.append(f"{key} > ?")
+            params.append(last_id)
+        cards = self._cards(self._fetch(
+            f"SELECT cards.* FROM {source} WHERE {' AND '.join(conditions) or '1=1'} "
+            f"ORDER BY {key} LIMIT ?",
+            params + [limit],
+        ))
+        self.last_result = cards
+        return cards
 
-        # Execute
-        self.cursor.execute(query, params)
-        fetch_results = self.cursor.fetchall()
-        self.last_result = fetch_results
+    def search_pages(self, page_size=PAGE_SIZE, **kwargs):
+        """
+        Generator of the pages of cards matching the kwargs of
+        multi_command_building, see page_after
 
-        return [DbCard(each) for each in fetch_results]
+        Args:
+            page_size: int - cards per page
+
+        Yields:
+            List[DbCard]
+        """
+        last_id = None
+        while True:
+            page = self.page_after(last_id, page_size, **kwargs)
+            if page:
+                yield page
+            if len(page) < page_size:
+                return
+            last_id = page[-1].card_id
+
+    def iter_cards(self, page_size=PAGE_SIZE, **kwargs):
+        """
+        Generator of the cards matching the kwargs of
+        multi_command_building, fetched a page at a time. With no kwargs
+        it streams the whole table, unlike get_all_cards.
+
+        Yields:
+            DbCard
+        """
+        for page in self.search_pages(page_size, **kwargs):
+            yield from page
+
+    @cached_search
+    def count_cards(self, **kwargs) -> int:
+        """
+        Build a query for the number of cards matching the kwargs of
+        multi_command_building
+        """
+        source, conditions, params = self._build_filters(kwargs)
+        return self._fetch(
+            f"SELECT COUNT(*) FROM {source} WHERE {' AND '.join(conditions) or '1=1'}", params,
+            one=True,
+        )[0]
@@ -0,0 +1,170 @@
+"""
+decklist.py
+
+Last Updated: 18 Oct 2026
+
+Resolving decklists and collection exports to cards. The distinct
+(title, set code) pairs of the lines are bound as one JSON list and
+joined to cards on the title index in one query, rather than one search
+per line. Binding the lines through json_each instead of a temporary
+table keeps resolving read-only, so it runs on the application's
+read-only connections and leaves the QueryCache alone. Titles not in the
+catalog are corrected to the title one typo from them in the
+SearchResults' NameIndex, all of them in one pass, and looked up in a
+second join.
+
+    matches, unresolved = resolve_decklist(search, text.splitlines())
+"""
+import json
+import re
+from typing import NamedTuple, Optional
+
+from .database_search import DbCard, SearchResults
+
+# "4 Lightning Bolt", "4x Lightning Bolt (M10)", "1 Lightning Bolt [M10] 146"
+DECK_LINE = re.compile(
+    r"(?:(\d+)x?\s+)?(.+?)(?:\s+[(\[]([^)\]]+)[)\]](?:\s+\S+)?)?", re.IGNORECASE
+)
+DECK_SECTIONS = ("deck", "sideboard", "commander", "companion", "maybeboard")
+# first printing of the title of a deck entry
+DECK_PRINTING = (
+    "SELECT MIN(printing.id) FROM cards AS printing "
+    "WHERE printing.title = deck.title COLLATE NOCASE"
+)
+# entries bound as a JSON list of [title, set code], key is the position
+DECK_ENTRIES = (
+    "SELECT key, json_extract(value, '$[0]') AS title, "
+    "json_extract(value, '$[1]') AS set_shortened FROM json_each(?)"
+)
+# cards.* first so the rows can back a DbCard, see DbOrder
+DECK_SELECT = (
+    f"SELECT cards.*, deck.key FROM ({DECK_ENTRIES}) AS deck "
+    f"JOIN cards ON cards.id = COALESCE(({DECK_PRINTING} AND "
+    "printing.set_shortened = deck.set_shortened COLLATE NOCASE), "
+    f"({DECK_PRINTING}))"
+)
+
+
+class DeckLine(NamedTuple):
+    """
+    Line of a decklist or collection to resolve, see parse_deck_line
+
+    Args:
+        title (str): card name as written
+        quantity (int): copies
+        set_shortened (str): set code of the printing wanted, None for any
+    """
+
+    title: str
+    quantity: int = 1
+    set_shortened: Optional[str] = None
+
+
+class DeckMatch(NamedTuple):
+    """
+    Card a line of a decklist resolved to
+
+    Args:
+        line (int): position of the line in the list resolved
+        entry (DeckLine): the line
+        card (DbCard): printing in the set of the line when there is one,
+            else the first printing stored
+        corrected (bool): whether the title was not in the catalog and
+            resolved to the title one typo from it
+    """
+
+    line: int
+    entry: DeckLine
+    card: DbCard
+    corrected: bool
+
+
+def parse_deck_line(text: str) -> Optional[DeckLine]:
+    """
+    DeckLine of a line of a decklist export, e.g. "4 Lightning Bolt",
+    "4x Lightning Bolt (M10)" or "1 Lightning Bolt [M10] 146"
+
+    Returns:
+        None for blank lines, comments ("//", "#") and section headers
+        ("Sideboard")
+    """
+    text = text.strip()
+    if not text or text.startswith(("//", "#")) or text.rstrip(":").lower() in DECK_SECTIONS:
+        return None
+    quantity, title, set_shortened = DECK_LINE.fullmatch(text).groups()
+    return DeckLine(title, int(quantity) if quantity else 1, set_shortened)
+
+
+def resolve_decklist(search: SearchResults, entries, fuzzy: bool = True) -> tuple:
+    """
+    Resolve the lines of a decklist or collection to cards at once. A
+    function over a SearchResults rather than a method of it, returning
+    lists rather than streaming: every line is looked up by the same
+    statement, whose rows are fetched before anything is returned, and
+    which lines are unresolved is only known once all of them were.
+
+    Args:
+        search: SearchResults - connection the cards are looked up on
+        entries: Iterable[str or DeckLine] - lines, parsed with
+            parse_deck_line when they are text
+        fuzzy: bool - whether titles not in the catalog are resolved to
+            the title one typo from them (see NameIndex.closest)
+
+    Returns:
+        (matches, unresolved) - the DeckMatch of every line resolved, in
+        line order, and the list of (line, DeckLine) that could not be
+    """
+    lines = dict(
+        (position, entry) for position, entry in enumerate(
+            parse_deck_line(entry) if isinstance(entry, str) else DeckLine(*entry)
+            for entry in entries
+        ) if entry is not None
+    )
+    cards = _printings(search, list(dict.fromkeys(
+        (entry.title, entry.set_shortened) for entry in lines.values()
+    )))
+    corrected = {}
+    missing = {(entry.title, entry.set_shortened) for entry in lines.values()} - cards.keys()
+    if fuzzy and missing:
+        corrected = _corrected(search, missing)
+        cards.update(corrected)
+    matches, unresolved = [], []
+    for position, entry in lines.items():
+        pair = (entry.title, entry.set_shortened)
+        if pair in cards:
+            matches.append(DeckMatch(position, entry, cards[pair], pair in corrected))
+        else:
+            unresolved.append((position, entry))
+    return matches, unresolved
+
+
+def _corrected(search: SearchResults, missing: set) -> dict:
+    """
+    Printing of each (title, set code) pair not found, looked up again
+    with the title one typo from its title, for the pairs with one
+
+    Returns:
+        dict of pair to DbCard
+    """
+    closest = search.name_index.closest(title for title, _ in missing)
+    retried = {
+        (title, set_shortened): (closest[title][1], set_shortened)
+        for title, set_shortened in missing if title in closest
+    }
+    found = _printings(search, list(set(retried.values())))
+    return {pair: found[retry] for pair, retry in retried.items() if retry in found}
+
+
+def _printings(search: SearchResults, pairs: list) -> dict:
+    """
+    Printing of each (title, set code) pair found, in the set when it has
+    one there, else the first stored
+
+    Returns:
+        dict of pair to DbCard
+    """
+    if not pairs:
+        return {}
+    # pylint: disable=protected-access
+    rows = search._fetch(DECK_SELECT, (json.dumps(pairs),))
+    return {pairs[row[-1]]: card for row, card in zip(rows, search._cards(rows))}
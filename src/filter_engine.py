@@ -0,0 +1,235 @@
+"""
+filter_engine.py
+
+Last Updated: 18 Oct 2026
+
+In-memory engine for the attribute filters of multi_command_building.
+The catalog is loaded once into NumPy columns (color mask, rarity code,
+dictionary encoded set/type/subtype, the mana value and pips) and filters are
+evaluated as vectorized boolean masks, so only the rows that match are
+read back from SQLite. Title, rules text and keyword terms are still
+answered by the database (through cards_fts and card_keywords) and
+combined by id.
+
+NumPy is optional, check HAS_NUMPY before building a FilterEngine.
+"""
+import json
+import re
+
+from .database_search import PAGE_SIZE, SearchResults, DbCard
+from .update_db.enums import Color
+from .update_db.schema import COST_COLUMNS, PIP_COLUMNS
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    np = None
+    HAS_NUMPY = False
+
+# kwargs of multi_command_building answered by the database
+DB_KWARGS = ("title", "text", "keywords")
+# kwargs matched with LIKE '%term%' against a dictionary encoded column
+DICTIONARY_KWARGS = {"card_type": "type", "subtype": "subtype"}
+
+
+def like_matcher(term: str):
+    """
+    Compiled pattern behaving like SQLite's LIKE '%term%': % and _ are
+    wildcards and only ASCII letters are matched without case
+
+    Args:
+        term: str
+    """
+    pattern = "".join(
+        ".*" if char == "%" else "." if char == "_" else re.escape(char) for char in term
+    )
+    return re.compile(".*" + pattern + ".*", re.IGNORECASE | re.ASCII | re.DOTALL)
+
+
+def substring_matcher(term: str):
+    """
+    Compiled pattern behaving like a cards_fts phrase: the term as a
+    literal substring, % and _ included, matched without case
+
+    Args:
+        term: str
+    """
+    return re.compile(".*" + re.escape(term) + ".*", re.IGNORECASE | re.DOTALL)
+
+
+def encode(values: list) -> tuple:
+    """
+    Dictionary encode a column
+
+    Returns:
+        (codes, distinct) - an int32 array of the position of each value
+        in the list of distinct values
+    """
+    distinct = {}
+    codes = [distinct.setdefault(value, len(distinct)) for value in values]
+    return np.array(codes, dtype=np.int32), list(distinct)
+
+
+class FilterEngine:
+    """
+    Vectorized multi_command_building over columns loaded from the catalog.
+    Results come back in id order, the same cards the SQL path finds.
+
+    The engine reads rows and text matches through the SearchResults it
+    was built from, use with_search for another thread's connection.
+
+    Args:
+        search: SearchResults - connection the catalog is loaded from
+    """
+
+    def __init__(self, search: SearchResults):
+        if not HAS_NUMPY:
+            raise ImportError("FilterEngine needs NumPy (pip install numpy)")
+        self.search = search
+        rows = search.cursor.execute(
+            "SELECT id, set_shortened, type, subtype, rarity, color, "
+            f"{', '.join(COST_COLUMNS)} FROM cards ORDER BY id"
+        ).fetchall()
+        ids, sets, types, subtypes, rarities, colors, *costs = (
+            zip(*rows) if rows else [()] * (6 + len(COST_COLUMNS))
+        )
+        self.columns = {
+            "id": np.array(ids, dtype=np.int64),
+            "rarity": np.array([value or 0 for value in rarities], dtype=np.uint8),
+            "color": np.array([value or 0 for value in colors], dtype=np.uint8),
+        }
+        for column, values in zip(COST_COLUMNS, costs):
+            self.columns[column] = np.array([value or 0 for value in values], dtype=np.int16)
+        # column: distinct values, indexed by the codes in self.columns
+        self.values = {}
+        for name, column in (("set_shortened", sets), ("type", types), ("subtype", subtypes)):
+            self.columns[name], self.values[name] = encode(column)
+
+    def with_search(self, search: SearchResults) -> "FilterEngine":
+        """
+        The same loaded columns reading through another SearchResults
+        """
+        engine = object.__new__(FilterEngine)
+        engine.search = search
+        engine.columns = self.columns
+        engine.values = self.values
+        return engine
+
+    def _codes(self, column: str, matches) -> "np.ndarray":
+        """
+        Codes of the distinct values of a column accepted by matches
+        """
+        return np.array(
+            [code for code, value in enumerate(self.values[column])
+             if value is not None and matches(value)],
+            dtype=np.int32,
+        )
+
+    def mask(self, **kwargs) -> "np.ndarray":
+        """
+        Boolean mask over the loaded cards matching the kwargs of
+        multi_command_building
+        """
+        columns = self.columns
+        mask = np.ones(len(columns["id"]), dtype=bool)
+
+        for kwarg, column in DICTIONARY_KWARGS.items():
+            term = kwargs.get(kwarg)
+            if term:
+                # as in SearchResults._build_filters, terms the full text
+                # index can match are literal, shorter ones go through LIKE
+                # pylint: disable-next=protected-access
+                literal = self.search._use_fts(term)
+                matcher = (substring_matcher if literal else like_matcher)(term)
+                mask &= np.isin(columns[column], self._codes(column, matcher.fullmatch))
+
+        rarity = kwargs.get("rarity")
+        if rarity and rarity.value != 0:
+            mask &= columns["rarity"] == rarity.value
+
+        color = kwargs.get("color")
+        if color:
+            if Color[color] == 0:  # colorless
+                mask &= columns["color"] == 0
+            else:
+                mask &= (columns["color"] & Color[color]) != 0
+
+        set_shortened = kwargs.get("set_shortened")
+        if set_shortened:
+            codes = set(self.search.set_index.resolve(set_shortened))
+            mask &= np.isin(
+                columns["set_shortened"], self._codes("set_shortened", codes.__contains__)
+            )
+
+        mask &= self._cost_mask(kwargs)
+
+        text = {kwarg: kwargs[kwarg] for kwarg in DB_KWARGS if kwargs.get(kwarg)}
+        if text:
+            mask &= np.isin(columns["id"], self._text_ids(text))
+        return mask
+
+    def _cost_mask(self, kwargs) -> "np.ndarray":
+        """
+        Boolean mask for the min_cmc, max_cmc and pips kwargs
+        """
+        columns = self.columns
+        mask = np.ones(len(columns["id"]), dtype=bool)
+        if kwargs.get("min_cmc") is not None:
+            mask &= columns["mana_value"] >= int(kwargs["min_cmc"])
+        if kwargs.get("max_cmc") is not None:
+            mask &= columns["mana_value"] <= int(kwargs["max_cmc"])
+        for color, minimum in (kwargs.get("pips") or {}).items():
+            mask &= columns[PIP_COLUMNS[color]] >= int(minimum)
+        return mask
+
+    def _text_ids(self, text: dict) -> "np.ndarray":
+        """
+        Ids of the cards matching the title/text/keywords kwargs, from the
+        database
+        """
+        # pylint: disable=protected-access
+        source, conditions, params = self.search._build_filters(text)
+        rows = self.search.cursor.execute(
+            f"SELECT cards.id FROM {source} WHERE {' AND '.join(conditions)}", params
+        ).fetchall()
+        return np.array([row[0] for row in rows], dtype=np.int64)
+
+    def filter_ids(self, **kwargs) -> "np.ndarray":
+        """
+        Ids of the cards matching the kwargs of multi_command_building, in order
+        """
+        return self.columns["id"][self.mask(**kwargs)]
+
+    def fetch(self, ids) -> list:
+        """
+        Cards for the ids, read from the database in id order
+
+        Args:
+            ids: Iterable[int]
+        """
+        rows = self.search.cursor.execute(
+            "SELECT * FROM cards WHERE id IN (SELECT value FROM json_each(?)) ORDER BY id",
+            (json.dumps([int(card_id) for card_id in ids]),),
+        ).fetchall()
+        return [DbCard(each) for each in rows]
+
+    def multi_command_building(self, **kwargs) -> list:
+        """
+        Cards matching the kwargs of SearchResults.multi_command_building
+        """
+        return self.fetch(self.filter_ids(**kwargs))
+
+    def page_after(self, last_id=None, limit=PAGE_SIZE, **kwargs) -> list:
+        """
+        One page of the cards matching the kwargs, see SearchResults.page_after
+        """
+        ids = self.filter_ids(**kwargs)
+        start = 0 if last_id is None else int(np.searchsorted(ids, last_id, side="right"))
+        return self.fetch(ids[start:start + limit])
+
+    def count_cards(self, **kwargs) -> int:
+        """
+        Number of cards matching the kwargs
+        """
+        return int(np.count_nonzero(self.mask(**kwargs)))
@@ -0,0 +1,280 @@
+"""
+image_cache.py
+
+Last Updated: 18 Oct 2026
+
+Local cache of the card images shown by the application. The downloaded
+files are kept on disk under a hash of their img_url, up to a byte
+budget with the least recently viewed evicted first, and the decoded
+images are kept in memory up to a smaller budget so a card looked at
+again opens instantly. Images of a result set can be prefetched in the
+background.
+"""
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.request import urlopen
+
+from PIL import Image
+
+script_dir = os.path.dirname(__file__)
+IMAGE_CACHE_DIR = os.path.abspath(os.path.join(script_dir, "image_cache"))
+DISK_BUDGET = 256 * 1024 * 1024  # bytes of image files kept on disk
+MEMORY_BUDGET = 64 * 1024 * 1024  # bytes of decoded pixels kept in memory
+PREFETCH_WORKERS = 4
+DOWNLOAD_TIMEOUT = 15  # seconds
+
+
+class ByteLRU:
+    """
+    Least recently used bookkeeping with a budget in bytes
+
+    Args:
+        budget (int): Total size the entries are kept under
+    """
+
+    def __init__(self, budget: int):
+        self.budget = budget
+        self.total = 0
+        self.entries = OrderedDict()  # key: (value, size), oldest first
+
+    def get(self, key):
+        """
+        Value of an entry, marking it as the most recently used
+
+        Returns:
+            the value or None if the key is not present
+        """
+        if not self.touch(key):
+            return None
+        return self.entries[key][0]
+
+    def touch(self, key) -> bool:
+        """
+        Mark an entry as the most recently used
+
+        Returns:
+            whether the key is present
+        """
+        if key not in self.entries:
+            return False
+        self.entries.move_to_end(key)
+        return True
+
+    def add(self, key, size: int, value=None) -> list:
+        """
+        Add or replace an entry as the most recently used
+
+        Args:
+            key: key of the entry
+            size (int): bytes counted against the budget
+            value: value kept with the entry
+
+        Returns:
+            keys evicted to get back under the budget, which can include
+            the new key if it is larger than the whole budget
+        """
+        self.pop(key)
+        self.entries[key] = (value, size)
+        self.total += size
+        evicted = []
+        while self.total > self.budget and self.entries:
+            old, (_, old_size) = self.entries.popitem(last=False)
+            self.total -= old_size
+            evicted.append(old)
+        return evicted
+
+    def pop(self, key):
+        """
+        Remove an entry if it is present
+        """
+        if key in self.entries:
+            self.total -= self.entries.pop(key)[1]
+
+
+class ImageCache:
+    """
+    Disk and memory cache of card images keyed by img_url
+
+    Args:
+        directory (str): Folder the image files are written to
+        disk_budget (int): Bytes of image files kept on disk
+        memory_budget (int): Bytes of decoded images kept in memory
+        workers (int): Threads used for prefetching
+    """
+
+    def __init__(
+        self,
+        directory: str = IMAGE_CACHE_DIR,
+        disk_budget: int = DISK_BUDGET,
+        memory_budget: int = MEMORY_BUDGET,
+        workers: int = PREFETCH_WORKERS,
+    ):
+        self.directory = directory
+        self._disk = ByteLRU(disk_budget)
+        self._memory = ByteLRU(memory_budget)
+        self._pending = {}  # url: Future of a download in progress
+        self._lock = threading.Lock()
+        # threads are only started once something is prefetched
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, workers), thread_name_prefix="image-prefetch"
+        )
+        self._prefetching = []
+        self._scan()
+
+    def _path(self, url: str) -> str:
+        """
+        Path of the cached file for the url
+
+        Args:
+            url (str): img_url of the card
+        """
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, key[:2], key)
+
+    def _scan(self):
+        """
+        Pick up the files left by earlier runs, oldest viewed first, and
+        trim them to the budget
+        """
+        found = []
+        for folder, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(folder, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                found.append((stat.st_mtime, path, stat.st_size))
+        for _, path, size in sorted(found):
+            self._remove(self._disk.add(path, size))
+
+    @staticmethod
+    def _remove(paths: list):
+        """
+        Delete evicted files
+        """
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def get_bytes(self, url: str) -> bytes:
+        """
+        Raw image file for the url, downloaded if it is not on disk
+
+        Args:
+            url (str): img_url of the card
+        """
+        path = self._path(url)
+        with self._lock:
+            on_disk = self._disk.touch(path)
+            pending = self._pending.get(url)
+            if not on_disk and pending is None:
+                pending = self._pending[url] = Future()
+                owner = True
+            else:
+                owner = False
+
+        if on_disk:
+            try:
+                with open(path, "rb") as image_file:
+                    data = image_file.read()
+                os.utime(path)  # the mtime keeps the LRU order across runs
+                return data
+            except OSError:
+                with self._lock:
+                    self._disk.pop(path)
+                return self.get_bytes(url)
+        if not owner:
+            return pending.result()
+
+        try:
+            data = self._download(url, path)
+        except BaseException as err:
+            with self._lock:
+                del self._pending[url]
+            pending.set_exception(err)
+            raise
+        with self._lock:
+            del self._pending[url]
+            evicted = self._disk.add(path, len(data))
+        self._remove(evicted)
+        pending.set_result(data)
+        return data
+
+    @staticmethod
+    def _download(url: str, path: str) -> bytes:
+        """
+        Download an image and write it to the cache
+        """
+        with urlopen(url, timeout=DOWNLOAD_TIMEOUT) as response:
+            data = response.read()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write then rename so a crash never leaves a half written image
+        with open(path + ".tmp", "wb") as image_file:
+            image_file.write(data)
+        os.replace(path + ".tmp", path)
+        return data
+
+    def get(self, url: str) -> Image.Image:
+        """
+        Decoded image for the url
+
+        Args:
+            url (str): img_url of the card
+        """
+        with self._lock:
+            image = self._memory.get(url)
+        if image is not None:
+            return image
+
+        image = Image.open(io.BytesIO(self.get_bytes(url)))
+        image.load()
+        size = image.width * image.height * len(image.getbands())
+        with self._lock:
+            self._memory.add(url, size, image)
+        return image
+
+    def prefetch(self, urls) -> list:
+        """
+        Download the images that are not cached yet in the background,
+        without decoding them
+
+        Args:
+            urls (Iterable[str]): img_urls to have ready
+
+        Returns:
+            list of Futures of the raw images
+        """
+        futures = [
+            self._executor.submit(self.get_bytes, url) for url in dict.fromkeys(urls) if url
+        ]
+        with self._lock:
+            self._prefetching = [
+                future for future in self._prefetching if not future.done()
+            ] + futures
+        return futures
+
+    def cancel_prefetch(self):
+        """
+        Drop the prefetches that have not started yet, e.g. when the
+        result set they were for is replaced
+        """
+        with self._lock:
+            prefetching, self._prefetching = self._prefetching, []
+        for future in prefetching:
+            future.cancel()
+
+    def close(self):
+        """
+        Stop the prefetching threads once the running downloads finish
+        """
+        self.cancel_prefetch()
+        self._executor.shutdown(wait=False)
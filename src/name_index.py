@@ -0,0 +1,237 @@
+"""
+name_index.py
+
+Last Updated: 18 Oct 2026
+
+In-memory index of the distinct card titles for typo tolerant lookups
+and suggestions as the user types. Titles are normalized (lower case,
+punctuation dropped) and indexed three ways:
+
+- a sorted list, where the titles starting with the text are found by
+  bisection
+- the same list reversed, where the titles ending with a text are found
+  by bisection, for the titles one typo from a text (see
+  NameIndex.closest)
+- trigram postings, where the titles sharing the most trigrams with the
+  text are found and ranked by their trigram similarity, so "lightening
+  bolt" still finds "Lightning Bolt"
+
+Building the index reads every title once, lookups never touch the
+database.
+"""
+import re
+import sqlite3
+from bisect import bisect_left
+from collections import Counter
+from heapq import nlargest
+from operator import itemgetter
+
+SUGGESTIONS = 8
+MIN_SIMILARITY = 0.3  # lowest trigram similarity of a fuzzy match
+CANDIDATES = 50  # titles with the most shared trigrams that are ranked
+MIN_CORRECTED = 6  # shortest normalized text NameIndex.closest corrects
+
+_SEPARATORS = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_title(title: str) -> str:
+    """
+    Form of a title that is indexed and matched against: lower case,
+    apostrophes dropped and other punctuation as spaces
+
+    Args:
+        title (str): e.g. "Urza's Saga"
+    """
+    return _SEPARATORS.sub(" ", title.lower().replace("'", "")).strip()
+
+
+def trigrams(text: str) -> set:
+    """
+    Trigrams of normalized text, padded so the start of the text counts
+    for more than the middle
+    """
+    padded = f"  {text} "
+    return {padded[idx:idx + 3] for idx in range(len(padded) - 2)}
+
+
+class NameIndex:
+    """
+    Prefix and fuzzy lookups over a fixed list of titles
+
+    Args:
+        titles (Iterable[str]): titles to index, duplicates are ignored
+    """
+
+    def __init__(self, titles):
+        names = {}
+        for title in titles:
+            if title:
+                names.setdefault(normalize_title(title), title)
+        # (normalized, title) in order, for bisection
+        self.names = sorted(names.items())
+        # normalized: position in names
+        self.positions = {name: position for position, (name, _) in enumerate(self.names)}
+        # normalized titles in order, forwards and reversed, for closest
+        self.forwards = [name for name, _ in self.names]
+        self.backwards = sorted(name[::-1] for name in self.forwards)
+        self.reversed = frozenset(self.backwards)
+        self.sizes = []
+        self.postings = {}
+        for position, (name, _) in enumerate(self.names):
+            grams = trigrams(name)
+            self.sizes.append(len(grams))
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(position)
+
+    @classmethod
+    def load(cls, cursor: sqlite3.Cursor) -> "NameIndex":
+        """
+        Index of the titles of the cards in the database of the cursor
+        """
+        return cls(title for (title,) in cursor.execute("SELECT DISTINCT title FROM cards"))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def prefix(self, text: str, limit: int = SUGGESTIONS) -> list:
+        """
+        Titles starting with the text, in alphabetical order
+
+        Args:
+            text (str): start of a title, in any case
+            limit (int): most titles returned
+        """
+        text = normalize_title(text)
+        found = []
+        if not text:
+            return found
+        start = bisect_left(self.names, (text, ""))
+        for name, title in self.names[start:start + limit]:
+            if not name.startswith(text):
+                break
+            found.append(title)
+        return found
+
+    def fuzzy(self, text: str, limit: int = SUGGESTIONS) -> list:
+        """
+        Titles most like the text, best first
+
+        Args:
+            text (str): a title, possibly misspelled
+            limit (int): most titles returned
+
+        Returns:
+            list of (similarity, title), the similarity from 0 to 1
+        """
+        name = normalize_title(text)
+        if not name:
+            return []
+        grams = trigrams(name)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.postings.get(gram, ()))
+        scored = []
+        for position, count in nlargest(CANDIDATES, shared.items(), key=itemgetter(1)):
+            # Dice coefficient of the two sets of trigrams
+            similarity = 2 * count / (len(grams) + self.sizes[position])
+            if similarity >= MIN_SIMILARITY:
+                scored.append((similarity, self.names[position][1]))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return scored[:limit]
+
+    def closest(self, texts) -> dict:
+        """
+        Title one typo (a letter replaced, dropped or added, or two next
+        to each other swapped) from each of several texts, for resolving
+        many misspelled titles at once. Texts further off, or shorter than
+        MIN_CORRECTED, have no closest title: a wrong card is worse than a
+        line reported as unresolved.
+
+        Args:
+            texts (Iterable[str]): titles, possibly misspelled
+
+        Returns:
+            dict of text to (similarity, title), the most similar title one
+            typo from the text, for the texts with one
+        """
+        found = {}
+        for text in set(texts):
+            name = normalize_title(text)
+            if len(name) < MIN_CORRECTED:
+                continue
+            grams = trigrams(name)
+            scored = []
+            half = len(name) // 2
+            # a typo in the second half, or swapping the middle two letters,
+            # leaves the start of the name before it; any other the end
+            candidates = self._one_typo(name, self.forwards, self.positions, half - 1)
+            candidates.update(
+                backwards[::-1] for backwards in self._one_typo(
+                    name[::-1], self.backwards, self.reversed, len(name) - half - 1
+                )
+            )
+            for candidate in map(self.positions.get, candidates):
+                shared = len(grams & trigrams(self.names[candidate][0]))
+                scored.append((
+                    2 * shared / (len(grams) + self.sizes[candidate]), self.names[candidate][1]
+                ))
+            if scored:
+                found[text] = min(scored, key=lambda item: (-item[0], item[1]))
+        return found
+
+    @staticmethod
+    def _one_typo(text: str, names: list, known, start: int):
+        """
+        Titles one typo from a normalized text that start with at least
+        its first `start` letters, found by walking down the sorted names
+        from the longest start to the shortest: for each start, the titles
+        after it are bisected for the letters that can follow it
+
+        Args:
+            text (str): normalized text, reversed to search reversed names
+            names (list): sorted normalized titles, in the same direction
+            known (Container): the same titles, for finding them exactly
+            start (int): fewest letters of the text the titles start with
+
+        Returns:
+            set of the normalized titles found, in the same direction
+        """
+        found = set()
+        idx = 0
+        for typo in range(max(0, start), len(text) + 1):
+            head, rest = text[:typo], text[typo + 1:]
+            # titles starting with head follow those starting with less of it
+            idx = bisect_left(names, head, idx)
+            if idx == len(names) or not names[idx].startswith(head):
+                break  # no title starts with head, nor with any longer start
+            # dropped, swapped, then replaced or added after each letter
+            # that follows head in a title
+            tries = [head + rest, head + rest[:1] + text[typo:typo + 1] + rest[1:]]
+            after = idx
+            while after < len(names) and names[after].startswith(head):
+                following = names[after][typo:typo + 1]
+                if not following:
+                    after += 1
+                    continue
+                tries += [head + following + rest, head + following + text[typo:]]
+                after = bisect_left(names, head + chr(ord(following) + 1), after)
+            found.update(candidate for candidate in tries if candidate in known)
+        return found
+
+    def suggest(self, text: str, limit: int = SUGGESTIONS) -> list:
+        """
+        Titles to suggest for what has been typed so far: those starting
+        with it, then the closest fuzzy matches
+
+        Args:
+            text (str): the text typed
+            limit (int): most titles returned
+        """
+        found = self.prefix(text, limit)
+        if len(found) < limit:
+            seen = set(found)
+            found += [
+                title for _, title in self.fuzzy(text, limit)
+                if title not in seen
+            ][:limit - len(found)]
+        return found
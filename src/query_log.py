@@ -0,0 +1,224 @@
+"""
+query_log.py
+
+Last Updated: 18 Oct 2026
+
+Instrumentation of the queries run by SearchResults. A QueryLog given
+to SearchResults (or to the ConnectionManager of the application) keeps
+in memory, per statement and per search method:
+
+- how many times it ran and the rows it fetched
+- a histogram of the milliseconds it took, with the time spent building
+  DbCards from the rows counted separately
+
+Statements slower than a threshold are appended to a slow-query log,
+one JSON object per line, with their EXPLAIN QUERY PLAN when asked for.
+Without a QueryLog nothing is timed. The application turns it on with
+the MTG_QUERY_LOG environment variable, set to the threshold in ms:
+
+    MTG_QUERY_LOG=50 python -m src.application
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+
+script_dir = os.path.dirname(__file__)
+SLOW_LOG = os.path.abspath(os.path.join(script_dir, "slow_queries.log"))
+SLOW_MS = 100.0
+ENVIRONMENT = "MTG_QUERY_LOG"
+# upper bounds in ms of the histogram buckets, 0.05 ms doubling to ~27 min
+BUCKETS = tuple(0.05 * 2 ** power for power in range(26))
+
+
+class Histogram:
+    """
+    Counts of durations in buckets doubling in width, so percentiles are
+    known to within a factor of two in a fixed amount of memory
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.largest = 0.0
+
+    def add(self, milliseconds: float):
+        """
+        Count a duration
+        """
+        self.counts[bisect_left(BUCKETS, milliseconds)] += 1
+        self.count += 1
+        self.total += milliseconds
+        self.largest = max(self.largest, milliseconds)
+
+    def percentile(self, fraction: float) -> float:
+        """
+        Upper bound of the bucket holding the duration below which the
+        fraction of the durations fall, at most the largest duration
+        """
+        rank = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return min(BUCKETS[bucket], self.largest) if bucket < len(BUCKETS) else self.largest
+        return 0.0
+
+    def summary(self) -> dict:
+        """
+        Count, mean, p50/p90/p99 and largest duration in ms
+        """
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(0.5),
+            "p90_ms": self.percentile(0.9),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": self.largest,
+        }
+
+
+class QueryLog:
+    """
+    Timings of the queries run through one or more SearchResults
+
+    Args:
+        slow_ms (float): Statements taking at least this long are logged
+        path (str): File the slow statements are appended to, None to
+            only keep them in memory (see slow)
+        explain (bool): Add the EXPLAIN QUERY PLAN to the slow statements
+        keep (int): Slow statements kept in memory
+    """
+
+    def __init__(self, slow_ms: float = SLOW_MS, path: str = SLOW_LOG, explain: bool = True,
+                 keep: int = 100):
+        self.slow_ms = slow_ms
+        self.path = path
+        self.explain = explain
+        self.slow = deque(maxlen=keep)  # latest slow statements, oldest first
+        # table: {name: {"time": Histogram, "rows": int}}
+        self.tables = {"statements": {}, "methods": {}}
+        self.cards = Histogram()  # ms building DbCards, per search
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_environment(cls, variable: str = ENVIRONMENT):
+        """
+        QueryLog with the threshold set in the environment variable,
+        None when it is not set
+        """
+        value = os.environ.get(variable)
+        if not value:
+            return None
+        return cls(slow_ms=float(value))
+
+    def _entry(self, table: str, name: str) -> dict:
+        """
+        Entry of a statement or method, created on first use
+        """
+        table = self.tables[table]
+        entry = table.get(name)
+        if entry is None:
+            entry = table[name] = {"time": Histogram(), "rows": 0}
+        return entry
+
+    def record_query(  # pylint: disable=too-many-arguments
+        self, query: str, params, seconds: float, rows: int, explain=None
+    ):
+        """
+        Record a statement run by SearchResults
+
+        Args:
+            query (str): the parameterized SQL
+            params: its parameters
+            seconds (float): time to run it and fetch the rows
+            rows (int): rows fetched
+            explain (Callable[[], List[str]]): gets the query plan, only
+                called for a slow statement
+        """
+        milliseconds = seconds * 1000
+        with self._lock:
+            entry = self._entry("statements", query)
+            entry["time"].add(milliseconds)
+            entry["rows"] += rows
+        if milliseconds < self.slow_ms:
+            return
+        slow = {
+            "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "ms": round(milliseconds, 3),
+            "rows": rows,
+            "query": query,
+            "params": [str(param) for param in params],
+        }
+        if self.explain and explain is not None:
+            slow["plan"] = explain()
+        with self._lock:
+            self.slow.append(slow)
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as log_file:
+                    log_file.write(json.dumps(slow) + "\n")
+
+    def record_cards(self, seconds: float):
+        """
+        Record the time taken building the DbCards of one result
+        """
+        with self._lock:
+            self.cards.add(seconds * 1000)
+
+    def record_method(self, method: str, seconds: float, rows: int, cached: bool):
+        """
+        Record a call of a SearchResults method, from the call to the return
+
+        Args:
+            method (str): name of the method
+            seconds (float): time taken
+            rows (int): cards returned
+            cached (bool): whether it was answered from the QueryCache
+        """
+        with self._lock:
+            entry = self._entry("methods", method + (" (cached)" if cached else ""))
+            entry["time"].add(seconds * 1000)
+            entry["rows"] += rows
+
+    def report(self) -> dict:
+        """
+        Summary of everything recorded
+
+        Returns:
+            dict with "methods" and "statements", name to the histogram
+            summary and rows, and "cards" the DbCard building summary
+        """
+        with self._lock:
+            report = {
+                table_name: {
+                    name: dict(entry["time"].summary(), rows=entry["rows"])
+                    for name, entry in table.items()
+                }
+                for table_name, table in self.tables.items()
+            }
+            report["cards"] = self.cards.summary()
+        return report
+
+    def format(self) -> str:
+        """
+        Table of the methods and the statements recorded, slowest p99 first
+        """
+        report = self.report()
+        lines = [f"{'calls':>7}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}{'rows':>9}  name"]
+        for table in ("methods", "statements"):
+            lines.extend(
+                f"{entry['count']:>7}{entry['p50_ms']:>9.2f}{entry['p99_ms']:>9.2f}"
+                f"{entry['max_ms']:>9.2f}{entry['rows']:>9}  {' '.join(name.split())[:120]}"
+                for name, entry in sorted(
+                    report[table].items(), key=lambda item: -item[1]["p99_ms"]
+                )
+            )
+        cards = report["cards"]
+        lines.append(
+            f"{cards['count']:>7}{cards['p50_ms']:>9.2f}{cards['p99_ms']:>9.2f}"
+            f"{cards['max_ms']:>9.2f}{'':>9}  building DbCards"
+        )
+        return "\n".join(lines)
@@ -0,0 +1,450 @@
+"""
+snapshot.py
+
+Last Updated: 18 Oct 2026
+
+Read-only snapshot of the catalog in a columnar binary file, for readers
+that never write (kiosks, bulk loads) and should not pay for SQLite, row
+tuples and JSON decoding up front. The file holds the cards and sets
+tables column by column:
+
+- integer columns as fixed-width arrays
+- text columns as a heap of UTF-8 bytes and an array of the offset of each
+  value in it, ending with the size of the heap
+- a bit mask per row of the columns that are NULL
+
+    magic (8 bytes) | version (u32) | header length (u32) | JSON header | arrays
+
+The header records the struct format of each column, the offset and size
+of its arrays from the first aligned byte after the header, and the row
+counts. Every array is 8 byte aligned, so opening a snapshot maps the
+file and casts memoryviews over it without copying or reading the
+columns. Pages are read by the OS as they are touched and shared by every
+process mapping the same file.
+
+    python -m src.snapshot src/card_db.db src/card_db.snapshot
+
+    with Snapshot.open("src/card_db.snapshot") as snapshot:
+        card = snapshot.card_by_id(1)  # a DbCard
+"""
+import json
+import mmap
+import os
+import pathlib
+import sqlite3
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from functools import partial
+
+from .database_search import DB_FILE, DbCard
+from .update_db.schema import COST_COLUMNS, read_generation
+
+MAGIC = b"MTGSNAP\x00"
+VERSION = 1
+PREAMBLE = struct.Struct("<8sII")  # magic, version, header length
+ALIGNMENT = 8
+BATCH_SIZE = 4096  # rows read at a time by Snapshot.iter_cards
+SNAPSHOT_FILE = os.path.splitext(DB_FILE)[0] + ".snapshot"
+
+TEXT = "s"  # format of the text columns, stored as offsets and a heap
+OFFSET_FORMAT = "Q"
+NULLS_FORMAT = "I"  # bit mask of the NULL columns of a row, up to 32 columns
+# table: (column, format) in the order of the table, which is the order of
+# the rows DbCard reads (see DbOrder)
+TABLES = {
+    "cards": (
+        ("id", "q"),
+        ("set_shortened", TEXT),
+        ("title", TEXT),
+        ("img_url", TEXT),
+        ("type", TEXT),
+        ("subtype", TEXT),
+        ("quote", TEXT),
+        ("rarity", "h"),
+        ("color", "h"),
+        ("mana_cost", TEXT),
+        ("abilities", TEXT),
+        *((column, "h") for column in COST_COLUMNS),
+        ("keywords", TEXT),
+    ),
+    "sets": (
+        ("shortened", TEXT),
+        ("title", TEXT),
+        ("release_date", TEXT),
+        ("url", TEXT),
+    ),
+}
+ORDER_BY = {"cards": "id", "sets": "shortened"}
+
+
+class SnapshotError(Exception):
+    """
+    The file is not a snapshot this version can read
+    """
+
+
+def _pad(out_file):
+    """
+    Pad the file to ALIGNMENT
+    """
+    out_file.write(b"\x00" * (-out_file.tell() % ALIGNMENT))
+
+
+def _columns(rows: list, columns: tuple) -> tuple:
+    """
+    Arrays of the values of each column of the rows
+
+    Returns:
+        (arrays, nulls) - column to its array, or to (offsets, heap) for
+        text columns, and the array of NULL masks of the rows
+    """
+    nulls = array(NULLS_FORMAT, [0]) * len(rows)
+    arrays = {}
+    for position, (column, column_format) in enumerate(columns):
+        bit = 1 << position
+        values = [row[position] for row in rows]
+        for row, value in enumerate(values):
+            if value is None:
+                nulls[row] |= bit
+        if column_format == TEXT:
+            encoded = [value.encode("utf-8") if value else b"" for value in values]
+            offsets, end = array(OFFSET_FORMAT, [0]), 0
+            for value in encoded:
+                end += len(value)
+                offsets.append(end)
+            arrays[column] = (offsets, b"".join(encoded))
+        else:
+            arrays[column] = array(column_format, [value or 0 for value in values])
+    return arrays, nulls
+
+
+def _describe(rows: list, columns: tuple, sections: list) -> dict:
+    """
+    Header entry of a table, adding the arrays of its columns to the
+    sections written
+
+    Args:
+        rows (list): rows of the table, in the order of the columns
+        columns (tuple): (column, format) of TABLES
+        sections (list): (header entry, key, array or bytes) in the order
+            written, the [offset, size] of each is set into its entry at
+            the key once the sections are placed
+    """
+    arrays, nulls = _columns(rows, columns)
+    described = {}
+    for column, column_format in columns:
+        if column_format == TEXT:
+            offsets, heap = arrays[column]
+            described[column] = {"format": TEXT, "offsets": None, "heap": None}
+            sections.append((described[column], "offsets", offsets))
+            sections.append((described[column], "heap", heap))
+        else:
+            described[column] = {"format": column_format, "data": None}
+            sections.append((described[column], "data", arrays[column]))
+    table = {"rows": len(rows), "columns": described, "nulls": None}
+    sections.append((table, "nulls", nulls))
+    return table
+
+
+def _write(path: str, header: dict, sections: list):
+    """
+    Place the sections after the header and write the file, next to the
+    path first and moved over it once complete
+    """
+    # sections are placed after the header, from the first aligned byte
+    start = 0
+    for entry, key, data in sections:
+        size = len(data) * getattr(data, "itemsize", 1)
+        entry[key] = [start, size]
+        start += size + -size % ALIGNMENT
+    encoded = json.dumps(header).encode("utf-8")
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as out_file:
+            out_file.write(PREAMBLE.pack(MAGIC, VERSION, len(encoded)))
+            out_file.write(encoded)
+            for _, _, data in sections:
+                _pad(out_file)
+                out_file.write(data)
+            _pad(out_file)
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def export_snapshot(cursor: sqlite3.Cursor, path: str = SNAPSHOT_FILE):
+    """
+    Write the cards and sets of a database to a snapshot file. The file
+    is written next to the path and moved over it once complete, so
+    readers mapping the old one keep it.
+
+    Args:
+        cursor (sqlite3.Connection.Cursor): Cursor on the database
+        path (str): snapshot file to write
+    """
+    header = {
+        "byteorder": sys.byteorder,
+        "generation": read_generation(cursor),
+        "tables": {},
+    }
+    sections = []
+    for table, columns in TABLES.items():
+        rows = cursor.execute(
+            f"SELECT {', '.join(column for column, _ in columns)} FROM {table} "
+            f"ORDER BY {ORDER_BY[table]}"
+        ).fetchall()
+        header["tables"][table] = _describe(rows, columns, sections)
+    _write(path, header, sections)
+
+
+def _text(offsets: memoryview, heap: memoryview, position: int) -> str:
+    """
+    Text at position of a text column
+    """
+    return str(heap[offsets[position]:offsets[position + 1]], "utf-8")
+
+
+class SnapshotRow:
+    """
+    Row of the cards of a Snapshot, read from its columns as indexed like
+    the rows of the cards table, so it can back a DbCard
+    """
+
+    __slots__ = ("table", "position")
+
+    def __init__(self, table: "SnapshotTable", position: int):
+        self.table = table
+        self.position = position
+
+    def __len__(self) -> int:
+        return len(self.table.columns)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(self[idx] for idx in range(*index.indices(len(self))))
+        return self.table.value(index % len(self) if index < 0 else index, self.position)
+
+
+class SnapshotTable:
+    """
+    Columns of one table of a Snapshot, as memoryviews over the file
+
+    Args:
+        view (callable): memoryview of the [offset, size] of an array
+            cast to a format
+        described (dict): header entry of the table
+        columns (tuple): (column, format) of TABLES
+    """
+
+    def __init__(self, view, described: dict, columns: tuple):
+        self.rows = described["rows"]
+        self.columns = columns
+        self.names = [column for column, _ in columns]
+        self.nulls = view(described["nulls"], NULLS_FORMAT)
+        # column position to its array, or (offsets, heap) for text
+        self.arrays = []
+        # column position to the function reading its value at a position
+        self.readers = []
+        for column, column_format in columns:
+            entry = described["columns"][column]
+            if entry["format"] != column_format:
+                raise SnapshotError(f"column {column} stored as {entry['format']}")
+            if column_format == TEXT:
+                offsets, heap = view(entry["offsets"], OFFSET_FORMAT), view(entry["heap"], "B")
+                self.arrays.append((offsets, heap))
+                self.readers.append(partial(_text, offsets, heap))
+            else:
+                self.arrays.append(view(entry["data"], column_format))
+                self.readers.append(self.arrays[-1].__getitem__)
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def column(self, name: str) -> memoryview:
+        """
+        Fixed-width array of an integer column, NULL read as 0, for reading
+        a column as a whole (e.g. numpy.frombuffer(snapshot.cards.column("color"), "h"))
+        """
+        found = self.arrays[self.names.index(name)]
+        if isinstance(found, tuple):
+            raise TypeError(f"{name} is a text column")
+        return found
+
+    def value(self, index: int, position: int):
+        """
+        Value of the column at index of the row at position, None for NULL
+        """
+        if self.nulls[position] >> index & 1:
+            return None
+        return self.readers[index](position)
+
+    def row(self, position: int) -> tuple:
+        """
+        Values of the row at position, in the order of the table
+        """
+        if not 0 <= position < self.rows:
+            raise IndexError(position)
+        return tuple(self.value(index, position) for index in range(len(self.columns)))
+
+    def rows_between(self, start: int, stop: int) -> list:
+        """
+        Values of the rows from start to stop, read column by column, for
+        reading many rows faster than one row at a time
+        """
+        start, stop, _ = slice(start, stop).indices(self.rows)
+        if start >= stop:
+            return []
+        values = []
+        for found in self.arrays:
+            if isinstance(found, tuple):
+                offsets, heap = found
+                ends = offsets[start:stop + 1].tolist()
+                text = bytes(heap[ends[0]:ends[-1]])
+                first = ends[0]
+                values.append([
+                    text[begin - first:end - first].decode("utf-8")
+                    for begin, end in zip(ends, ends[1:])
+                ])
+            else:
+                values.append(found[start:stop].tolist())
+        rows = list(zip(*values))
+        for position, mask in enumerate(self.nulls[start:stop].tolist()):
+            if mask:
+                rows[position] = tuple(
+                    None if mask >> index & 1 else value
+                    for index, value in enumerate(rows[position])
+                )
+        return rows
+
+
+class Snapshot:
+    """
+    Catalog snapshot written by export_snapshot, mapped read-only
+
+    Args:
+        path (str): snapshot file
+    """
+
+    def __init__(self, path: str = SNAPSHOT_FILE):
+        self.path = path
+        with open(path, "rb") as in_file:
+            self._map = mmap.mmap(in_file.fileno(), 0, access=mmap.ACCESS_READ)
+        # every view over the map, released before it is closed
+        self._views = [memoryview(self._map)]
+        try:
+            self._read_header()
+        except (struct.error, KeyError, TypeError, ValueError) as err:
+            self.close()
+            raise SnapshotError(f"{path} is not a readable snapshot: {err}") from err
+        except SnapshotError:
+            self.close()
+            raise
+
+    def _read_header(self):
+        """
+        Check the preamble and map the tables described by the header
+        """
+        buffer = self._views[0]
+        magic, version, length = PREAMBLE.unpack_from(buffer)
+        if magic != MAGIC:
+            raise SnapshotError(f"{self.path} is not a catalog snapshot")
+        if version != VERSION:
+            raise SnapshotError(f"{self.path} is version {version}, expected {VERSION}")
+        header = json.loads(bytes(buffer[PREAMBLE.size:PREAMBLE.size + length]))
+        if header["byteorder"] != sys.byteorder:
+            raise SnapshotError(f"{self.path} was written {header['byteorder']} endian")
+        data = PREAMBLE.size + length
+        data += -data % ALIGNMENT
+
+        def view(location: list, array_format: str) -> memoryview:
+            offset, size = location
+            if data + offset + size > len(buffer):
+                raise SnapshotError(f"{self.path} is truncated")
+            found = buffer[data + offset:data + offset + size].cast(array_format)
+            self._views.append(found)
+            return found
+
+        self.generation = header["generation"]
+        self.cards = SnapshotTable(view, header["tables"]["cards"], TABLES["cards"])
+        self.sets = SnapshotTable(view, header["tables"]["sets"], TABLES["sets"])
+
+    @classmethod
+    def open(cls, path: str = SNAPSHOT_FILE) -> "Snapshot":
+        """
+        Map a snapshot file
+        """
+        return cls(path)
+
+    def close(self):
+        """
+        Unmap the file, the cards read from it can no longer be used
+        """
+        self.cards = self.sets = None
+        for view in reversed(self._views):
+            view.release()
+        self._views.clear()
+        self._map.close()
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.cards)
+
+    def card(self, position: int) -> DbCard:
+        """
+        DbCard of the card at position, cards being in order of id
+        """
+        if not 0 <= position < len(self.cards):
+            raise IndexError(position)
+        return DbCard(SnapshotRow(self.cards, position))
+
+    def card_by_id(self, card_id: int):
+        """
+        DbCard of the card with the id, None if there is none
+        """
+        ids = self.cards.arrays[0]  # DbOrder.ID
+        position = bisect_left(ids, card_id)
+        if position < len(ids) and ids[position] == card_id:
+            return self.card(position)
+        return None
+
+    def iter_cards(self):
+        """
+        Generator of the DbCard of every card, in order of id, built from
+        rows read BATCH_SIZE at a time
+        """
+        for start in range(0, len(self.cards), BATCH_SIZE):
+            for row in self.cards.rows_between(start, start + BATCH_SIZE):
+                yield DbCard(row)
+
+    def get_sets(self) -> list:
+        """
+        (shortened, title, release_date, url) of every set, in order of
+        the shortened name
+        """
+        return [self.sets.row(position) for position in range(len(self.sets))]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(
+        description="Export the cards and sets of a card database to a snapshot file"
+    )
+    arg_parser.add_argument("db", nargs="?", default=DB_FILE, help="database file to export")
+    arg_parser.add_argument("out", nargs="?", default=SNAPSHOT_FILE, help="snapshot file to write")
+    args = arg_parser.parse_args()
+    uri = pathlib.Path(args.db).resolve().as_uri() + "?mode=ro"
+    connection = sqlite3.connect(uri, uri=True)
+    export_snapshot(connection.cursor(), args.out)
+    connection.close()
+    with Snapshot.open(args.out) as exported:
+        print(f"{len(exported)} cards, {len(exported.sets)} sets written to {args.out}")
@@ -0,0 +1,125 @@
+"""
+cache.py
+
+Last Updated: 18 Oct 2026
+
+On-disk cache of the raw pages pulled for the catalog. Each page is kept
+under a hash of its url along with the validators (ETag/Last-Modified)
+needed to ask the site whether it has changed.
+"""
+import hashlib
+import json
+import os
+import time
+
+script_dir = os.path.dirname(__file__)
+CACHE_DIR = os.path.abspath(os.path.join(script_dir, "page_cache"))
+
+
+class PageCache:
+    """
+    Content cache keyed by url
+
+    Args:
+        directory (str): Folder the cached pages are written to
+    """
+
+    def __init__(self, directory: str = CACHE_DIR):
+        self.directory = directory
+
+    def _path(self, url: str) -> str:
+        """
+        Path of the cached page for the url, without an extension
+
+        Args:
+            url (str): url of the page
+        """
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, key[:2], key)
+
+    def load(self, url: str):
+        """
+        Load a page from the cache
+
+        Args:
+            url (str): url of the page
+
+        Returns:
+            (content, meta): Tuple(bytes, dict) or None if it is not cached
+        """
+        path = self._path(url)
+        try:
+            with open(path + ".json", "r", encoding="utf-8") as meta_file:
+                meta = json.load(meta_file)
+            with open(path + ".html", "rb") as body_file:
+                content = body_file.read()
+        except (OSError, ValueError):
+            return None
+        return content, meta
+
+    def store(self, url: str, content: bytes, headers=None):
+        """
+        Save a page to the cache, replacing any older copy
+
+        Args:
+            url (str): url of the page
+            content (bytes): body of the response
+            headers (Mapping): headers of the response
+        """
+        headers = headers or {}
+        meta = {
+            "url": url,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+        }
+        path = self._path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write then rename so a crash never leaves a half written page
+        with open(path + ".html.tmp", "wb") as body_file:
+            body_file.write(content)
+        os.replace(path + ".html.tmp", path + ".html")
+        self._write_meta(path, meta)
+
+    @staticmethod
+    def _write_meta(path: str, meta: dict):
+        """
+        Save the details of a cached page next to it
+
+        Args:
+            path (str): path of the cached page, without an extension
+            meta (dict): url and validators of the page
+        """
+        with open(path + ".json.tmp", "w", encoding="utf-8") as meta_file:
+            json.dump(meta, meta_file)
+        os.replace(path + ".json.tmp", path + ".json")
+
+    def touch(self, url: str):
+        """
+        Mark a cached page as confirmed up to date
+
+        Args:
+            url (str): url of the page
+        """
+        path = self._path(url)
+        try:
+            with open(path + ".json", "r", encoding="utf-8") as meta_file:
+                meta = json.load(meta_file)
+        except (OSError, ValueError):
+            return
+        meta["fetched_at"] = time.time()
+        self._write_meta(path, meta)
+
+    def urls(self):
+        """
+        Get the urls of every page in the cache
+        """
+        for folder, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                try:
+                    with open(os.path.join(folder, name), "r", encoding="utf-8") as meta_file:
+                        yield json.load(meta_file)["url"]
+                except (OSError, ValueError, KeyError):
+                    continue
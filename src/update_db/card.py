@@ -4,13 +4,15 @@ card.py
 Details of the MTG cards for the catalog (database) for more lookup viability
 
 Written by: James Lambert
-Last Updated: 18 Aug 2025
+Last Updated: 18 Oct 2026
 """
 import requests
-from bs4 import BeautifulSoup
+from bs4 import Tag
 
 from src.update_db.enums import Rarity, Color
+from src.update_db.schema import PIP_COLUMNS
 from src.update_db.sets import MTGSet
+from src.update_db.parsing import make_soup, CARD_INFO, DEFAULT_PARSER
 
 MAX_COLORLESS = 20  # Estimate
 
@@ -33,6 +35,39 @@ for x in range(MAX_COLORLESS):
     color_dict[f"ms-{x}"] = "COLORLESS"
 
 
+def mana_value(mana_cost: dict) -> int:
+    """
+    Total mana value of a cost as stored by Card.get_mana_cost, where the
+    COLORLESS entry is one more than the generic cost printed on the card
+    and VARIABLE (X) counts as 0
+
+    Args:
+        mana_cost (dict): color name to count
+    """
+    total = 0
+    for name, count in mana_cost.items():
+        if name == "COLORLESS":
+            total += count - 1
+        elif name != "VARIABLE":
+            total += count
+    return total
+
+
+# colors with a pip count column in the cards table, see schema.PIP_COLUMNS
+PIP_COLORS = tuple(PIP_COLUMNS)
+
+
+def cost_values(mana_cost: dict) -> tuple:
+    """
+    Values of the cost columns of a card: the mana value followed by the
+    number of pips of each of PIP_COLORS
+
+    Args:
+        mana_cost (dict): color name to count, as stored by Card.get_mana_cost
+    """
+    return (mana_value(mana_cost),) + tuple(mana_cost.get(color, 0) for color in PIP_COLORS)
+
+
 class Card:
     """
     Card details for updating the Database.
@@ -40,12 +75,19 @@ class Card:
     Args:
         title (str): Name of the card
         card_set (MTGSet): Set the card is a part of
-        page (requests.Response): The request.get() response containing
-            the page details
+        page (requests.Response): The request.get() response (or
+            fetch.Page) containing the page details
+        parser (str): Name of the parsing.BACKENDS entry used for the page
     """
-    def __init__(self, title: str, card_set: MTGSet, page: requests.Response):
+    def __init__(
+        self,
+        title: str,
+        card_set: MTGSet,
+        page: requests.Response,
+        parser: str = DEFAULT_PARSER,
+    ):
         self.title = title
-        self.soup = BeautifulSoup(page.content, "html.parser")
+        self.soup = make_soup(page.content, parser, CARD_INFO)
         temp = self.soup.find("div", id="cardInfo")
         if not temp:
             raise Warning
@@ -55,14 +97,14 @@ class Card:
         self.get_details(card_details)
 
 
-    def get_details(self, card_details: BeautifulSoup._AtMostOneElement):
+    def get_details(self, card_details: Tag):
         """
         Get the details of this card, including quote, rarity, color, mana
             cost, and abilities. This is not returned, it is updated in 
             self.details
 
         Args:
-            card_details (BeautifulSoup._AtMostOneElement): 
+            card_details (Tag): 
                 Result from BeautifulSoup.find() containing card information
         
         """
@@ -97,12 +139,12 @@ class Card:
             rarity = Rarity.UNKNOWN
         self.details = (quote, rarity, color, mana_cost, abilities)
 
-    def get_mana_cost(self, card_details: BeautifulSoup._AtMostOneElement):
+    def get_mana_cost(self, card_details: Tag):
         """
         Get the mana cost of this card
 
         Args:
-            card_details (BeautifulSoup._AtMostOneElement): 
+            card_details (Tag): 
                 Result from BeautifulSoup.find() containing the card information
         
         Returns:
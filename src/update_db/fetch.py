@@ -0,0 +1,231 @@
+"""
+fetch.py
+
+Last Updated: 18 Oct 2026
+
+Concurrent page fetching for the lookup of the MTG cards and sets.
+Requests are spread over a thread pool with a cap on how many can be
+in flight against a single host at once, either fixed or adapted to how
+the site responds (see scheduler.py). Throttled and failed requests are
+retried with backoff. When given a PageCache, pages are revalidated with
+conditional requests instead of downloaded again, or served straight
+from disk in offline mode.
+"""
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Mapping, NamedTuple, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.update_db.cache import PageCache
+from src.update_db.scheduler import AdaptiveScheduler, RETRY_STATUS
+
+DEFAULT_TIMEOUT = 15
+DEFAULT_WORKERS = 8
+DEFAULT_PER_HOST = 4
+
+
+class OfflineMiss(Exception):
+    """
+    Raised in offline mode when a page was never cached
+    """
+
+
+class Page(NamedTuple):
+    """
+    Page returned by the Fetcher, exposing the same content, status_code
+    and headers as requests.Response
+
+    Args:
+        url (str): url of the page
+        content (bytes): body of the page
+        status_code (int): status of the response
+        headers (Mapping): headers of the response
+        not_modified (bool): True when the cached copy was confirmed
+            as still current (or replayed offline)
+    """
+
+    url: str
+    content: bytes
+    status_code: int = 200
+    headers: Optional[Mapping] = None
+    not_modified: bool = False
+
+
+class Fetcher:
+    """
+    Fetcher for pulling pages with bounded parallelism.
+
+    Args:
+        workers (int): Number of threads used by get_many
+        per_host (int): Maximum requests in flight against one host, or
+            the starting point when adaptive
+        timeout (float): Timeout in seconds passed to requests
+        cache (PageCache): Cache for the raw pages, nothing is kept if None
+        offline (bool): Serve every page from the cache without
+            touching the network
+        adaptive (bool): Adjust the requests in flight per host between
+            1 and workers from the latency and 429/5xx responses seen
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        workers: int = DEFAULT_WORKERS,
+        per_host: int = DEFAULT_PER_HOST,
+        timeout: float = DEFAULT_TIMEOUT,
+        cache: PageCache = None,
+        offline: bool = False,
+        *,
+        adaptive: bool = False,
+    ):
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.cache = cache
+        self.offline = offline
+        if offline and cache is None:
+            raise ValueError("offline mode needs a PageCache")
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if adaptive:
+            limits = partial(AdaptiveScheduler, per_host, 1, self.workers)
+        else:
+            limits = partial(AdaptiveScheduler, per_host, per_host, per_host)
+        self._hosts = defaultdict(limits)
+        self._lock = threading.Lock()
+
+    def _host_limit(self, url: str) -> AdaptiveScheduler:
+        """
+        Get the scheduler limiting the requests against the url's host
+
+        Args:
+            url (str): url about to be requested
+        """
+        host = urlsplit(url).netloc
+        with self._lock:
+            return self._hosts[host]
+
+    def get(self, url: str) -> Page:
+        """
+        Fetch a single page, waiting for a free slot on its host
+
+        Args:
+            url (str): url of the page
+        """
+        cached = self.cache.load(url) if self.cache else None
+        if self.offline:
+            if cached is None:
+                raise OfflineMiss(url)
+            return Page(url, cached[0], not_modified=True)
+
+        headers = {}
+        if cached:
+            if cached[1].get("etag"):
+                headers["If-None-Match"] = cached[1]["etag"]
+            if cached[1].get("last_modified"):
+                headers["If-Modified-Since"] = cached[1]["last_modified"]
+        response = self._request(url, headers)
+
+        if response.status_code == 304 and cached:
+            self.cache.touch(url)
+            return Page(url, cached[0], 200, response.headers, not_modified=True)
+        if response.status_code == 200 and self.cache:
+            self.cache.store(url, response.content, response.headers)
+        return Page(url, response.content, response.status_code, response.headers)
+
+    def _request(self, url: str, headers: dict) -> requests.Response:
+        """
+        Send a GET once a slot is free on the host, retrying throttled
+        and failed requests with backoff
+
+        Args:
+            url (str): url of the page
+            headers (dict): extra request headers
+        """
+        scheduler = self._host_limit(url)
+        attempt = 0
+        while True:
+            scheduler.acquire()
+            start = time.monotonic()
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                scheduler.release(None, time.monotonic() - start)
+                if attempt >= scheduler.retries:
+                    raise
+                scheduler.backoff(attempt)
+                attempt += 1
+                continue
+            scheduler.release(response.status_code, time.monotonic() - start)
+            if response.status_code not in RETRY_STATUS or attempt >= scheduler.retries:
+                return response
+            scheduler.backoff(attempt, response.headers.get("Retry-After"))
+            attempt += 1
+
+    def stats(self) -> dict:
+        """
+        Request counts, effective requests per second and the current
+        limit for every host requested so far
+        """
+        with self._lock:
+            hosts = dict(self._hosts)
+        return {
+            host: dict(scheduler.counts, rps=scheduler.rate(), limit=int(scheduler.limit))
+            for host, scheduler in hosts.items()
+        }
+
+    def summary(self) -> str:
+        """
+        One line per host of the requests made against it
+        """
+        return "\n".join(
+            f"{host}: {counts['ok']}/{counts['requests']} ok, {counts['retries']} retries, "
+            f"{counts['throttled']} throttled, {counts['errors']} errors, "
+            f"{counts['rps']:.1f} req/s, limit {counts['limit']}"
+            for host, counts in self.stats().items()
+        )
+
+    def get_many(self, urls, return_exceptions: bool = False):
+        """
+        Fetch several pages concurrently.
+
+        Pages are yielded in the same order as urls. If a request
+        raised, the exception is raised again when its turn comes up.
+
+        Args:
+            urls (Iterable[str]): urls of the pages
+            return_exceptions (bool): yield the requests.RequestException
+                of a request that raised in place of its page instead
+        """
+        urls = list(urls)
+        get = partial(self._get_or_error, return_exceptions=return_exceptions)
+        if self.workers == 1 or self.offline or len(urls) < 2:
+            for url in urls:
+                yield get(url)
+            return
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            yield from pool.map(get, urls)
+
+    def _get_or_error(self, url: str, return_exceptions: bool):
+        """
+        get, returning the requests.RequestException it raised when
+        return_exceptions is set
+        """
+        try:
+            return self.get(url)
+        except requests.RequestException as err:
+            if not return_exceptions:
+                raise
+            return err
+
+    def close(self):
+        """
+        Close the pooled connections
+        """
+        self.session.close()
@@ -0,0 +1,319 @@
+"""
+incremental.py
+
+Last Updated: 18 Oct 2026
+
+Incremental refresh of the card database. Unlike gather_cards, which
+skips any set already in the sets table, every set is looked at again
+but only the cards whose source changed are parsed and written:
+
+- a set whose page is unchanged (a 304 through the PageCache) and whose
+  last pass finished is skipped without requesting its cards
+- a card whose page is unchanged is only marked as checked
+- a changed page is parsed and its fields hashed, the card is only
+  written when the hash differs from the journal
+
+Progress is committed every `checkpoint` cards together with the card
+journal, so a run that dies part way through picks up after the last
+card written. The set's row is only written once all of its cards went
+through, and removed when one of them failed, so as for gather_cards a
+set found in the sets table is a complete set. Databases built before
+the journal existed are adopted by matching cards on set and title the
+first time they are refreshed.
+
+    python -m src.update_db.incremental --workers 8
+    python -m src.update_db.incremental --deep   # revalidate every card
+"""
+import hashlib
+import json
+import sqlite3
+import time
+
+import requests
+
+from src.update_db.card import Card
+from src.update_db.fetch import Fetcher, Page
+from src.update_db.lookup import (
+    BASE_URL,
+    CARD_COLUMNS,
+    INSERT_CARD,
+    build_arg_parser,
+    card_links,
+    card_row,
+    fetcher_from_args,
+    insert_set,
+)
+from src.update_db.parsing import DEFAULT_PARSER
+from src.update_db.schema import create_tables, create_journal, bump_generation
+from src.update_db.sets import MTGSet, get_sets
+
+DEFAULT_CHECKPOINT = 100
+
+UPDATE_CARD = (
+    f"UPDATE cards SET {', '.join(f'{column} = ?' for column in CARD_COLUMNS)} "
+    "WHERE id = ?"
+)
+SAVE_JOURNAL = """
+    INSERT OR REPLACE INTO card_journal (url, card_id, set_shortened, content_hash, checked_at)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+
+def content_hash(row: tuple) -> str:
+    """
+    Hash of the stored fields of a card
+
+    Args:
+        row (tuple): values in lookup.CARD_COLUMNS order
+    """
+    return hashlib.sha256(json.dumps(list(row)).encode("utf-8")).hexdigest()
+
+
+class IncrementalRefresh:
+    """
+    Card-granular refresh of the database against the site
+
+    Args:
+        conn (sqlite3.Connection): Connection to the database
+        fetcher (Fetcher): Fetcher used for the pages, needs a PageCache
+            for unchanged pages to be recognised
+        parser (str): Name of the parsing.BACKENDS entry used for the pages
+        checkpoint (int): Cards written between commits
+        deep (bool): Revalidate the cards of unchanged sets as well
+    """
+
+    def __init__(
+        self,
+        conn: sqlite3.Connection,
+        fetcher: Fetcher,
+        parser: str = DEFAULT_PARSER,
+        checkpoint: int = DEFAULT_CHECKPOINT,
+        deep: bool = False,
+    ):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.fetcher = fetcher
+        self.parser = parser
+        self.checkpoint = max(1, checkpoint)
+        self.deep = deep
+        self.stats = dict.fromkeys(
+            ("sets_skipped", "checked", "unchanged", "updated", "added", "invalid", "failed"), 0
+        )
+        create_tables(self.cursor)
+        create_journal(self.cursor)
+        self.conn.commit()
+
+    def run(self, base_url: str = BASE_URL) -> dict:
+        """
+        Refresh every set of the site
+
+        Args:
+            base_url (str): Site the set and card pages are pulled from
+
+        Returns:
+            dict of counts of what was done with the cards
+        """
+        for card_set in get_sets(fetcher=self.fetcher, set_url=base_url + "/Card/Set"):
+            self.refresh_set(MTGSet(card_set, base_url), base_url)
+        if self.stats["updated"] or self.stats["added"]:
+            bump_generation(self.cursor)
+            self.conn.commit()
+        return self.stats
+
+    def summary(self) -> str:
+        """
+        One line summary of the counts from the last run
+        """
+        return ", ".join(f"{count} {name}" for name, count in self.stats.items())
+
+    def refresh_set(self, card_set: MTGSet, base_url: str = BASE_URL):
+        """
+        Refresh the cards of a single set
+
+        Args:
+            card_set (MTGSet): Set to refresh
+            base_url (str): Site the card pages are pulled from
+        """
+        set_page = self._set_page(card_set)
+        if set_page is None:
+            return
+        started = self._start_pass(card_set, set_page.not_modified)
+        if started is None:
+            self.stats["sets_skipped"] += 1
+            return
+
+        known = {
+            url: (card_id, digest, checked_at)
+            for url, card_id, digest, checked_at in self.cursor.execute(
+                "SELECT url, card_id, content_hash, checked_at FROM card_journal "
+                "WHERE set_shortened = ?",
+                (card_set.shortened,),
+            )
+        }
+        titles, urls = card_links(set_page, base_url, self.parser)
+        todo = [
+            (title, url) for title, url in zip(titles, urls)
+            if url not in known or known[url][2] < started
+        ]
+        failed = 0
+        pages = self.fetcher.get_many((url for _, url in todo), return_exceptions=True)
+        for done, ((title, url), page) in enumerate(zip(todo, pages), 1):
+            failed += not self._refresh_card(card_set, title, page, known.get(url))
+            if done % self.checkpoint == 0:
+                self.conn.commit()
+        if failed:
+            # gather_cards and the pipeline take a set's row to mean all of
+            # its cards are stored, the set is finished by the next pass
+            print(f"Incomplete Set : {card_set.title} ({failed} failed)")
+            self.cursor.execute("DELETE FROM sets WHERE shortened = ?", (card_set.shortened,))
+        else:
+            insert_set(self.cursor, card_set)
+            self.cursor.execute(
+                "UPDATE set_journal SET completed_at = ? WHERE shortened = ?",
+                (time.time(), card_set.shortened),
+            )
+        self.conn.commit()
+
+    def _set_page(self, card_set: MTGSet):
+        """
+        Pull the page listing the cards of a set
+
+        Returns:
+            the Page, None if it could not be pulled
+        """
+        try:
+            set_page = self.fetcher.get(card_set.url)
+        except requests.RequestException as err:
+            print(f"Failed Set : {card_set.title} ({err})")
+            return None
+        if set_page.status_code != 200:
+            print(f"Failed Set : {card_set.title} ({set_page.status_code})")
+            return None
+        return set_page
+
+    def _start_pass(self, card_set: MTGSet, not_modified: bool):
+        """
+        Start a pass over a set, or pick up the one that was interrupted
+
+        Args:
+            card_set (MTGSet): Set about to be refreshed
+            not_modified (bool): Whether the set page is unchanged
+
+        Returns:
+            time the pass started, None if the set can be skipped
+        """
+        journal = self.cursor.execute(
+            "SELECT started_at, completed_at FROM set_journal WHERE shortened = ?",
+            (card_set.shortened,),
+        ).fetchone()
+        finished = journal is not None and journal[1] is not None
+        if finished and not_modified and not self.deep:
+            return None
+        if journal is not None and not finished:
+            print(f"Resuming {card_set.title}")
+            return journal[0]
+        started = time.time()
+        self.cursor.execute(
+            "INSERT OR REPLACE INTO set_journal (shortened, started_at) VALUES (?, ?)",
+            (card_set.shortened, started),
+        )
+        return started
+
+    def _refresh_card(self, card_set: MTGSet, title: str, page: Page, known: tuple) -> bool:
+        """
+        Bring a single card up to date with its page
+
+        Args:
+            card_set (MTGSet): Set the card is a part of
+            title (str): Name of the card
+            page (Page): The card page, or the requests.RequestException
+                pulling it raised
+            known (tuple): (card_id, content_hash, checked_at) from the
+                journal, None for a page not seen before
+
+        Returns:
+            False if the page could not be pulled and should be retried
+        """
+        self.stats["checked"] += 1
+        if isinstance(page, requests.RequestException) or page.status_code != 200:
+            print(f"Failed Card : {title} ({getattr(page, 'status_code', page)})")
+            self.stats["failed"] += 1
+            return False
+        if known and page.not_modified:
+            self._save_journal(page.url, known[0], card_set.shortened, known[1])
+            self.stats["unchanged"] += 1
+            return True
+        try:
+            row = card_row(Card(title, card_set, page, self.parser), card_set.shortened)
+        except Warning:
+            print(f"Invalid Card : {title}")
+            self.stats["invalid"] += 1
+            return True
+
+        digest = content_hash(row)
+        card_id = known[0] if known else self._adopt(card_set.shortened, title)
+        if card_id is not None:
+            stored = self.cursor.execute(
+                f"SELECT {', '.join(CARD_COLUMNS)} FROM cards WHERE id = ?", (card_id,)
+            ).fetchone()
+            if stored is None:
+                card_id = None
+            elif content_hash(stored) == digest:
+                self.stats["unchanged"] += 1
+            else:
+                self.cursor.execute(UPDATE_CARD, row + (card_id,))
+                self.stats["updated"] += 1
+        if card_id is None:
+            self.cursor.execute(INSERT_CARD, row)
+            card_id = self.cursor.lastrowid
+            self.stats["added"] += 1
+        self._save_journal(page.url, card_id, card_set.shortened, digest)
+        return True
+
+    def _adopt(self, set_shortened: str, title: str):
+        """
+        Find a card written without the journal (by gather_cards or the
+        pipeline) that matches a page seen for the first time
+
+        Returns:
+            id of the card or None
+        """
+        found = self.cursor.execute(
+            """
+            SELECT id FROM cards
+            WHERE set_shortened = ? AND title = ?
+              AND id NOT IN (SELECT card_id FROM card_journal WHERE set_shortened = ?)
+            ORDER BY id LIMIT 1
+            """,
+            (set_shortened, title, set_shortened),
+        ).fetchone()
+        return found[0] if found else None
+
+    def _save_journal(self, url: str, card_id: int, set_shortened: str, digest: str):
+        """
+        Record a card as confirmed up to date
+        """
+        self.cursor.execute(SAVE_JOURNAL, (url, card_id, set_shortened, digest, time.time()))
+
+
+if __name__ == "__main__":
+    arg_parser = build_arg_parser()
+    arg_parser.add_argument(
+        "--deep", action="store_true",
+        help="revalidate the cards of sets whose page has not changed",
+    )
+    arg_parser.add_argument(
+        "--checkpoint", type=int, default=DEFAULT_CHECKPOINT,
+        help="cards written between commits",
+    )
+    args = arg_parser.parse_args()
+    connection = sqlite3.connect(args.db)
+    page_fetcher = fetcher_from_args(args)
+    refresh = IncrementalRefresh(
+        connection, page_fetcher, args.parser, args.checkpoint, args.deep
+    )
+    refresh.run()
+    page_fetcher.close()
+    connection.close()
+    print(refresh.summary())
+    print(page_fetcher.summary())
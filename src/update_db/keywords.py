@@ -0,0 +1,118 @@
+"""
+keywords.py
+
+Last Updated: 18 Oct 2026
+
+Keyword abilities (Flying, Deathtouch, Ward N, ...) of a card, picked
+out of the ability lines stored by Card.get_details. A line only counts
+when it is nothing but keywords, "Flying, trample" or "Ward 2", so rules
+text that merely mentions one ("creatures you control have flying") is
+not mistaken for it. The keywords are stored on the card as a JSON list
+and indexed in the card_keywords table, see schema.create_keyword_index.
+"""
+import re
+
+# keywords that are the whole ability
+KEYWORDS = (
+    "Deathtouch", "Defender", "Double strike", "First strike", "Flash", "Flying",
+    "Haste", "Hexproof", "Indestructible", "Lifelink", "Menace", "Reach",
+    "Trample", "Vigilance", "Banding", "Changeling", "Convoke", "Delve",
+    "Devoid", "Exalted", "Fear", "Flanking", "Horsemanship", "Infect",
+    "Intimidate", "Living weapon", "Persist", "Phasing", "Prowess", "Rebound",
+    "Shadow", "Shroud", "Skulk", "Split second", "Storm", "Sunburst",
+    "Undying", "Wither", "Cascade", "Battle cry", "Extort", "Evolve",
+    "Cipher", "Unleash", "Melee", "Improvise", "Ascend", "Assist",
+    "Jump-start", "Mentor", "Riot", "Decayed", "Training", "Daybound",
+    "Nightbound", "Fuse", "Undaunted", "Myriad", "Partner", "Soulbond",
+    "Plainswalk", "Islandwalk", "Swampwalk", "Mountainwalk", "Forestwalk",
+)
+# keywords followed by a number, cost or quality ("Ward 2", "Enchant creature")
+PARAMETERIZED_KEYWORDS = (
+    "Ward", "Protection", "Enchant", "Equip", "Kicker", "Multikicker",
+    "Cycling", "Flashback", "Madness", "Echo", "Morph", "Megamorph",
+    "Bushido", "Ninjutsu", "Annihilator", "Crew", "Afflict", "Toxic",
+    "Backup", "Bloodthirst", "Buyback", "Cumulative upkeep", "Dash",
+    "Dredge", "Embalm", "Emerge", "Entwine", "Escape", "Eternalize",
+    "Evoke", "Fabricate", "Fading", "Foretell", "Fortify", "Graft",
+    "Level up", "Modular", "Mutate", "Outlast", "Overload", "Prowl",
+    "Rampage", "Reconfigure", "Reinforce", "Renown", "Replicate", "Scavenge",
+    "Spectacle", "Splice", "Surge", "Suspend", "Transmute", "Tribute",
+    "Unearth", "Vanishing", "Affinity", "Afterlife", "Awaken", "Bestow",
+    "Blitz", "Casualty", "Disturb", "Encore", "Miracle", "Ravenous",
+    "Soulshift", "Squad", "Absorb", "Amplify", "Champion", "Craft",
+    "Disguise", "Frenzy", "Poisonous", "Recover", "Ripple", "Landwalk",
+)
+# longest parameter accepted, so "Equip abilities you activate cost 1
+# less" is not read as the Equip keyword
+MAX_PARAMETER_WORDS = 5
+
+_NAMES = {name.lower(): name for name in KEYWORDS + PARAMETERIZED_KEYWORDS}
+_PARAMETERIZED = {name.lower() for name in PARAMETERIZED_KEYWORDS}
+# longest first so "First strike" wins over a shorter keyword
+_KEYWORD = re.compile(
+    r"(" + "|".join(re.escape(name) for name in sorted(_NAMES, key=len, reverse=True))
+    + r")(?![\w-])(.*)",
+    re.IGNORECASE | re.DOTALL,
+)
+_REMINDER = re.compile(r"\([^)]*\)")
+_TAG = re.compile(r"<[^>]+>")
+
+
+def keyword_name(term: str) -> str:
+    """
+    Name a keyword is stored under, matched without case and without the
+    parameter of a parameterized keyword, as at ingest ("ward 2" is
+    stored as Ward). Terms that are not known keywords are returned
+    stripped.
+
+    Args:
+        term (str): e.g. "first strike"
+    """
+    term = " ".join(term.split())
+    return _keyword(term) or term
+
+
+def _keyword(item: str):
+    """
+    Name a single keyword, with its parameter if it takes one, is stored
+    under, None if the item is not one
+    """
+    match = _KEYWORD.fullmatch(item)
+    if match is None:
+        return None
+    name, parameter = match.group(1).lower(), match.group(2).strip()
+    if parameter and not parameter.startswith("—") and (
+        name not in _PARAMETERIZED or len(parameter.split()) > MAX_PARAMETER_WORDS
+    ):
+        return None
+    return _NAMES[name]
+
+
+def _line_keywords(line: str) -> list:
+    """
+    Keywords of an ability line, empty unless the whole line is keywords
+    """
+    line = _TAG.sub("", _REMINDER.sub("", line)).strip().rstrip(".")
+    found = []
+    for item in re.split(r"[,;]", line):
+        item = item.strip()
+        if not item or item.lower().startswith("from "):  # Protection from x, from y
+            continue
+        name = _keyword(item)
+        if name is None:
+            return []
+        found.append(name)
+    return found
+
+
+def keyword_abilities(abilities: list) -> list:
+    """
+    Keyword abilities of a card, without duplicates and in sorted order
+
+    Args:
+        abilities (list): ability lines, as stored by Card.get_details
+    """
+    found = set()
+    for line in abilities or ():
+        found.update(_line_keywords(line))
+    return sorted(found)
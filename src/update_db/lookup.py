@@ -5,22 +5,34 @@ Lookup the details of the MTG cards and sets for the catalog (database)
 for putting the information into the database
 
 Written by: James Lambert
-Last Updated: 18 Aug 2025
+Last Updated: 18 Oct 2026
 """
+import argparse
 import json
 import sqlite3
 from enum import Enum
 
 import requests
-from bs4 import BeautifulSoup
 
-from src.update_db.sets import MTGSet, sets
-from src.update_db.card import Card
+from src.update_db.sets import MTGSet, get_sets
+from src.update_db.card import Card, cost_values
+from src.update_db.keywords import keyword_abilities
+from src.update_db.fetch import Fetcher, DEFAULT_WORKERS, DEFAULT_PER_HOST
+from src.update_db.cache import PageCache, CACHE_DIR
+from src.update_db.schema import (
+    COST_COLUMNS,
+    bump_generation,
+    create_indexes,
+    create_tables,
+    drop_indexes,
+)
+from src.update_db.parsing import make_soup, available_backends, SET_CARDS, DEFAULT_PARSER
 from src.database_search import DB_FILE
 
 
 BASE_URL = "https://aetherhub.com"
 SET_URL = BASE_URL + "/Card/Set"
+DEFAULT_BATCH = 1000
 
 class Details(Enum):
     """
@@ -33,7 +45,13 @@ class Details(Enum):
     ABILITIES = 4
 
 
-def gather_cards(conn, cursor):
+def gather_cards(
+    conn,
+    cursor,
+    fetcher: Fetcher = None,
+    base_url: str = BASE_URL,
+    parser: str = DEFAULT_PARSER,
+):
     """
     Gathers cards by set and puts them into the database of cards
     if the set is not already in there.
@@ -41,30 +59,80 @@ def gather_cards(conn, cursor):
         conn(sqlite3.Connection): Connection to the database
         cursor (sqlite3.Connection.Cursor): Cursor for lookups and
             executing sql commands
+        fetcher (Fetcher): Fetcher used for the card pages, one page at
+            a time when not given
+        base_url (str): Site the set and card pages are pulled from
+        parser (str): Name of the parsing.BACKENDS entry used for the pages
     """
-    for card_set in sets:
-        temp = MTGSet(card_set)
-        cursor.execute(
-            "SELECT EXISTS(SELECT 1 FROM sets WHERE shortened = ?)", (temp.shortened,)
-        )
-        if cursor.fetchone()[0]:
-            continue
-        print(temp.title)
-        req = requests.get(temp.url, timeout=15)
-        soup = BeautifulSoup(req.content, "html.parser")
-        cards = soup.find("div", id="cards")
-        card_list = cards.find_all("a", class_="item ae-card-link cardLink")
-        set_shortened = insert_set(cursor, temp)
-        for card in card_list:
-            title = card.find("div", class_="item-hidden-text").contents[0]
-            url = BASE_URL + card.get("href")
-            page = requests.get(url, timeout=15)
+    if fetcher is None:
+        fetcher = Fetcher(workers=1)
+    with BulkLoader(conn) as loader:
+        for card_set in get_sets(fetcher=fetcher, set_url=base_url + "/Card/Set"):
+            temp = MTGSet(card_set, base_url)
+            cursor.execute(
+                "SELECT EXISTS(SELECT 1 FROM sets WHERE shortened = ?)", (temp.shortened,)
+            )
+            if cursor.fetchone()[0]:
+                continue
+            print(temp.title)
             try:
-                temp_card = Card(title, temp, page)
-                insert_card(cursor, temp_card, set_shortened)
-            except Warning:
-                print(f"Invalid Card : {title}")
-        conn.commit()
+                req = fetcher.get(temp.url)
+            except requests.RequestException as err:
+                print(f"Failed Set : {temp.title} ({err})")
+                continue
+            if req.status_code != 200:
+                print(f"Failed Set : {temp.title} ({req.status_code})")
+                continue
+            titles, urls = card_links(req, base_url, parser)
+            # drop what an interrupted earlier run left of the set
+            loader.cursor.execute("DELETE FROM cards WHERE set_shortened = ?", (temp.shortened,))
+            failed = 0
+            # pages are fetched concurrently but parsed and inserted in order
+            for title, page in zip(titles, fetcher.get_many(urls, return_exceptions=True)):
+                if isinstance(page, requests.RequestException):
+                    print(f"Failed Card : {title} ({page})")
+                    failed += 1
+                    continue
+                if page.status_code != 200:
+                    print(f"Failed Card : {title} ({page.status_code})")
+                    failed += 1
+                    continue
+                try:
+                    loader.add_card(Card(title, temp, page, parser), temp.shortened)
+                except Warning:
+                    print(f"Invalid Card : {title}")
+            loader.flush()
+            if failed:
+                # the failed cards would never be retried once the set is marked
+                print(f"Incomplete Set : {temp.title} ({failed} failed)")
+                loader.cursor.execute(
+                    "DELETE FROM cards WHERE set_shortened = ?", (temp.shortened,)
+                )
+            else:
+                loader.add_set(temp)
+            loader.commit()
+
+
+def card_links(page, base_url: str = BASE_URL, parser: str = DEFAULT_PARSER):
+    """
+    Get the card titles and card page urls listed on a set page
+
+    Args:
+        page (requests.Response): The set page
+        base_url (str): Site the card pages are found on
+        parser (str): Name of the parsing.BACKENDS entry used for the page
+
+    Returns:
+        (titles, urls): Tuple(list[str], list[str])
+    """
+    soup = make_soup(page.content, parser, SET_CARDS)
+    cards = soup.find("div", id="cards")
+    card_list = cards.find_all("a", class_="item ae-card-link cardLink")
+    titles = [
+        str(card.find("div", class_="item-hidden-text").contents[0]) for card in card_list
+    ]
+    urls = [base_url + card.get("href") for card in card_list]
+    return titles, urls
 
 
 def insert_set(cursor, card_set: MTGSet):
@@ -87,6 +155,41 @@ def insert_set(cursor, card_set: MTGSet):
     return card_set.shortened
 
 
+CARD_COLUMNS = (
+    "set_shortened", "title", "img_url", "type", "subtype", "quote",
+    "rarity", "color", "mana_cost", "abilities", *COST_COLUMNS, "keywords",
+)
+INSERT_CARD = (
+    f"INSERT INTO cards ({', '.join(CARD_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in CARD_COLUMNS)})"
+)
+
+
+def card_row(card: Card, set_shortened: str) -> tuple:
+    """
+    Get the values stored in the database for a card, in CARD_COLUMNS order
+
+    Args:
+        card (Card): Card object to get the information from
+        set_shortened (str): The short hand label of the set that
+            the card is from.
+    """
+    return (
+        set_shortened,
+        card.title,
+        card.img_url,
+        card.type,
+        card.subtype,
+        card.details[Details.QUOTE.value],
+        card.details[Details.RARITY.value].value,
+        card.details[Details.COLOR.value],
+        json.dumps(card.details[Details.COST.value]),
+        json.dumps(card.details[Details.ABILITIES.value]),
+    ) + cost_values(card.details[Details.COST.value]) + (
+        json.dumps(keyword_abilities(card.details[Details.ABILITIES.value])),
+    )
+
+
 def insert_card(cursor, card: Card, set_shortened: str):
     """
     Insert a card into the database of cards
@@ -99,58 +202,192 @@ def insert_card(cursor, card: Card, set_shortened: str):
         set_shortened (str): The short hand label of the set that
             the card is from.
     """
-    cursor.execute(
+    cursor.execute(INSERT_CARD, card_row(card, set_shortened))
+
+
+class BulkLoader:
+    """
+    Buffered writer for loading many cards at once. Rows are written with
+    executemany inside explicit transactions, with WAL journaling and
+    synchronous = NORMAL for the duration of the load (a power loss can
+    lose the last commits, never corrupt the file). The secondary indexes
+    are dropped for the load and built again at the end (by default only
+    when the cards table starts out empty). Everything since the last
+    commit() is rolled back if the load raises, a load that completes
+    bumps the catalog generation.
+
+        with BulkLoader(conn) as loader:
+            loader.add_set(card_set)
+            loader.add_card(card, card_set.shortened)
+            loader.commit()
+
+    Args:
+        conn (sqlite3.Connection): Connection to the database
+        batch_size (int): Rows buffered before they are written
+        defer_indexes (bool): Drop the indexes while loading, decided
+            from whether cards is empty when None
+    """
+
+    def __init__(self, conn, batch_size: int = DEFAULT_BATCH, defer_indexes: bool = None):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.batch_size = max(1, batch_size)
+        self.defer_indexes = defer_indexes
+        self.rows = []
+        self.written = 0
+        self._restore = None
+
+    def __enter__(self):
+        self.conn.commit()
+        journal_mode = self.cursor.execute("PRAGMA journal_mode").fetchone()[0]
+        synchronous = self.cursor.execute("PRAGMA synchronous").fetchone()[0]
+        self._restore = (journal_mode, synchronous, self.conn.isolation_level)
+        self.cursor.execute("PRAGMA journal_mode = WAL")
+        # WAL is only synced at checkpoints, not on every commit
+        self.cursor.execute("PRAGMA synchronous = NORMAL")
+        self.cursor.execute("PRAGMA temp_store = MEMORY")
+        if self.defer_indexes is None:
+            self.defer_indexes = not self.cursor.execute(
+                "SELECT EXISTS(SELECT 1 FROM cards)"
+            ).fetchone()[0]
+        if self.defer_indexes:
+            drop_indexes(self.cursor)
+        # transactions are opened and closed by hand from here on
+        self.conn.isolation_level = None
+        self.cursor.execute("BEGIN")
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+            bump_generation(self.cursor)
+            self.cursor.execute("COMMIT")
+        else:
+            self.rows.clear()
+            self.cursor.execute("ROLLBACK")
+        journal_mode, synchronous, isolation_level = self._restore
+        self.conn.isolation_level = isolation_level
+        if self.defer_indexes:
+            create_indexes(self.cursor)
+            # statistics for the query planner to pick between the indexes
+            self.cursor.execute("ANALYZE")
+            self.conn.commit()
+        self.cursor.execute(f"PRAGMA synchronous = {int(synchronous)}")
+        try:
+            self.cursor.execute(f"PRAGMA journal_mode = {journal_mode}")
+        except sqlite3.OperationalError:
+            pass  # another connection is still open, stay in WAL
+
+    def add_set(self, card_set: MTGSet) -> str:
         """
-        INSERT INTO cards (
-            set_shortened, title, img_url, type, subtype, quote,
-            rarity, color, mana_cost, abilities
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """,
-        (
-            set_shortened,
-            card.title,
-            card.img_url,
-            card.type,
-            card.subtype,
-            card.details[Details.QUOTE.value],
-            card.details[Details.RARITY.value].value,
-            card.details[Details.COLOR.value],
-            json.dumps(card.details[Details.COST.value]),
-            json.dumps(card.details[Details.ABILITIES.value]),
-        ),
+        Insert a set, see insert_set
+        """
+        return insert_set(self.cursor, card_set)
+
+    def add_card(self, card: Card, set_shortened: str):
+        """
+        Buffer a card for insertion
+
+        Args:
+            card (Card): Card object to add to the database
+            set_shortened (str): The short hand label of the set that
+                the card is from.
+        """
+        self.add_row(card_row(card, set_shortened))
+
+    def add_row(self, row: tuple):
+        """
+        Buffer a row in CARD_COLUMNS order for insertion
+
+        Args:
+            row (tuple): values from card_row
+        """
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the buffered rows
+        """
+        if self.rows:
+            self.cursor.executemany(INSERT_CARD, self.rows)
+            self.written += len(self.rows)
+            self.rows.clear()
+
+    def commit(self):
+        """
+        Write the buffered rows and commit everything loaded so far
+        """
+        self.flush()
+        self.cursor.execute("COMMIT")
+        self.cursor.execute("BEGIN")
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    """
+    Command line options shared by the ways of updating the database
+    """
+    arg_parser = argparse.ArgumentParser(description="Update the card database")
+    arg_parser.add_argument(
+        "--workers", type=int, default=DEFAULT_WORKERS,
+        help="number of card pages fetched at once",
+    )
+    arg_parser.add_argument(
+        "--per-host", type=int, default=DEFAULT_PER_HOST,
+        help="maximum requests in flight against one host",
+    )
+    arg_parser.add_argument("--db", default=DB_FILE, help="database file to update")
+    arg_parser.add_argument(
+        "--cache-dir", default=CACHE_DIR, help="folder the raw pages are cached in"
+    )
+    arg_parser.add_argument(
+        "--no-cache", action="store_true", help="do not keep the raw pages"
+    )
+    arg_parser.add_argument(
+        "--offline", action="store_true",
+        help="replay the cached pages without using the network",
+    )
+    arg_parser.add_argument(
+        "--adaptive", action="store_true",
+        help="adjust the requests in flight per host to how the site responds, "
+        "from --per-host up to --workers",
+    )
+    arg_parser.add_argument(
+        "--parser", default=DEFAULT_PARSER, choices=available_backends(),
+        help="html parser backend for the pages",
+    )
+    return arg_parser
+
+
+def fetcher_from_args(options) -> Fetcher:
+    """
+    Build the Fetcher described by the command line options
+
+    Args:
+        options (argparse.Namespace): parsed build_arg_parser options
+    """
+    return Fetcher(
+        workers=options.workers,
+        per_host=options.per_host,
+        cache=None if options.no_cache else PageCache(options.cache_dir),
+        offline=options.offline,
+        adaptive=options.adaptive,
     )
 
 
 if __name__ == "__main__":
     # for each in all_cards:
     #     print(each.display())
-    connection = sqlite3.connect(DB_FILE)
+    args = build_arg_parser().parse_args()
+    connection = sqlite3.connect(args.db)
     cursor_use = connection.cursor()
-    cursor_use.execute(
-        """CREATE TABLE IF NOT EXISTS sets (
-    shortened TEXT PRIMARY KEY,
-    title TEXT NOT NULL,
-    release_date TEXT,
-    url TEXT
-    );"""
-    )
-
-    cursor_use.execute(
-        """CREATE TABLE IF NOT EXISTS cards (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    set_shortened TEXT NOT NULL,
-    title TEXT,
-    img_url TEXT,
-    type TEXT,
-    subtype TEXT,
-    quote TEXT,
-    rarity INTEGER,
-    color INTEGER,
-    mana_cost TEXT,
-    abilities TEXT,
-    FOREIGN KEY(set_shortened) REFERENCES sets(shortened) ON DELETE CASCADE
-    );"""
-    )
+    create_tables(cursor_use)
 
-    gather_cards(connection, cursor_use)  # put into database file you want
+    page_fetcher = fetcher_from_args(args)
+    gather_cards(
+        connection, cursor_use, page_fetcher, parser=args.parser
+    )  # put into database file you want
+    page_fetcher.close()
     connection.close()
+    print(page_fetcher.summary())
@@ -0,0 +1,62 @@
+"""
+parsing.py
+
+Last Updated: 18 Oct 2026
+
+HTML parser backends for the pages pulled by the lookup. A backend is
+the BeautifulSoup tree builder to use and whether the tree is limited
+with a SoupStrainer to the part of the page that is actually read.
+"""
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # pylint: disable=unused-import
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+# name: (tree builder, strain)
+BACKENDS = {
+    "html.parser": ("html.parser", False),
+    "strained": ("html.parser", True),
+    "lxml": ("lxml", False),
+    "lxml-strained": ("lxml", True),
+}
+DEFAULT_PARSER = "strained"
+
+CARD_INFO = SoupStrainer("div", id="cardInfo")
+SET_CARDS = SoupStrainer("div", id="cards")
+SET_TABLE = SoupStrainer("table", class_="table bg-ae-dark table-sm")
+
+
+def available_backends() -> list:
+    """
+    Get the names of the backends that can be used with what is installed
+    """
+    return [
+        name for name, (builder, _) in BACKENDS.items()
+        if builder != "lxml" or HAS_LXML
+    ]
+
+
+def make_soup(content: bytes, parser: str = DEFAULT_PARSER, only: SoupStrainer = None):
+    """
+    Parse a page with the chosen backend
+
+    Args:
+        content (bytes): body of the page
+        parser (str): name of the backend, one of BACKENDS
+        only (SoupStrainer): part of the page kept by strained backends
+
+    Returns:
+        BeautifulSoup
+    """
+    try:
+        builder, strain = BACKENDS[parser]
+    except KeyError as err:
+        raise ValueError(f"Unknown parser backend: {parser}") from err
+    if builder == "lxml" and not HAS_LXML:
+        raise ValueError(f"Parser backend {parser} needs lxml (pip install lxml)")
+    if strain and only is not None:
+        return BeautifulSoup(content, builder, parse_only=only)
+    return BeautifulSoup(content, builder)
@@ -0,0 +1,366 @@
+"""
+pipeline.py
+
+Last Updated: 18 Oct 2026
+
+Pipelined version of lookup.gather_cards. Fetching, parsing and writing
+run as separate stages joined by bounded queues:
+
+    set pages -> fetch_q -> I/O threads -> parse_q -> process pool
+              -> write_q -> writer thread (SQLite)
+
+so the network, the CPU heavy parsing and the database never wait on
+each other. A full queue blocks the stage feeding it, which keeps memory
+flat however fast the other stages are. A set's row is only written
+once every one of its cards went through, so a set found in the sets
+table is still a complete set. If the writer fails, every stage stops
+waiting on its queues and run() raises the writer's error.
+
+    python -m src.update_db.pipeline --workers 16 --parse-workers 4
+"""
+import multiprocessing
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from src.update_db.card import Card
+from src.update_db.fetch import Fetcher, Page
+from src.update_db.lookup import (
+    BASE_URL,
+    DEFAULT_BATCH,
+    BulkLoader,
+    build_arg_parser,
+    card_links,
+    card_row,
+    fetcher_from_args,
+)
+from src.update_db.parsing import DEFAULT_PARSER
+from src.update_db.schema import create_tables
+from src.update_db.sets import MTGSet, get_sets
+
+DEFAULT_QUEUE = 256
+POLL = 0.1  # seconds a stage waits on a queue before checking for a stop
+
+_DONE = None  # sentinel closing a queue for one consumer
+
+
+def parse_card_page(title: str, set_shortened: str, content: bytes, parser: str):
+    """
+    Parse a card page into its database row. Runs in a worker process.
+
+    Args:
+        title (str): Name of the card
+        set_shortened (str): The short hand label of the set
+        content (bytes): body of the card page
+        parser (str): Name of the parsing.BACKENDS entry used for the page
+
+    Returns:
+        tuple in lookup.CARD_COLUMNS order, or None for an invalid card
+    """
+    try:
+        card = Card(title, None, Page(title, content), parser)
+    except Warning:
+        return None
+    return card_row(card, set_shortened)
+
+
+class Pipeline:  # pylint: disable=too-many-instance-attributes
+    """
+    Staged fetch -> parse -> write ingestion into the database
+
+    Args:
+        db_file (str): Database file the cards are written to
+        parse_workers (int): Number of parsing processes
+        batch_size (int): Rows written per executemany
+        queue_size (int): Capacity of each queue between the stages
+    """
+
+    def __init__(
+        self,
+        db_file: str,
+        parse_workers: int = None,
+        batch_size: int = DEFAULT_BATCH,
+        queue_size: int = DEFAULT_QUEUE,
+    ):
+        self.db_file = db_file
+        self.parse_workers = max(1, parse_workers or os.cpu_count() or 1)
+        self.batch_size = max(1, batch_size)
+        self.fetch_q = queue.Queue(queue_size)
+        self.parse_q = queue.Queue(queue_size)
+        self.write_q = queue.Queue(queue_size)
+        self.stats = {"cards": 0, "invalid": 0, "failed": 0, "sets": 0}
+        self._stop = threading.Event()
+        self._error = None  # exception the writer stopped on
+
+    def run(
+        self, fetcher: Fetcher, base_url: str = BASE_URL, parser: str = DEFAULT_PARSER
+    ) -> dict:
+        """
+        Gather every set not already in the database
+
+        Args:
+            fetcher (Fetcher): Fetcher used for the pages, its workers are
+                the number of I/O threads
+            base_url (str): Site the set and card pages are pulled from
+            parser (str): Name of the parsing.BACKENDS entry used for the pages
+
+        Returns:
+            dict of counts of cards written, invalid cards, failed
+            requests and completed sets
+
+        Raises:
+            the exception the writer stopped on, once the other stages
+            have stopped
+        """
+        self._stop.clear()
+        self._error = None
+        writer = threading.Thread(target=self._run_writer, name="writer")
+        writer.start()
+        try:
+            self._run_stages(fetcher, base_url, parser)
+        finally:
+            self._put(self.write_q, _DONE)
+            writer.join()
+        if self._error is not None:
+            raise self._error
+        return self.stats
+
+    def _put(self, stage_q: queue.Queue, item) -> bool:
+        """
+        Put an item on a queue, waiting for room unless the run is stopped
+
+        Returns:
+            False if the run stopped before there was room
+        """
+        while not self._stop.is_set():
+            try:
+                stage_q.put(item, timeout=POLL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, stage_q: queue.Queue):
+        """
+        Take an item from a queue, _DONE once the run is stopped
+        """
+        while not self._stop.is_set():
+            try:
+                return stage_q.get(timeout=POLL)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _run_stages(self, fetcher: Fetcher, base_url: str, parser: str):
+        """
+        Start the fetch and parse stages and feed them until every set is queued
+        """
+        # spawn rather than fork, the parent already has threads running
+        with ProcessPoolExecutor(
+            max_workers=self.parse_workers, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            fetchers = [
+                threading.Thread(target=self._fetch, args=(fetcher,), name=f"fetch-{idx}")
+                for idx in range(fetcher.workers)
+            ]
+            parsers = [
+                threading.Thread(target=self._parse, args=(pool, parser), name=f"parse-{idx}")
+                for idx in range(self.parse_workers)
+            ]
+            for thread in fetchers + parsers:
+                thread.start()
+            try:
+                self._produce(fetcher, base_url, parser)
+            finally:
+                # close each stage once everything upstream of it is done
+                for _ in fetchers:
+                    self._put(self.fetch_q, _DONE)
+                for thread in fetchers:
+                    thread.join()
+                for _ in parsers:
+                    self._put(self.parse_q, _DONE)
+                for thread in parsers:
+                    thread.join()
+
+    def summary(self) -> str:
+        """
+        One line summary of the counts from the last run
+        """
+        return ", ".join(f"{count} {name}" for name, count in self.stats.items())
+
+    def _produce(self, fetcher: Fetcher, base_url: str, parser: str):
+        """
+        Queue the card pages of every set that is not in the database yet
+        """
+        conn = sqlite3.connect(self.db_file)
+        try:
+            for card_set in get_sets(fetcher=fetcher, set_url=base_url + "/Card/Set"):
+                temp = MTGSet(card_set, base_url)
+                done = conn.execute(
+                    "SELECT EXISTS(SELECT 1 FROM sets WHERE shortened = ?)",
+                    (temp.shortened,),
+                ).fetchone()[0]
+                if done:
+                    continue
+                print(temp.title)
+                try:
+                    page = fetcher.get(temp.url)
+                except Exception as err:  # pylint: disable=broad-exception-caught
+                    print(f"Failed Set : {temp.title} ({err})")
+                    continue
+                if page.status_code != 200:
+                    print(f"Failed Set : {temp.title} ({page.status_code})")
+                    continue
+                titles, urls = card_links(page, base_url, parser)
+                # queued ahead of the set's cards, which only reach the
+                # writer after they are fetched and parsed
+                queued = self._put(self.write_q, ("begin", temp.shortened, temp)) and all(
+                    self._put(self.fetch_q, (temp.shortened, title, url))
+                    for title, url in zip(titles, urls)
+                ) and self._put(self.write_q, ("end", temp.shortened, len(titles)))
+                if not queued:
+                    return
+        finally:
+            conn.close()
+
+    def _fetch(self, fetcher: Fetcher):
+        """
+        I/O stage: pull the card pages
+        """
+        while True:
+            item = self._get(self.fetch_q)
+            if item is _DONE:
+                return
+            set_shortened, title, url = item
+            try:
+                page = fetcher.get(url)
+            except Exception as err:  # pylint: disable=broad-exception-caught
+                print(f"Failed Card : {title} ({err})")
+                self._put(self.write_q, ("failed", set_shortened, title))
+                continue
+            if page.status_code != 200:
+                print(f"Failed Card : {title} ({page.status_code})")
+                self._put(self.write_q, ("failed", set_shortened, title))
+                continue
+            self._put(self.parse_q, (set_shortened, title, page.content))
+
+    def _parse(self, pool: ProcessPoolExecutor, parser: str):
+        """
+        Parse stage: hand the pages to the process pool
+        """
+        while True:
+            item = self._get(self.parse_q)
+            if item is _DONE:
+                return
+            set_shortened, title, content = item
+            try:
+                row = pool.submit(parse_card_page, title, set_shortened, content, parser).result()
+            except Exception as err:  # pylint: disable=broad-exception-caught
+                print(f"Failed Card : {title} ({err})")
+                self._put(self.write_q, ("failed", set_shortened, title))
+                continue
+            if row is None:
+                print(f"Invalid Card : {title}")
+                self._put(self.write_q, ("invalid", set_shortened, title))
+            else:
+                self._put(self.write_q, ("card", set_shortened, row))
+
+    def _run_writer(self):
+        """
+        Run the writer stage, stopping the other stages if it fails
+        """
+        try:
+            self._write()
+        except Exception as err:  # pylint: disable=broad-exception-caught
+            self._error = err
+            self._stop.set()
+
+    def _write(self):
+        """
+        Writer stage: batch the rows into the database from a single thread
+        """
+        conn = sqlite3.connect(self.db_file)
+        try:
+            with BulkLoader(conn, self.batch_size) as loader:
+                self._write_items(loader)
+        finally:
+            conn.close()
+
+    def _write_items(self, loader: BulkLoader):
+        """
+        Write the items of write_q until it is closed
+        """
+        # shortened: {"set", "expected", "seen", "cards", "failed"}
+        pending = {}
+        while True:
+            item = self._get(self.write_q)
+            if item is _DONE:
+                return
+            kind, set_shortened, value = item
+            if kind == "begin":
+                # drop what an interrupted earlier run left of the set
+                loader.cursor.execute(
+                    "DELETE FROM cards WHERE set_shortened = ?", (set_shortened,)
+                )
+                pending[set_shortened] = {
+                    "set": value, "expected": None, "seen": 0, "cards": 0, "failed": 0
+                }
+                continue
+            progress = pending[set_shortened]
+            if kind == "end":
+                progress["expected"] = value
+            elif kind == "card":
+                progress["seen"] += 1
+                progress["cards"] += 1
+                loader.add_row(value)
+            else:
+                progress["seen"] += 1
+                progress["failed"] += kind == "failed"
+                self.stats[kind] += 1
+            if progress["seen"] == progress["expected"]:
+                loader.flush()
+                self._finish_set(loader, progress)
+                del pending[set_shortened]
+                loader.commit()
+
+    def _finish_set(self, loader: BulkLoader, progress: dict):
+        """
+        Mark a set whose cards have all gone through as done, or roll its
+        cards back so the next run tries the whole set again
+        """
+        card_set = progress["set"]
+        if progress["failed"]:
+            # the failed cards would never be retried once the set is marked
+            print(f"Incomplete Set : {card_set.title} ({progress['failed']} failed)")
+            loader.cursor.execute(
+                "DELETE FROM cards WHERE set_shortened = ?", (card_set.shortened,)
+            )
+            return
+        loader.add_set(card_set)
+        self.stats["cards"] += progress["cards"]
+        self.stats["sets"] += 1
+
+
+if __name__ == "__main__":
+    arg_parser = build_arg_parser()
+    arg_parser.add_argument(
+        "--parse-workers", type=int, default=os.cpu_count(),
+        help="number of processes parsing card pages",
+    )
+    arg_parser.add_argument(
+        "--batch-size", type=int, default=DEFAULT_BATCH,
+        help="rows written to the database per batch",
+    )
+    args = arg_parser.parse_args()
+    connection = sqlite3.connect(args.db)
+    create_tables(connection.cursor())
+    connection.close()
+
+    page_fetcher = fetcher_from_args(args)
+    pipeline = Pipeline(args.db, args.parse_workers, args.batch_size)
+    pipeline.run(page_fetcher, parser=args.parser)
+    page_fetcher.close()
+    print(pipeline.summary())
+    print(page_fetcher.summary())
@@ -0,0 +1,125 @@
+"""
+scheduler.py
+
+Last Updated: 18 Oct 2026
+
+Request scheduling for a single host. The number of requests allowed in
+flight is adjusted with AIMD: it creeps up by about one per round of
+good responses and is halved on a 429/5xx, a connection error, or a
+response far slower than the fastest seen so far. Failed requests are
+retried with jittered exponential backoff, honouring Retry-After.
+"""
+import random
+import threading
+import time
+
+DEFAULT_RETRIES = 3
+RETRY_STATUS = (429, 500, 502, 503, 504)
+BACKOFF_BASE = 0.5  # seconds
+BACKOFF_CAP = 30.0  # seconds
+DECREASE = 0.5
+SLOW_FACTOR = 4  # latency over this many times the best seen counts as congestion
+SLOW_MARGIN = 0.5  # seconds, so tiny latencies don't look congested from noise
+
+
+class AdaptiveScheduler:
+    """
+    AIMD concurrency limit and retry policy for one host
+
+    Args:
+        initial (int): Requests allowed in flight to start with
+        minimum (int): Lowest the limit is lowered to
+        maximum (int): Highest the limit is raised to, equal to minimum
+            for a fixed limit
+        retries (int): Times a failed request is tried again
+    """
+
+    def __init__(
+        self, initial: int, minimum: int = 1, maximum: int = 32, retries: int = DEFAULT_RETRIES
+    ):
+        minimum = max(1, minimum)
+        self.bounds = (minimum, max(minimum, maximum))
+        self.limit = float(min(max(initial, minimum), self.bounds[1]))
+        self.retries = retries
+        self.in_flight = 0
+        self.counts = {"requests": 0, "ok": 0, "retries": 0, "throttled": 0, "errors": 0}
+        # fastest response, last time the limit was cut, first request
+        self._times = {"best": None, "decreased": 0.0, "started": None}
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """
+        Wait for a free slot under the current limit
+        """
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+            self.counts["requests"] += 1
+            if self._times["started"] is None:
+                self._times["started"] = time.monotonic()
+
+    def release(self, status: int, latency: float):
+        """
+        Free a slot and adjust the limit from the outcome of the request
+
+        Args:
+            status (int): HTTP status, None if the request raised
+            latency (float): seconds the request took
+        """
+        with self._cond:
+            self.in_flight -= 1
+            if status is None:
+                self.counts["errors"] += 1
+                self._decrease(latency)
+            elif status in RETRY_STATUS:
+                self.counts["throttled"] += 1
+                self._decrease(latency)
+            else:
+                self.counts["ok"] += 1
+                best = self._times["best"]
+                if best is None or latency < best:
+                    best = self._times["best"] = latency
+                if latency > max(best * SLOW_FACTOR, best + SLOW_MARGIN):
+                    self._decrease(latency)
+                else:
+                    # about +1 once every request of the current window came back
+                    self.limit = min(self.bounds[1], self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def _decrease(self, latency: float):
+        """
+        Cut the limit, at most once per round trip so one burst of
+        failures only counts once
+        """
+        now = time.monotonic()
+        if now - self._times["decreased"] < max(latency, self._times["best"] or 0.0):
+            return
+        self._times["decreased"] = now
+        self.limit = max(self.bounds[0], self.limit * DECREASE)
+
+    def backoff(self, attempt: int, retry_after: str = None):
+        """
+        Sleep before retrying a request
+
+        Args:
+            attempt (int): Number of the attempt that failed, from 0
+            retry_after (str): Retry-After header of the response
+        """
+        with self._cond:
+            self.counts["retries"] += 1
+        delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+        try:
+            delay = max(delay, float(retry_after))
+        except (TypeError, ValueError):
+            pass  # missing, or an HTTP date
+        time.sleep(min(delay, BACKOFF_CAP))
+
+    def rate(self) -> float:
+        """
+        Successful requests per second since the first request
+        """
+        if self._times["started"] is None:
+            return 0.0
+        elapsed = time.monotonic() - self._times["started"]
+        return self.counts["ok"] / elapsed if elapsed > 0 else 0.0
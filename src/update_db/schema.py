@@ -0,0 +1,351 @@
+"""
+schema.py
+
+Last Updated: 18 Oct 2026
+
+Tables and indexes of the card database
+"""
+import json
+import sqlite3
+
+from src.update_db.keywords import keyword_abilities
+
+# integer columns of cards derived from mana_cost at ingest, in the order
+# of card.cost_values: the mana value and the pips of each color
+PIP_COLUMNS = {
+    "WHITE": "pips_white",
+    "BLUE": "pips_blue",
+    "BLACK": "pips_black",
+    "RED": "pips_red",
+    "GREEN": "pips_green",
+}
+COST_COLUMNS = ("mana_value",) + tuple(PIP_COLUMNS.values())
+
+# name: definition, created after the cards are loaded
+CARD_INDEXES = {
+    "idx_cards_set": "cards(set_shortened)",
+    "idx_cards_rarity": "cards(rarity)",
+    "idx_cards_color": "cards(color)",
+    # NOCASE for the case-insensitive title lookups of decklist.resolve_decklist
+    "idx_cards_title": "cards(title COLLATE NOCASE)",
+    **{f"idx_cards_{column}": f"cards({column})" for column in COST_COLUMNS},
+}
+# indexes of earlier versions no search uses any more, dropped by create_indexes
+RETIRED_INDEXES = ("idx_cards_type",)
+
+# columns of cards searchable through the cards_fts full text index
+FTS_COLUMNS = ("title", "type", "subtype", "abilities", "quote")
+_FTS_NEW = ", ".join(f"new.{column}" for column in FTS_COLUMNS)
+_FTS_OLD = ", ".join(f"old.{column}" for column in FTS_COLUMNS)
+# name: trigger body keeping cards_fts in step with cards
+FTS_TRIGGERS = {
+    "cards_fts_insert": f"""AFTER INSERT ON cards BEGIN
+    INSERT INTO cards_fts (rowid, {', '.join(FTS_COLUMNS)}) VALUES (new.id, {_FTS_NEW});
+    END""",
+    "cards_fts_delete": f"""AFTER DELETE ON cards BEGIN
+    INSERT INTO cards_fts (cards_fts, rowid, {', '.join(FTS_COLUMNS)})
+    VALUES ('delete', old.id, {_FTS_OLD});
+    END""",
+    "cards_fts_update": f"""AFTER UPDATE OF {', '.join(FTS_COLUMNS)} ON cards BEGIN
+    INSERT INTO cards_fts (cards_fts, rowid, {', '.join(FTS_COLUMNS)})
+    VALUES ('delete', old.id, {_FTS_OLD});
+    INSERT INTO cards_fts (rowid, {', '.join(FTS_COLUMNS)}) VALUES (new.id, {_FTS_NEW});
+    END""",
+}
+
+
+# name: trigger body keeping card_keywords in step with cards.keywords
+KEYWORD_TRIGGERS = {
+    "card_keywords_insert": """AFTER INSERT ON cards BEGIN
+    INSERT OR IGNORE INTO card_keywords (keyword, card_id)
+    SELECT value, new.id FROM json_each(new.keywords);
+    END""",
+    "card_keywords_delete": """AFTER DELETE ON cards BEGIN
+    DELETE FROM card_keywords WHERE card_id = old.id;
+    END""",
+    "card_keywords_update": """AFTER UPDATE OF keywords ON cards BEGIN
+    DELETE FROM card_keywords WHERE card_id = old.id;
+    INSERT OR IGNORE INTO card_keywords (keyword, card_id)
+    SELECT value, new.id FROM json_each(new.keywords);
+    END""",
+}
+
+
+def create_tables(cursor):
+    """
+    Create the sets and cards tables if they do not exist yet
+
+    Args:
+        cursor (sqlite3.Connection.Cursor): Cursor for executing sql commands
+    """
+    cursor.execute(
+        """CREATE TABLE IF NOT EXISTS sets (
+    shortened TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    release_date TEXT,
+    url TEXT
+    );"""
+    )
+
+    cursor.execute(
+        """CREATE TABLE IF NOT EXISTS cards (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    set_shortened TEXT NOT NULL,
+    title TEXT,
+    img_url TEXT,
+    type TEXT,
+    subtype TEXT,
+    quote TEXT,
+    rarity INTEGER,
+    color INTEGER,
+    mana_cost TEXT,
+    abilities TEXT,
+    mana_value INTEGER,
+    pips_white INTEGER,
+    pips_blue INTEGER,
+    pips_black INTEGER,
+    pips_red INTEGER,
+    pips_green INTEGER,
+    keywords TEXT,
+    FOREIGN KEY(set_shortened) REFERENCES sets(shortened) ON DELETE CASCADE
+    );"""
+    )
+    cursor.execute(
+        """CREATE TABLE IF NOT EXISTS catalog_meta (
+    key TEXT PRIMARY KEY,
+    value
+    );"""
+    )
+    add_cost_columns(cursor)
+    add_keyword_column(cursor)
+    create_indexes(cursor)
+
+
+def add_cost_columns(cursor):
+    """
+    Add COST_COLUMNS to a cards table created before they existed and
+    fill them in from the mana_cost JSON of the cards missing them. The
+    COLORLESS entry is stored one over the generic cost and VARIABLE
+    counts as 0, as in card.mana_value.
+
+    Args:
+        cursor (sqlite3.Connection.Cursor): Cursor for executing sql commands
+    """
+    existing = {row[1] for row in cursor.execute("PRAGMA table_info(cards)")}
+    if not existing.issuperset(COST_COLUMNS):
+        # older cards_fts_update triggers fire on any update, the backfill
+        # would reindex every card one at a time. create_search_index puts
+        # back the one limited to FTS_COLUMNS.
+        cursor.execute("DROP TRIGGER IF EXISTS cards_fts_update")
+    for column in COST_COLUMNS:
+        if column not in existing:
+            cursor.execute(f"ALTER TABLE cards ADD COLUMN {column} INTEGER")
+
+    pips = {
+        column: f"coalesce(json_extract(mana_cost, '$.{color}'), 0)"
+        for color, column in PIP_COLUMNS.items()
+    }
+    colorless = "coalesce(json_extract(mana_cost, '$.COLORLESS') - 1, 0)"
+    assignments = [f"mana_value = {' + '.join([colorless, *pips.values()])}"]
+    assignments += [f"{column} = {value}" for column, value in pips.items()]
+    cursor.execute(
+        f"UPDATE cards SET {', '.join(assignments)} "
+        "WHERE mana_value IS NULL AND mana_cost IS NOT NULL"
+    )
+
+
+def add_keyword_column(cursor):
+    """
+    Add the keywords column (a JSON list of keyword abilities) to a cards
+    table created before it existed and fill it in from the abilities of
+    the cards missing it
+
+    Args:
+        cursor (sqlite3.Connection.Cursor): Cursor for executing sql commands
+    """
+    existing = {row[1] for row in cursor.execute("PRAGMA table_info(cards)")}
+    if "keywords" not in existing:
+        cursor.execute("ALTER TABLE cards ADD COLUMN keywords TEXT")
+    missing = cursor.execute(
+        "SELECT id, abilities FROM cards WHERE keywords IS NULL AND abilities IS NOT NULL"
+    ).fetchall()
+    cursor.executemany(
+        "UPDATE cards SET keywords = ? WHERE id = ?",
+        [
+            (json.dumps(keyword_abilities(json.loads(abilities))), card_id)
+            for card_id, abilities in missing
+        ],
+    )
+
+
+def bump_generation(cursor):
+    """
+    Record that a new generation of the catalog was written, for readers
+    caching what they found in the previous one
+
+    Args:
+        cursor (sqlite3.Connection.Cursor): Cursor for executing sql commands
+    """
+    cursor.execute(
+        "INSERT INTO catalog_meta (key, value) VALUES ('generation', 1) "
+        "ON CONFLICT (key) DO UPDATE SET value = value + 1"
+    )
+
+
+def read_generation(cursor) -> int:
+    """
+    Generation of the catalog, 0 for databases that never recorded one
+
+    Args:
+        cursor (sqlite3.Connection.Cursor): Cursor for executing sql commands
+    """
+    try:
+        found = cursor.execute(
+            "SELECT value FROM catalog_meta WHERE key = 'generation'"
+        ).fetchone()
+    except sqlite3.OperationalError:  # no catalog_meta table
+        return 0
+    return found[0] if found else 0
+
+
+def create_indexes(cursor):
+    """
+    Create the secondary indexes on cards that are missing, including
+    the full text and keyword indexes, and drop the RETIRED_INDEXES
+
+    Args:
+        cursor (sqlite3.Connection.Cursor): Cursor for executing sql commands
+    """
+    for name in RETIRED_INDEXES:
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
+    for name, definition in CARD_INDEXES.items():
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
+    create_search_index(cursor)
+    create_keyword_index(cursor)
+
+
+def drop_indexes(cursor):
+    """
+    Drop the secondary indexes on cards, before a bulk load. The full
+    text and keyword indexes stop being updated and are rebuilt by
+    create_indexes.
+
+    Args:
+        cursor (sqlite3.Connection.Cursor): Cursor for executing sql commands
+    """
+    for name in CARD_INDEXES:
+        cursor.execute(f"DROP INDEX IF EXISTS {name}")
+    for name in {**FTS_TRIGGERS, **KEYWORD_TRIGGERS}:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def create_search_index(cursor):
+    """
+    Create cards_fts, an FTS5 index over FTS_COLUMNS of cards with the
+    trigram tokenizer so any substring of 3 or more characters can be
+    matched, and the triggers keeping it up to date. The index is
+    rebuilt from cards when it or any of its triggers was missing.
+
+    Args:
+        cursor (sqlite3.Connection.Cursor): Cursor for executing sql commands
+    """
+    existing = {
+        name for (name,) in cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name = 'cards_fts' OR "
+            "(type = 'trigger' AND tbl_name = 'cards')"
+        )
+    }
+    cursor.execute(
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS cards_fts USING fts5(
+    {', '.join(FTS_COLUMNS)},
+    content = 'cards', content_rowid = 'id', tokenize = 'trigram'
+    );"""
+    )
+    for name, body in FTS_TRIGGERS.items():
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+    if not existing.issuperset({"cards_fts", *FTS_TRIGGERS}):
+        cursor.execute("INSERT INTO cards_fts (cards_fts) VALUES ('rebuild')")
+
+
+def create_keyword_index(cursor):
+    """
+    Create card_keywords, a row per keyword ability of each card keyed
+    by keyword so the cards with a keyword are one range of the primary
+    key, and the triggers keeping it up to date. The table is refilled
+    from cards.keywords when it or any of its triggers was missing.
+
+    Args:
+        cursor (sqlite3.Connection.Cursor): Cursor for executing sql commands
+    """
+    existing = {
+        name for (name,) in cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name = 'card_keywords' OR "
+            "(type = 'trigger' AND tbl_name = 'cards')"
+        )
+    }
+    cursor.execute(
+        """CREATE TABLE IF NOT EXISTS card_keywords (
+    keyword TEXT NOT NULL,
+    card_id INTEGER NOT NULL,
+    PRIMARY KEY (keyword, card_id)
+    ) WITHOUT ROWID;"""
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_card_keywords_card ON card_keywords(card_id)"
+    )
+    for name, body in KEYWORD_TRIGGERS.items():
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+    if not existing.issuperset({"card_keywords", *KEYWORD_TRIGGERS}):
+        cursor.execute("DELETE FROM card_keywords")
+        cursor.execute(
+            "INSERT OR IGNORE INTO card_keywords (keyword, card_id) "
+            "SELECT value, cards.id FROM cards, json_each(cards.keywords)"
+        )
+
+
+def create_journal(cursor):
+    """
+    Create the checkpoint journal used by incremental refreshes.
+
+    card_journal has a row per card page: the card it was written to,
+    a hash of the parsed fields and when it was last confirmed.
+    set_journal records when a pass over a set started and finished,
+    a set whose last pass never finished is resumed.
+
+    Args:
+        cursor (sqlite3.Connection.Cursor): Cursor for executing sql commands
+    """
+    cursor.execute(
+        """CREATE TABLE IF NOT EXISTS card_journal (
+    set_shortened TEXT NOT NULL,
+    url TEXT NOT NULL,
+    card_id INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    checked_at REAL NOT NULL,
+    PRIMARY KEY (set_shortened, url)
+    );"""
+    )
+    cursor.execute(
+        """CREATE TABLE IF NOT EXISTS set_journal (
+    shortened TEXT PRIMARY KEY,
+    started_at REAL NOT NULL,
+    completed_at REAL
+    );"""
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_card_journal_card ON card_journal(card_id)"
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(
+        description="Add the tables and indexes missing from a card database"
+    )
+    arg_parser.add_argument("db", help="database file to upgrade")
+    args = arg_parser.parse_args()
+    connection = sqlite3.connect(args.db)
+    create_tables(connection.cursor())
+    connection.commit()
+    connection.close()
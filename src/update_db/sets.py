@@ -2,28 +2,104 @@
 sets.py
 
 Created by: James Lambert
-Last Updated: 11 Aug 2025
+Last Updated: 18 Oct 2026
 
 Creation for Set Lookup
+
+The set index is pulled from the site the first time it is asked for
+and kept in the page cache, so importing this module never touches the
+network. A cached copy younger than SET_INDEX_TTL is used as is, an
+older one is revalidated and used as a fallback when the site is down.
 """
 
+import threading
+import time
+
 import requests
-from bs4 import BeautifulSoup
+
+from src.update_db.cache import PageCache
+from src.update_db.fetch import Fetcher
+from src.update_db.parsing import make_soup, SET_TABLE
 
 BASE_URL = "https://aetherhub.com"
 SET_URL = BASE_URL + "/Card/Set"
+SET_INDEX_TTL = 24 * 60 * 60  # seconds
 
-try:
-    RESPONSE = requests.get(SET_URL, timeout=5)
-except TimeoutError:
-    RESPONSE = None
+_loaded = {}
+_lock = threading.Lock()
 
-if RESPONSE:
-    soup = BeautifulSoup(RESPONSE.content, "html.parser")
 
+def parse_set_rows(content: bytes, parser: str = "strained") -> list:
+    """
+    Get the rows of the set table from the set index page
+
+    Args:
+        content (bytes): body of the set index page
+        parser (str): Name of the parsing.BACKENDS entry used for the page
+    """
+    soup = make_soup(content, parser, SET_TABLE)
     table = soup.find("table", class_="table bg-ae-dark table-sm")
     body = table.find("tbody")
-    sets = body.find_all("tr")
+    return body.find_all("tr")
+
+
+def get_sets(
+    refresh: bool = False,
+    fetcher: Fetcher = None,
+    ttl: float = SET_INDEX_TTL,
+    set_url: str = SET_URL,
+) -> list:
+    """
+    Get the rows of the set table, loading them on first use
+
+    Args:
+        refresh (bool): Ask the site again even if a fresh copy is cached
+        fetcher (Fetcher): Fetcher used to pull the index, one backed by
+            the default PageCache if not given
+        ttl (float): Seconds a cached copy is used without asking the site
+        set_url (str): url of the set index page
+    """
+    with _lock:
+        if not refresh and set_url in _loaded:
+            return _loaded[set_url]
+        if fetcher is None:
+            fetcher = Fetcher(workers=1, cache=PageCache())
+        cached = fetcher.cache.load(set_url) if fetcher.cache else None
+        if cached and not refresh and time.time() - cached[1]["fetched_at"] < ttl:
+            content = cached[0]
+        else:
+            try:
+                page = fetcher.get(set_url)
+                if page.status_code != 200:
+                    raise requests.HTTPError(f"{page.status_code} for {set_url}")
+                content = page.content
+            except requests.RequestException:
+                if cached is None:
+                    raise
+                content = cached[0]
+        rows = parse_set_rows(content)
+        _loaded[set_url] = rows
+        return rows
+
+
+def refresh_sets(fetcher: Fetcher = None, set_url: str = SET_URL) -> list:
+    """
+    Pull the set index from the site again, ignoring the TTL
+
+    Args:
+        fetcher (Fetcher): Fetcher used to pull the index
+        set_url (str): url of the set index page
+    """
+    return get_sets(refresh=True, fetcher=fetcher, set_url=set_url)
+
+
+def __getattr__(name):
+    """
+    Keep `sets` available as a module attribute, loaded on first access
+    """
+    if name == "sets":
+        return get_sets()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class MTGSet:
@@ -32,13 +108,14 @@ class MTGSet:
 
     Args:
         content: requests._AtMostOneElement - Results from find function
+        base_url: str - Site the set page is found on
     """
 
-    def __init__(self, content):
+    def __init__(self, content, base_url: str = BASE_URL):
         self.release_date = content.find_all("td")[-1].contents[0]
         self.title = content.find("b").contents[0]
         self.shortened = content.find("small").contents[0]
-        self.url = SET_URL + f"/{self.shortened}"
+        self.url = base_url + f"/Card/Set/{self.shortened}"
 
     def __str__(self):
         return f"{self.title}({self.shortened})"
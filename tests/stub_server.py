@@ -0,0 +1,164 @@
+"""
+stub_server.py
+
+Last Updated: 18 Oct 2026
+
+Local stand-in for the card site, for running the lookup against a host
+that throttles. It serves a set index, a page per set and a page per card
+built from synthetic rows. Its Faults answer a share of the card page
+requests with 429 (at most max_streak times in a row for a page, so the
+retries get through), the card pages listed in always_throttled with 429
+every time and the paths listed in missing with 404. Pass its base_url
+to lookup.gather_cards, or serve it on its own with:
+
+    python -m tests.stub_server --sets 4 --cards 120 --throttle 0.3
+"""
+import argparse
+import html
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import FrozenSet, NamedTuple
+
+from src.benchmarks.synthetic import synthetic_page, synthetic_rows, synthetic_sets
+
+
+class Faults(NamedTuple):
+    """
+    How a StubSite misbehaves
+
+    Args:
+        throttle (float): share of the card page requests answered 429
+        max_streak (int): most 429s in a row for one page from throttle
+        always_throttled (FrozenSet[int]): card numbers always answered 429
+        missing (FrozenSet[str]): paths answered 404
+    """
+
+    throttle: float = 0.0
+    max_streak: int = 2
+    always_throttled: FrozenSet[int] = frozenset()
+    missing: FrozenSet[str] = frozenset()
+
+
+class StubSite:
+    """
+    Pages of a synthetic site, served on a local port by start()
+
+    Args:
+        n_sets (int): sets on the site
+        n_cards (int): cards spread over the sets
+        faults (Faults): how the site misbehaves, not at all when None
+        seed (int): seed of the rows and of the throttling
+    """
+
+    def __init__(self, n_sets: int = 4, n_cards: int = 120, faults: Faults = None,
+                 seed: int = 0):
+        self.sets = synthetic_sets(n_sets)
+        self.rows = list(synthetic_rows(n_cards, n_sets, seed))
+        self.faults = faults or Faults()
+        self._streaks = {}  # path: 429s answered in a row
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def base_url(self) -> str:
+        """url of the running site"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def set_index(self) -> bytes:
+        """
+        Set index page, laid out the way sets.parse_set_rows reads it
+        """
+        rows = "".join(
+            f"<tr><td><b>{html.escape(title)}</b><small>{shortened}</small></td>"
+            f"<td>{release_date}</td></tr>"
+            for shortened, title, release_date, _ in self.sets
+        )
+        return (
+            '<html><body><table class="table bg-ae-dark table-sm">'
+            f"<tbody>{rows}</tbody></table></body></html>"
+        ).encode("utf-8")
+
+    def set_page(self, shortened: str) -> bytes:
+        """
+        Page listing the cards of a set, laid out the way lookup.card_links reads it
+        """
+        links = "".join(
+            f'<a class="item ae-card-link cardLink" href="/Card/View/{idx}">'
+            f'<div class="item-hidden-text">{html.escape(row[1])}</div></a>'
+            for idx, row in enumerate(self.rows) if row[0] == shortened
+        )
+        return f'<html><body><div id="cards">{links}</div></body></html>'.encode("utf-8")
+
+    def respond(self, path: str) -> tuple:
+        """
+        (status, body) of a request for the path
+        """
+        faults = self.faults
+        with self._lock:
+            throttled = (
+                self._streaks.get(path, 0) < faults.max_streak
+                and self._rng.random() < faults.throttle
+            )
+            self._streaks[path] = self._streaks.get(path, 0) + 1 if throttled else 0
+        if path in faults.missing:
+            return 404, b""
+        if path == "/Card/Set":
+            return 200, self.set_index()
+        if path.startswith("/Card/Set/"):
+            return 200, self.set_page(path.rsplit("/", 1)[1])
+        if path.startswith("/Card/View/"):
+            idx = int(path.rsplit("/", 1)[1])
+            if throttled or idx in faults.always_throttled:
+                return 429, b""
+            return 200, synthetic_page(self.rows[idx]).content
+        return 404, b""
+
+    def start(self) -> "StubSite":
+        """
+        Serve the site on a free local port from a daemon thread
+        """
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """Answers every GET from the StubSite"""
+
+            def do_GET(self):  # pylint: disable=invalid-name
+                """Send the page of the path"""
+                status, body = site.respond(self.path)
+                self.send_response(status)
+                if status == 429:
+                    self.send_header("Retry-After", "0")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *_):  # pylint: disable=arguments-differ
+                """Keep the requests out of the output"""
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        """
+        Stop serving
+        """
+        self._server.shutdown()
+        self._server.server_close()
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Serve a throttling stand-in card site")
+    arg_parser.add_argument("--sets", type=int, default=4)
+    arg_parser.add_argument("--cards", type=int, default=120)
+    arg_parser.add_argument("--throttle", type=float, default=0.3)
+    args = arg_parser.parse_args()
+    stub = StubSite(args.sets, args.cards, Faults(throttle=args.throttle)).start()
+    print(f"serving on {stub.base_url}, Ctrl-C to stop")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        stub.stop()
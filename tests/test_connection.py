@@ -0,0 +1,25 @@
+"""
+Tests for the ConnectionManager
+"""
+import os
+
+from src.benchmarks.synthetic import write_catalog
+from src.connection import ConnectionManager
+
+
+def test_replaced_file_is_searched(tmp_path):
+    """Searches after the database file is replaced see the new file"""
+    live, other = str(tmp_path / "live.db"), str(tmp_path / "other.db")
+    write_catalog(live, 2000, 10)
+    write_catalog(other, 3000, 10)
+    manager = ConnectionManager(live)
+    search = manager.search_results()
+    assert search.count_cards() == 2000
+    first = len(search.search_results_by_color("BLUE"))
+
+    os.replace(other, live)
+    search = manager.search_results()
+    assert search.count_cards() == 3000
+    assert len(search.search_results_by_color("BLUE")) > first
+    assert search.cursor.execute("SELECT COUNT(*) FROM cards").fetchone()[0] == 3000
+    manager.close_all()
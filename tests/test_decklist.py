@@ -0,0 +1,145 @@
+"""
+Tests for resolving decklists to cards
+"""
+import sqlite3
+
+import pytest
+
+from src.benchmarks.synthetic import synthetic_rows
+from src.database_search import SearchResults
+from src.decklist import DeckLine, parse_deck_line, resolve_decklist
+from src.name_index import NameIndex, normalize_title
+from src.query_log import QueryLog
+from src.update_db.lookup import INSERT_CARD
+from src.update_db.schema import create_tables
+
+# (set, title) of the cards of the catalog, in id order
+CARDS = [
+    ("M10", "Lightning Bolt"),
+    ("M11", "Lightning Bolt"),
+    ("M10", "Serra Angel"),
+    ("M11", "Llanowar Elves"),
+    ("M11", "Urza's Saga"),
+    ("M10", "Shivan Dragon"),
+]
+
+
+@pytest.fixture(name="search")
+def search_fixture():
+    """
+    SearchResults over a catalog of the CARDS, timed by a QueryLog
+    """
+    conn = sqlite3.connect(":memory:")
+    create_tables(conn.cursor())
+    rows = [
+        (set_shortened, title) + row[2:]
+        for (set_shortened, title), row in zip(CARDS, synthetic_rows(len(CARDS)))
+    ]
+    conn.executemany(INSERT_CARD, rows)
+    conn.commit()
+    yield SearchResults(conn.cursor(), query_log=QueryLog(path=None))
+    conn.close()
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("4 Lightning Bolt", DeckLine("Lightning Bolt", 4)),
+    ("4x Lightning Bolt (M10)", DeckLine("Lightning Bolt", 4, "M10")),
+    ("1 Lightning Bolt [M10] 146", DeckLine("Lightning Bolt", 1, "M10")),
+    ("Serra Angel", DeckLine("Serra Angel")),
+    ("Sideboard:", None),
+    ("// main deck", None),
+    ("   ", None),
+])
+def test_parse_deck_line(text, expected):
+    """Quantities, set codes and collector numbers are read, headers skipped"""
+    assert parse_deck_line(text) == expected
+
+
+def test_resolve(search):
+    """Lines resolve to the printing of their set, else the first one"""
+    matches, unresolved = resolve_decklist(search, [
+        "4 Lightning Bolt (M11)", "Sideboard", "2 lightning bolt", "1 Serra Angel [XYZ]",
+        "3 Urzas Saga", "1 Nothing Like It",
+    ])
+    assert [(match.line, match.card.card_id, match.corrected) for match in matches] == [
+        (0, 2, False), (2, 1, False), (3, 3, False), (4, 5, True),
+    ]
+    assert matches[0].entry == DeckLine("Lightning Bolt", 4, "M11")
+    assert unresolved == [(5, DeckLine("Nothing Like It"))]
+
+
+def test_resolve_misspelled(search):
+    """Misspelled titles resolve to the closest title, unless fuzzy is off"""
+    lines = ["1 Lightening Bolt", "1 Shivan Dragn", "1 Llanowr Elves"]
+    matches, unresolved = resolve_decklist(search, lines)
+    assert [match.card.title for match in matches] == [
+        "Lightning Bolt", "Shivan Dragon", "Llanowar Elves",
+    ]
+    assert all(match.corrected for match in matches) and not unresolved
+    matches, unresolved = resolve_decklist(search, lines, fuzzy=False)
+    assert not matches and len(unresolved) == 3
+
+
+def test_resolve_reads_only(search):
+    """Resolving writes nothing, so the connection's cache is kept"""
+    conn = search.cursor.connection
+    changes = conn.total_changes
+    index = search.name_index
+    for _ in range(3):
+        resolve_decklist(search, ["1 Lightning Bolt", "1 Serra Angle"])
+    assert conn.total_changes == changes and not conn.in_transaction
+    assert search.name_index is index
+    statements = search.query_log.report()["statements"]
+    assert any("JOIN cards" in query for query in statements)
+
+
+def one_typo_from(text: str, letters: str) -> set:
+    """The text and every text one typo from it, by brute force"""
+    edits = {text}
+    for idx in range(len(text) + 1):
+        edits.add(text[:idx] + text[idx + 1:])
+        edits.add(text[:idx] + text[idx + 1:idx + 2] + text[idx:idx + 1] + text[idx + 2:])
+        for letter in letters:
+            edits.add(text[:idx] + letter + text[idx + 1:])
+            edits.add(text[:idx] + letter + text[idx:])
+    return edits
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Lightning Bolt", "Lightning Bolt"),
+    ("lightning  bolt!", "Lightning Bolt"),
+    ("Lightnign Bolt", "Lightning Bolt"),
+    ("Ligthning Bolt", "Lightning Bolt"),
+    ("Lightning Bolr", "Lightning Bolt"),
+    ("Lightning Blt", "Lightning Bolt"),
+    ("XLightning Bolt", "Lightning Bolt"),
+    ("Lightning Boltt", "Lightning Bolt"),
+    ("Lihgtning Blot", None),
+    ("Lightening Bot", None),
+    ("Bolt", None),
+    ("Xyzzy Plugh", None),
+])
+def test_closest(text, expected):
+    """A letter replaced, dropped, added or swapped with the next is one typo"""
+    index = NameIndex([title for _, title in CARDS] + ["Lightning Blade"])
+    found = index.closest([text])
+    assert (found[text][1] if text in found else None) == expected
+
+
+def test_closest_agrees_with_brute_force():
+    """closest finds a title one typo away whenever there is one"""
+    titles = sorted({row[1] for row in synthetic_rows(2000)})
+    index = NameIndex(titles)
+    texts = [title[:5] + title[6:] for title in titles[::40]]  # one letter dropped
+    texts += [title[:-3] + title[-2] + title[-3] + title[-1] for title in titles[::45]]
+    texts += [title.replace("a", "e") for title in titles[::50]]  # several replaced
+    texts += ["Xyzzy Plugh"]
+    found = index.closest(texts)
+    names = {normalize_title(title): title for title in titles}
+    letters = set("".join(names))
+    for text in texts:
+        near = {names[name] for name in one_typo_from(normalize_title(text), letters) & set(names)}
+        if text in found:
+            assert found[text][1] in near
+        else:
+            assert not near
@@ -0,0 +1,49 @@
+"""
+Tests that the FilterEngine finds the same cards as multi_command_building
+"""
+import sqlite3
+
+import pytest
+
+from src.benchmarks.filter_engine import SEARCHES
+from src.benchmarks.search import build_db
+from src.database_search import SearchResults
+from src.filter_engine import HAS_NUMPY, FilterEngine
+from src.update_db.enums import Rarity
+
+if not HAS_NUMPY:
+    pytest.skip("NumPy is not installed", allow_module_level=True)
+
+# name: kwargs of multi_command_building, beside the benchmarked SEARCHES
+WILDCARDS = {
+    # literal through cards_fts, wildcards only in the LIKE of short terms
+    "subtype underscore": {"subtype": "e_f"},
+    "type percent": {"card_type": "cr%ure"},
+    "type percent+rarity": {"card_type": "Cr%", "rarity": Rarity.RARE},
+    "short subtype underscore": {"subtype": "E_"},
+    "short type percent": {"card_type": "%"},
+}
+
+
+@pytest.fixture(name="searches", scope="module")
+def searches_fixture(tmp_path_factory):
+    """
+    SearchResults and FilterEngine over the same synthetic catalog
+    """
+    path = tmp_path_factory.mktemp("engine") / "engine.db"
+    build_db(str(path), 5000)
+    connection = sqlite3.connect(path)
+    search = SearchResults(connection.cursor())
+    yield search, FilterEngine(search)
+    connection.close()
+
+
+@pytest.mark.parametrize("kwargs", [*SEARCHES.values(), *WILDCARDS.values()],
+                         ids=[*SEARCHES, *WILDCARDS])
+def test_same_cards(searches, kwargs):
+    """Both paths find the same cards and count them the same"""
+    search, engine = searches
+    search.cache.clear()
+    expected = [card.card_id for card in search.multi_command_building(**kwargs)]
+    assert [card.card_id for card in engine.multi_command_building(**kwargs)] == sorted(expected)
+    assert engine.count_cards(**kwargs) == search.count_cards(**kwargs) == len(expected)
@@ -0,0 +1,77 @@
+"""
+Tests for the IncrementalRefresh against a StubSite
+"""
+import sqlite3
+
+import pytest
+
+from src.update_db import scheduler
+from src.update_db.fetch import Fetcher
+from src.update_db.incremental import IncrementalRefresh
+from src.update_db.lookup import gather_cards
+from src.update_db.sets import refresh_sets
+from tests.stub_server import Faults, StubSite
+
+
+@pytest.fixture(name="site")
+def site_fixture():
+    """
+    StubSite kept on one port for every refresh of a test, as the card
+    journal knows the pages by url
+    """
+    site = StubSite(4, 120).start()
+    yield site
+    site.stop()
+
+
+@pytest.fixture(name="refresh")
+def refresh_fixture(monkeypatch, tmp_path, site):
+    """
+    Refresh a database from the site with the given Faults, returning
+    the connection
+    """
+    monkeypatch.setattr(scheduler, "BACKOFF_BASE", 0.001)
+    conn = sqlite3.connect(tmp_path / "cards.db")
+
+    def refresh(faults: Faults = None, gather: bool = False):
+        site.faults = faults or Faults()
+        fetcher = Fetcher(workers=4, per_host=2)
+        # set indexes are remembered by url, and ports get reused
+        refresh_sets(fetcher, site.base_url + "/Card/Set")
+        if gather:
+            gather_cards(conn, conn.cursor(), fetcher, base_url=site.base_url)
+        else:
+            IncrementalRefresh(conn, fetcher).run(site.base_url)
+        fetcher.close()
+        return conn
+
+    yield refresh
+    conn.close()
+
+
+def stored_sets(conn) -> list:
+    """Codes of the sets in the sets table"""
+    return [row[0] for row in conn.execute("SELECT shortened FROM sets ORDER BY 1")]
+
+
+def test_failed_card_leaves_set_unstored(refresh):
+    """A set whose card fails keeps its row out until a pass gets every card"""
+    faults = Faults(always_throttled=frozenset([5]), missing=frozenset(["/Card/View/40"]))
+    conn = refresh(faults)
+    assert stored_sets(conn) == ["S002", "S003"]
+    assert conn.execute("SELECT COUNT(*) FROM cards").fetchone()[0] == 118
+
+    conn = refresh()
+    assert stored_sets(conn) == ["S000", "S001", "S002", "S003"]
+    assert conn.execute("SELECT COUNT(*) FROM cards").fetchone()[0] == 120
+
+
+def test_gather_finishes_incomplete_set(refresh):
+    """gather_cards loads a set a refresh left incomplete without duplicates"""
+    faults = Faults(always_throttled=frozenset([5]), missing=frozenset(["/Card/Set/S001"]))
+    conn = refresh(faults)
+    assert stored_sets(conn) == ["S002", "S003"]
+
+    conn = refresh(gather=True)
+    assert stored_sets(conn) == ["S000", "S001", "S002", "S003"]
+    assert conn.execute("SELECT COUNT(*) FROM cards").fetchone()[0] == 120
@@ -0,0 +1,41 @@
+"""
+Tests for reading keyword abilities at ingest and in keyword searches
+"""
+import sqlite3
+
+import pytest
+
+from src.benchmarks.synthetic import write_catalog
+from src.database_search import SearchResults, parse_keywords
+from src.update_db.keywords import keyword_abilities, keyword_name
+
+
+@pytest.mark.parametrize("term, expected", [
+    ("first strike", "First strike"),
+    ("ward 2", "Ward"),
+    ("Ward {1}{U}", "Ward"),
+    ("Protection from red", "Protection"),
+    ("Flying 2", "Flying 2"),
+    ("Equip abilities you activate cost 1 less", "Equip abilities you activate cost 1 less"),
+])
+def test_keyword_name(term, expected):
+    """Terms name keywords the way ability lines do at ingest"""
+    assert keyword_name(term) == expected
+    if expected != term:
+        assert keyword_abilities([term]) == [expected]
+
+
+def test_parameters_dropped_from_searches(tmp_path):
+    """A keyword searched with its parameter finds the cards stored without it"""
+    assert parse_keywords("Ward 2 AND NOT first strike") == (
+        "and", [("keyword", "Ward"), ("not", ("keyword", "First strike"))],
+    )
+    path = str(tmp_path / "cards.db")
+    write_catalog(path, 2000, 10)
+    conn = sqlite3.connect(path)
+    search = SearchResults(conn.cursor())
+    warded = search.count_cards(keywords="Ward")
+    assert warded > 0
+    assert search.count_cards(keywords="Ward 2") == warded
+    assert search.count_cards(keywords="ward {1} OR Ward 3") == warded
+    conn.close()
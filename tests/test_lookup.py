@@ -0,0 +1,83 @@
+"""
+Tests for lookup.gather_cards against a throttling StubSite
+"""
+import sqlite3
+from urllib.parse import urlsplit
+
+import pytest
+import requests
+
+from src.update_db import scheduler
+from src.update_db.fetch import Fetcher
+from src.update_db.lookup import gather_cards
+from src.update_db.schema import create_tables
+from src.update_db.sets import refresh_sets
+from tests.stub_server import Faults, StubSite
+
+
+@pytest.fixture(name="gather")
+def gather_fixture(monkeypatch, tmp_path):
+    """
+    Run gather_cards against a StubSite into a new database, returning
+    the connection. Requests for the paths in timing_out raise
+    ConnectTimeout.
+    """
+    monkeypatch.setattr(scheduler, "BACKOFF_BASE", 0.001)
+
+    def gather(site: StubSite, conn=None, timing_out=()):
+        site.start()
+        conn = conn or sqlite3.connect(tmp_path / "cards.db")
+        create_tables(conn.cursor())
+        fetcher = Fetcher(workers=4, per_host=2, adaptive=True)
+        session_get = fetcher.session.get
+
+        def get(url, **kwargs):
+            if urlsplit(url).path in timing_out:
+                raise requests.ConnectTimeout(url)
+            return session_get(url, **kwargs)
+
+        monkeypatch.setattr(fetcher.session, "get", get)
+        # set indexes are remembered by url, and ports get reused
+        refresh_sets(fetcher, site.base_url + "/Card/Set")
+        gather_cards(conn, conn.cursor(), fetcher, base_url=site.base_url)
+        fetcher.close()
+        site.stop()
+        return conn
+
+    return gather
+
+
+def test_all_cards_stored(gather):
+    """Every set and card of a site that answers is stored"""
+    conn = gather(StubSite(n_sets=4, n_cards=120))
+    assert conn.execute("SELECT COUNT(*) FROM sets").fetchone()[0] == 4
+    assert conn.execute("SELECT COUNT(*) FROM cards").fetchone()[0] == 120
+
+
+def test_throttled_card_leaves_set_incomplete(gather):
+    """A set with a card still throttled after the retries is not committed"""
+    # card 31 is in the second set and never gets through the retries
+    conn = gather(StubSite(4, 120, Faults(throttle=0.3, always_throttled=frozenset([31]))))
+    stored = [row[0] for row in conn.execute("SELECT shortened FROM sets ORDER BY shortened")]
+    assert stored == ["S000", "S002", "S003"]
+    counts = dict(conn.execute("SELECT set_shortened, COUNT(*) FROM cards GROUP BY 1"))
+    assert counts == {"S000": 30, "S002": 30, "S003": 30}
+
+    # the next run goes back for the set and stores all of it
+    conn = gather(StubSite(n_sets=4, n_cards=120), conn)
+    assert conn.execute("SELECT COUNT(*) FROM sets").fetchone()[0] == 4
+    assert conn.execute("SELECT COUNT(*) FROM cards").fetchone()[0] == 120
+
+
+def test_failed_pages_leave_sets_incomplete(gather):
+    """Missing pages and timeouts skip their set and the run goes on"""
+    # card 75 is in the third set and card 100 in the fourth
+    faults = Faults(missing=frozenset(["/Card/Set/S001", "/Card/View/75"]))
+    conn = gather(StubSite(4, 120, faults), timing_out={"/Card/View/100"})
+    stored = [row[0] for row in conn.execute("SELECT shortened FROM sets")]
+    assert stored == ["S000"]
+    assert conn.execute("SELECT COUNT(*) FROM cards").fetchone()[0] == 30
+
+    conn = gather(StubSite(4, 120), conn)
+    assert conn.execute("SELECT COUNT(*) FROM sets").fetchone()[0] == 4
+    assert conn.execute("SELECT COUNT(*) FROM cards").fetchone()[0] == 120
@@ -0,0 +1,85 @@
+"""
+Tests for the staged ingestion Pipeline against a StubSite
+"""
+import sqlite3
+import threading
+
+import pytest
+
+from src.update_db import pipeline, scheduler
+from src.update_db.fetch import Fetcher
+from src.update_db.pipeline import Pipeline
+from src.update_db.schema import create_tables
+from src.update_db.sets import refresh_sets
+from tests.stub_server import Faults, StubSite
+
+
+@pytest.fixture(name="ingest")
+def ingest_fixture(monkeypatch, tmp_path):
+    """
+    Run a Pipeline against a StubSite into a new database, from a thread
+    given 60 seconds to finish. Returns the connection, the stats and
+    the exception run() raised.
+    """
+    monkeypatch.setattr(scheduler, "BACKOFF_BASE", 0.001)
+    db_file = str(tmp_path / "cards.db")
+    conn = sqlite3.connect(db_file)
+    create_tables(conn.cursor())
+    conn.commit()
+
+    def ingest(site: StubSite):
+        site.start()
+        fetcher = Fetcher(workers=4, per_host=4)
+        # set indexes are remembered by url, and ports get reused
+        refresh_sets(fetcher, site.base_url + "/Card/Set")
+        outcome = {}
+
+        def run():
+            try:
+                outcome["stats"] = Pipeline(db_file, 1, queue_size=4).run(
+                    fetcher, base_url=site.base_url
+                )
+            except Exception as err:  # pylint: disable=broad-exception-caught
+                outcome["error"] = err
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        thread.join(60)
+        fetcher.close()
+        site.stop()
+        assert not thread.is_alive(), "the pipeline hung"
+        return conn, outcome.get("stats"), outcome.get("error")
+
+    yield ingest
+    conn.close()
+
+
+def test_all_cards_stored(ingest):
+    """Every set and card of a site that answers is stored"""
+    conn, stats, error = ingest(StubSite(4, 120))
+    assert error is None
+    assert stats["sets"] == 4 and stats["cards"] == 120
+    assert conn.execute("SELECT COUNT(*) FROM cards").fetchone()[0] == 120
+
+
+def test_failed_pages_leave_sets_incomplete(ingest):
+    """A missing set page or card page skips only its set"""
+    # card 75 is in the third set
+    faults = Faults(missing=frozenset(["/Card/Set/S001", "/Card/View/75"]))
+    conn, stats, error = ingest(StubSite(4, 120, faults))
+    assert error is None
+    stored = [row[0] for row in conn.execute("SELECT shortened FROM sets ORDER BY 1")]
+    assert stored == ["S000", "S003"]
+    assert conn.execute("SELECT COUNT(*) FROM cards").fetchone()[0] == 60
+    assert stats["sets"] == 2 and stats["cards"] == 60 and stats["failed"] == 1
+
+
+def test_writer_failure_raises(ingest, monkeypatch):
+    """An error in the writer stops every stage and is raised by run()"""
+    def add_row(*_):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(pipeline.BulkLoader, "add_row", add_row)
+    conn, _, error = ingest(StubSite(4, 120))
+    assert isinstance(error, sqlite3.OperationalError)
+    assert conn.execute("SELECT COUNT(*) FROM cards").fetchone()[0] == 0
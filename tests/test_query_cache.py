@@ -0,0 +1,36 @@
+"""
+Tests for the QueryCache of SearchResults
+"""
+import sqlite3
+
+from src.benchmarks.synthetic import synthetic_rows, write_catalog
+from src.database_search import QueryCache, SearchResults
+from src.update_db.lookup import INSERT_CARD
+
+
+def test_same_connection_write_is_seen(tmp_path):
+    """A write committed through the searching connection drops the cache"""
+    path = str(tmp_path / "cards.db")
+    write_catalog(path, 2000, 10)
+    conn = sqlite3.connect(path)
+    search = SearchResults(conn.cursor(), cache=QueryCache())
+    row = next(iter(synthetic_rows(1)))
+    before = search.count_cards(title=row[1])
+
+    conn.execute(INSERT_CARD, row)
+    conn.commit()
+    assert search.count_cards(title=row[1]) == before + 1
+    conn.close()
+
+
+def test_cached_card_sets_last_result(tmp_path):
+    """A card served from the cache is the last result, as a fetched one is"""
+    path = str(tmp_path / "cards.db")
+    write_catalog(path, 100, 2)
+    conn = sqlite3.connect(path)
+    search = SearchResults(conn.cursor(), cache=QueryCache())
+    card = search.get_card_by_id(1)
+    search.search_cards_by_set("S001")
+    assert search.get_card_by_id(1).row == card.row
+    assert search.last_result == [card.row]
+    conn.close()
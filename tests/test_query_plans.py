@@ -0,0 +1,47 @@
+"""
+Tests that every search of SearchResults uses the index meant for it,
+see src/benchmarks/query_plans.py
+"""
+import sqlite3
+
+import pytest
+
+from src.benchmarks.query_plans import EXPECTED, SEARCHES
+from src.benchmarks.search import build_db
+from src.database_search import SearchResults
+from src.decklist import DECK_PRINTING
+
+
+@pytest.fixture(name="search", scope="module")
+def search_fixture(tmp_path_factory):
+    """
+    SearchResults over a synthetic catalog large enough for the planner
+    to prefer the indexes
+    """
+    path = tmp_path_factory.mktemp("plans") / "plans.db"
+    build_db(str(path), 20000)
+    connection = sqlite3.connect(path)
+    yield SearchResults(connection.cursor())
+    connection.close()
+
+
+@pytest.mark.parametrize("name", list(SEARCHES))
+def test_plan_uses_index(search, name):
+    """The plan of the search has the step it is expected to use"""
+    SEARCHES[name](search)
+    plan = search.explain()
+    assert any(EXPECTED[name] in step for step in plan), plan
+
+
+def test_every_search_has_a_plan():
+    """Every search checked has an expected plan step"""
+    assert set(SEARCHES) == set(EXPECTED)
+
+
+def test_title_index_serves_decklists(search):
+    """The printings of decklist lines are looked up on idx_cards_title"""
+    conn = search.cursor.connection
+    conn.execute("CREATE TEMP TABLE deck (title TEXT, set_shortened TEXT)")
+    plan = search.explain(f"SELECT ({DECK_PRINTING}) FROM deck")
+    conn.execute("DROP TABLE temp.deck")
+    assert any("INDEX idx_cards_title (title=?)" in step for step in plan), plan
@@ -0,0 +1,36 @@
+"""
+Tests for the columnar catalog snapshot
+"""
+import sqlite3
+import subprocess
+import sys
+
+from src.benchmarks.synthetic import write_catalog
+from src.database_search import DbCard
+from src.snapshot import Snapshot
+
+
+def test_cli_round_trip(tmp_path):
+    """Every card and set reads back as stored, from a path needing quoting"""
+    folder = tmp_path / "odd ?#% name"
+    folder.mkdir()
+    path, out = folder / "catalog.db", folder / "catalog.snapshot"
+    write_catalog(str(path), 500, 5)
+    subprocess.run(
+        [sys.executable, "-m", "src.snapshot", str(path), str(out)],
+        check=True, capture_output=True,
+    )
+    conn = sqlite3.connect(path)
+    rows = conn.execute("SELECT * FROM cards ORDER BY id").fetchall()
+    sets = conn.execute("SELECT * FROM sets ORDER BY shortened").fetchall()
+    conn.close()
+    with Snapshot.open(str(out)) as snapshot:
+        assert len(snapshot) == len(rows)
+        for row, card in zip(rows, snapshot.iter_cards()):
+            expected = DbCard(row)
+            assert (card.card_id, card.title, card.set, card.mana_cost, card.abilities) == (
+                expected.card_id, expected.title, expected.set,
+                expected.mana_cost, expected.abilities,
+            )
+        assert snapshot.card_by_id(rows[-1][0]).title == rows[-1][2]
+        assert [tuple(row) for row in snapshot.get_sets()] == sets